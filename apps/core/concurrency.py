@@ -0,0 +1,68 @@
+"""
+并发执行相互独立的数据库读取
+
+Django 的异步 ORM（acount、aget 等）在同步数据库驱动上通过 sync_to_async(thread_sensitive=True)
+执行，同一请求的查询都排在同一个线程上，用 asyncio.gather 组合也只是依次执行。
+gather_queries 把每个读取函数放到专用线程池的线程上、使用该线程自己的数据库连接执行，
+总耗时接近最慢的一项而不是各项之和。
+
+线程池在进程内常驻（WSGI 下每个请求的事件循环都是新建的，不能用循环自带的线程池），
+线程上的连接按 CONN_MAX_AGE 复用或关闭。内存 SQLite 数据库（测试）的连接之间
+看不到彼此未提交的数据，此时退回到请求线程上依次执行。
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ASYNC_QUERY_WORKERS', 8),
+                thread_name_prefix='portal-query',
+            )
+        return _executor
+
+
+def can_query_concurrently():
+    """数据库是否可以由多个连接同时读取"""
+    connection = connections[DEFAULT_DB_ALIAS]
+    return not (connection.vendor == 'sqlite' and connection.is_in_memory_db())
+
+
+def _in_worker(func):
+    """在线程池线程中执行 func，前后按 CONN_MAX_AGE 处理该线程的连接（SQL 由 contextvars 计入当前请求）"""
+    def run():
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_queries(*funcs):
+    """
+    并发执行若干个无参数的同步读取函数，按传入顺序返回结果列表
+
+    每个函数应在内部把查询集求值（如 list(queryset)），不要返回惰性查询集。
+    contextvars（如只读库路由、请求计时）会带入执行线程。
+    """
+    if not can_query_concurrently():
+        return await asyncio.gather(*(sync_to_async(func)() for func in funcs))
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    return await asyncio.gather(*(
+        loop.run_in_executor(executor, contextvars.copy_context().run, _in_worker(func))
+        for func in funcs
+    ))
@@ -0,0 +1,42 @@
+"""
+SQLite 连接参数
+
+SQLite 的 journal_mode、synchronous 等参数需要在每个连接上用 PRAGMA 设置，
+Django 的 sqlite3 后端没有对应的配置项。这里在 connection_created 信号中
+按 settings.SQLITE_PRAGMAS 依次执行，其他数据库后端不受影响。
+
+PRAGMA 不支持参数绑定，名称与取值在拼接前先校验。
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# 允许通过配置设置的 PRAGMA
+SUPPORTED_PRAGMAS = (
+    'busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store',
+    'foreign_keys', 'wal_autocheckpoint', 'journal_size_limit',
+)
+
+_VALUE_PATTERN = re.compile(r'^(-?\d+|[A-Za-z_]+)$')
+
+
+def pragma_statements(pragmas):
+    """把 {名称: 取值} 转为 PRAGMA 语句列表，名称或取值不合法时抛出 ImproperlyConfigured"""
+    statements = []
+    for name, value in pragmas.items():
+        if name not in SUPPORTED_PRAGMAS:
+            raise ImproperlyConfigured(f'SQLITE_PRAGMAS 不支持 {name!r}')
+        if not _VALUE_PATTERN.match(str(value)):
+            raise ImproperlyConfigured(f'SQLITE_PRAGMAS[{name!r}] 的取值不合法: {value!r}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """新建 SQLite 连接后执行 SQLITE_PRAGMAS 中的 PRAGMA"""
+    if connection.vendor != 'sqlite':
+        return
+    for statement in pragma_statements(getattr(settings, 'SQLITE_PRAGMAS', {})):
+        # 直接使用底层连接，不计入查询日志与请求计时
+        connection.connection.execute(statement)
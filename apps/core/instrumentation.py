@@ -0,0 +1,166 @@
+"""
+请求性能采集
+
+在一次请求内累计 SQL 查询次数与耗时、模板渲染耗时、缓存命中情况。
+统计对象保存在 contextvars 中，只有在 RequestTimingMiddleware 包裹的请求内才会记录，
+同步与异步视图都适用。
+
+install() 通过 connection_created 信号为每个数据库连接加一个 execute_wrapper，
+按当前上下文的统计对象记录 SQL：ASGI 下查询在 sync_to_async 的线程、gather_queries 的
+线程池线程中执行，各线程的连接不同，contextvars 会随调用带入这些线程。
+模板渲染与缓存读取没有官方钩子，install() 为模板后端的 Template.render 与已配置缓存后端的
+get / get_many 加一层计时包装（只包装一次）。
+"""
+import contextvars
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils.module_loading import import_string
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+_MISSING = object()
+
+
+class RequestStats:
+    """
+    一次请求的性能数据，耗时单位为秒
+
+    gather_queries 会让同一请求的查询在多个线程中同时执行，SQL 与缓存计数在锁内累加。
+    """
+
+    __slots__ = (
+        'sql_count', 'sql_time', 'template_time', 'template_depth', 'cache_hits', 'cache_misses', '_lock',
+    )
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper 使用的包装函数"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.sql_count += 1
+                self.sql_time += elapsed
+
+    def count_cache(self, hits, misses):
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+
+def _record_sql(execute, sql, params, many, context):
+    """安装在每个数据库连接上的 execute_wrapper，不在采集中时直接执行"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.sql_wrapper(execute, sql, params, many, context)
+
+
+def _wrap_connection(connection):
+    if _record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_sql)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _wrap_connection(connection)
+
+
+def start():
+    """开始采集，返回 (统计对象, 用于 stop 的令牌)"""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    """当前请求的统计对象，不在采集中时为 None"""
+    return _current.get()
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return render(self, *args, **kwargs)
+        # 模板内嵌套调用 render_to_string（如侧边栏菜单）时只计最外层
+        stats.template_depth += 1
+        begin = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - begin
+    wrapper._request_timing = True
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        stats = _current.get()
+        if stats is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            stats.count_cache(0, 1)
+            return default
+        stats.count_cache(1, 0)
+        return value
+    wrapper._request_timing = True
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        stats = _current.get()
+        if stats is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        result = get_many(self, keys, version)
+        stats.count_cache(len(result), len(keys) - len(result))
+        return result
+    wrapper._request_timing = True
+    return wrapper
+
+
+def _patch(cls, name, decorator):
+    method = getattr(cls, name)
+    if not getattr(method, '_request_timing', False):
+        setattr(cls, name, decorator(method))
+
+
+def install():
+    """为数据库连接、模板渲染与已配置的缓存后端加上采集包装，重复调用无副作用"""
+    connection_created.connect(_on_connection_created, dispatch_uid='request_timing_sql')
+    for connection in connections.all(initialized_only=True):
+        _wrap_connection(connection)
+    _patch(DjangoTemplate, 'render', _timed_render)
+    for options in settings.CACHES.values():
+        backend = import_string(options['BACKEND'])
+        _patch(backend, 'get', _counted_get)
+        # 默认的 get_many 逐个调用 get，已经计数
+        if backend.get_many is not BaseCache.get_many:
+            _patch(backend, 'get_many', _counted_get_many)
@@ -0,0 +1,66 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+DEFAULT_PATHS = (
+    '/portal/',
+    '/portal/announcements/',
+    '/portal/daily-reports/',
+    '/portal/delivery/',
+    '/portal/warehouse/',
+    '/portal/change-order/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        '以当前配置在进程内依次请求门户页面并统计吞吐量，'
+        '通过 --settings 分别运行 development 与 production 配置即可对比'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='每个页面的请求次数（默认200）')
+        parser.add_argument('--path', action='append', dest='paths', help='要请求的路径，可重复指定（默认常用页面）')
+        parser.add_argument('--username', help='登录用户（默认第一个超级用户）')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            user = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('找不到登录用户，请先创建超级用户或通过 --username 指定')
+
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+        client.force_login(user)
+
+        template_options = settings.TEMPLATES[0]['OPTIONS']
+        loaders = template_options.get('loaders') or ['默认']
+        database = settings.DATABASES['default']
+        self.stdout.write(f'配置: {settings.SETTINGS_MODULE}  DEBUG={settings.DEBUG}')
+        self.stdout.write(f'模板加载器: {loaders[0][0] if isinstance(loaders[0], tuple) else loaders[0]}')
+        self.stdout.write(f'CONN_MAX_AGE={database.get("CONN_MAX_AGE", 0)}  会话: {settings.SESSION_ENGINE}')
+
+        paths = options['paths'] or DEFAULT_PATHS
+        count = options['requests']
+        total_elapsed = 0.0
+        for path in paths:
+            # 预热：编译模板、填充缓存
+            response = client.get(path, secure=True)
+            if response.status_code != 200:
+                raise CommandError(f'{path} 返回 {response.status_code}')
+
+            start = time.perf_counter()
+            for _ in range(count):
+                client.get(path, secure=True)
+            elapsed = time.perf_counter() - start
+            total_elapsed += elapsed
+            self.stdout.write(f'{path:<36} {elapsed / count * 1000:8.2f} ms/请求  {count / elapsed:8.1f} 请求/秒')
+
+        total = count * len(paths)
+        self.stdout.write(self.style.SUCCESS(f'合计 {total} 次请求，{total / total_elapsed:.1f} 请求/秒'))
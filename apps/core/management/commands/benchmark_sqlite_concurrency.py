@@ -0,0 +1,150 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.db import pragma_statements
+from apps.core.metrics import percentile
+
+CITIES = ('LAX', 'SAN', 'SFO', 'SEA', 'JFK', 'ATL', 'MIA', 'ORD')
+
+READ_SQL = (
+    'SELECT city, COUNT(*), SUM(volume) FROM bench_report '
+    'WHERE report_date >= ? GROUP BY city'
+)
+WRITE_SQL = 'INSERT INTO bench_report (report_date, city, volume) VALUES (?, ?, ?)'
+
+
+def _rows(rng, count, start):
+    return [
+        ((start - timedelta(days=rng.randrange(365))).isoformat(), rng.choice(CITIES), rng.randint(100, 5000))
+        for _ in range(count)
+    ]
+
+
+def _prepare(path, rows, journal_mode):
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute(f'PRAGMA journal_mode = {journal_mode}')
+    connection.execute(
+        'CREATE TABLE bench_report (id INTEGER PRIMARY KEY, report_date TEXT, city TEXT, volume INTEGER)'
+    )
+    connection.execute('CREATE INDEX bench_report_date ON bench_report (report_date)')
+    connection.execute('BEGIN')
+    connection.executemany(WRITE_SQL, _rows(random.Random(0), rows, date.today()))
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def _worker(role, path, statements, timeout, deadline, batch, seed, results):
+    """在独立进程中循环读或写，直到 deadline；结果为 (角色, 成功次数, 锁冲突次数, 各次耗时)"""
+    rng = random.Random(seed)
+    connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    for statement in statements:
+        connection.execute(statement)
+    since = (date.today() - timedelta(days=30)).isoformat()
+    done = locked = 0
+    latencies = []
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == 'read':
+                connection.execute(READ_SQL, (since,)).fetchall()
+            else:
+                # 模拟发布日报：一个事务内写入一批子报表
+                connection.execute('BEGIN')
+                connection.executemany(WRITE_SQL, _rows(rng, batch, date.today()))
+                connection.execute('COMMIT')
+        except sqlite3.OperationalError as exc:
+            if 'locked' not in str(exc) and 'busy' not in str(exc):
+                raise
+            locked += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            continue
+        done += 1
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    results.put((role, done, locked, latencies))
+
+
+class Command(BaseCommand):
+    help = (
+        '多进程 SQLite 读写并发基准：在临时数据库上分别以默认参数（回滚日志）'
+        '与 SQLITE_PRAGMAS（WAL 等）运行若干读进程与写进程，对比吞吐量与锁冲突'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='读进程数（默认4）')
+        parser.add_argument('--writers', type=int, default=2, help='写进程数（默认2）')
+        parser.add_argument('--seconds', type=float, default=5, help='每种配置的运行秒数（默认5）')
+        parser.add_argument('--rows', type=int, default=50000, help='初始数据行数（默认50000）')
+        parser.add_argument('--batch', type=int, default=500, help='每个写事务插入的行数（默认500）')
+        parser.add_argument(
+            '--timeout', type=float, default=5,
+            help='sqlite3.connect 的 timeout 秒数，与 Django 默认值相同（默认5）',
+        )
+
+    def handle(self, *args, **options):
+        tuned = pragma_statements(settings.SQLITE_PRAGMAS)
+        journal_mode = str(settings.SQLITE_PRAGMAS.get('journal_mode', 'DELETE'))
+        modes = (
+            ('默认参数', 'DELETE', []),
+            ('SQLITE_PRAGMAS', journal_mode, tuned),
+        )
+        self.stdout.write(f'{options["readers"]} 个读进程，{options["writers"]} 个写进程，每种配置 {options["seconds"]} 秒')
+        for statement in tuned:
+            self.stdout.write(f'  {statement}')
+
+        for label, mode, statements in modes:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                _prepare(path, options['rows'], mode)
+                self.report(label, self.run(path, statements, options))
+
+    def run(self, path, statements, options):
+        results = multiprocessing.Queue()
+        deadline = time.time() + options['seconds']
+        roles = ['read'] * options['readers'] + ['write'] * options['writers']
+        processes = [
+            multiprocessing.Process(
+                target=_worker,
+                args=(role, path, statements, options['timeout'], deadline, options['batch'], index, results),
+            )
+            for index, role in enumerate(roles)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        summary = {}
+        for role, done, locked, latencies in collected:
+            entry = summary.setdefault(role, {'done': 0, 'locked': 0, 'latencies': []})
+            entry['done'] += done
+            entry['locked'] += locked
+            entry['latencies'].extend(latencies)
+        for entry in summary.values():
+            entry['rate'] = entry['done'] / options['seconds']
+            entry['latencies'].sort()
+        return summary
+
+    def report(self, label, summary):
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        for role, name in (('read', '读'), ('write', '写事务')):
+            entry = summary.get(role)
+            if entry is None:
+                continue
+            latencies = entry['latencies']
+            self.stdout.write(
+                f'  {name:<4} {entry["rate"]:9.1f} 次/秒  '
+                f'p95 {percentile(latencies, 0.95) * 1000:8.1f} ms  '
+                f'最大 {(latencies[-1] if latencies else 0) * 1000:8.1f} ms  '
+                f'database is locked: {entry["locked"]}'
+            )
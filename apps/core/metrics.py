@@ -0,0 +1,72 @@
+"""
+路由性能指标
+
+进程内按路由（URL名称）保留最近 REQUEST_METRICS_WINDOW 次请求的耗时等数据，
+读取时计算 p50 / p95 / p99。数据只存在于当前进程，多进程部署时每个进程各自统计。
+"""
+import math
+import threading
+from collections import deque
+
+from django.conf import settings
+
+
+def percentile(values, fraction):
+    """最近秩法百分位数，values 必须已排序"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class RouteMetrics:
+    """各路由最近若干次请求的滚动窗口"""
+
+    def __init__(self, window=None):
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def _window(self):
+        return self.window or getattr(settings, 'REQUEST_METRICS_WINDOW', 1000)
+
+    def record(self, route, total_ms, sql_count=0, sql_ms=0.0, template_ms=0.0):
+        with self._lock:
+            samples = self._samples.get(route)
+            if samples is None:
+                samples = self._samples[route] = deque(maxlen=self._window())
+            samples.append((total_ms, sql_count, sql_ms, template_ms))
+            self._totals[route] = self._totals.get(route, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def snapshot(self):
+        """
+        返回 {路由: 统计}，统计包含总请求数、窗口内样本数、耗时百分位（毫秒）
+        以及窗口内平均 SQL 次数 / SQL 耗时 / 模板耗时
+        """
+        with self._lock:
+            data = {route: (list(samples), self._totals[route]) for route, samples in self._samples.items()}
+
+        result = {}
+        for route, (samples, total) in sorted(data.items()):
+            durations = sorted(sample[0] for sample in samples)
+            size = len(samples)
+            result[route] = {
+                'requests': total,
+                'window': size,
+                'p50_ms': round(percentile(durations, 0.50), 2),
+                'p95_ms': round(percentile(durations, 0.95), 2),
+                'p99_ms': round(percentile(durations, 0.99), 2),
+                'max_ms': round(durations[-1], 2),
+                'avg_sql_count': round(sum(sample[1] for sample in samples) / size, 2),
+                'avg_sql_ms': round(sum(sample[2] for sample in samples) / size, 2),
+                'avg_template_ms': round(sum(sample[3] for sample in samples) / size, 2),
+            }
+        return result
+
+
+route_metrics = RouteMetrics()
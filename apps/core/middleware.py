@@ -0,0 +1,99 @@
+"""
+请求计时中间件
+
+记录每个请求的视图名称、总耗时、SQL 次数与耗时、模板渲染耗时、缓存命中数，
+通过 Server-Timing 响应头输出（浏览器开发者工具的 Timing 面板可直接查看），
+计入按路由的滚动统计，超过 SLOW_REQUEST_THRESHOLD_MS 时写一条结构化的慢请求日志。
+
+流式响应（如报表导出）只统计到视图返回为止，不包含逐块输出的时间。
+"""
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import instrumentation
+from .metrics import route_metrics
+
+logger = logging.getLogger('apps.core.timing')
+
+
+class RequestTimingMiddleware:
+    """
+    放在 MIDDLEWARE 首位，使统计包含其他中间件的查询（会话、用户）
+
+    同时支持同步与异步：ASGI 下中间件链以异步方式调用，异步视图不再经过同步适配。
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        instrumentation.install()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', True):
+            return self.get_response(request)
+
+        stats, token = instrumentation.start()
+        begin = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        return self.finish(request, response, stats, begin)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', True):
+            return await self.get_response(request)
+
+        stats, token = instrumentation.start()
+        begin = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        return self.finish(request, response, stats, begin)
+
+    def finish(self, request, response, stats, begin):
+        """输出 Server-Timing 响应头，记录路由统计与慢请求日志"""
+        total_ms = (time.perf_counter() - begin) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unresolved'
+        sql_ms = stats.sql_time * 1000
+        template_ms = stats.template_time * 1000
+
+        response['Server-Timing'] = ', '.join((
+            f'total;dur={total_ms:.1f}',
+            f'sql;dur={sql_ms:.1f};desc="{stats.sql_count} queries"',
+            f'template;dur={template_ms:.1f}',
+            f'cache;desc="{stats.cache_hits} hits, {stats.cache_misses} misses"',
+        ))
+        route_metrics.record(route, total_ms, stats.sql_count, sql_ms, template_ms)
+
+        if total_ms >= getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 500):
+            fields = {
+                'route': route,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'sql_count': stats.sql_count,
+                'sql_ms': round(sql_ms, 1),
+                'template_ms': round(template_ms, 1),
+                'cache_hits': stats.cache_hits,
+                'cache_misses': stats.cache_misses,
+            }
+            logger.warning(
+                'slow_request %s', ' '.join(f'{key}={value}' for key, value in fields.items()),
+                extra={'timing': fields},
+            )
+        return response
@@ -0,0 +1,72 @@
+"""
+报表分析只读库路由
+
+模块页面与 JSON 接口对近30天的子报表做大范围扫描，与登录、会话写入、日报录入共用
+一个数据库时会相互争用。用 @reporting_reads 标记的视图在执行期间，门户应用模型的读查询
+发往 REPORTING_DATABASE_ALIAS（默认 'reporting'）；写入、认证、会话、权限始终使用 default。
+
+未配置该别名时路由器不做任何选择，全部查询照常使用 default。
+"""
+import asyncio
+import contextvars
+from functools import wraps
+
+from django.conf import settings
+
+# 读查询可以发往只读库的应用
+REPORTING_APP_LABELS = {'portal'}
+
+_reporting_reads = contextvars.ContextVar('reporting_reads', default=False)
+
+
+def reporting_alias():
+    """已配置的只读库别名，未配置时返回 None"""
+    alias = getattr(settings, 'REPORTING_DATABASE_ALIAS', 'reporting')
+    return alias if alias in settings.DATABASES else None
+
+
+def reporting_reads(view_func):
+    """视图装饰器：视图执行期间门户模型的读查询使用只读库（同步、异步视图均可）"""
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(*args, **kwargs):
+            token = _reporting_reads.set(True)
+            try:
+                return await view_func(*args, **kwargs)
+            finally:
+                _reporting_reads.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        token = _reporting_reads.set(True)
+        try:
+            return view_func(*args, **kwargs)
+        finally:
+            _reporting_reads.reset(token)
+    return wrapper
+
+
+class ReportingRouter:
+    """只读库路由器，配置在 DATABASE_ROUTERS 中"""
+
+    def db_for_read(self, model, **hints):
+        if not _reporting_reads.get() or model._meta.app_label not in REPORTING_APP_LABELS:
+            return None
+        return reporting_alias()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 只读库是 default 的副本，两边读出的对象可以互相关联
+        databases = {'default', reporting_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 只读库由主库同步而来，不单独执行迁移
+        if db == reporting_alias():
+            return False
+        return None
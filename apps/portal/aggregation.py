@@ -0,0 +1,160 @@
+"""
+报表聚合层
+
+基于子报表中冗余存储的 report_date 字段，用分组查询（values().annotate()）
+一次性得到按城市、按日期等维度的汇总数据，避免逐个日报循环查询。
+"""
+from django.db.models import Sum, Avg, Count, Max, Q, F
+
+from .models import DeliveryReport, WarehouseReport
+
+
+# 配送报告按城市汇总时使用的聚合表达式
+DELIVERY_CITY_AGGREGATES = {
+    'total_cargo': Sum('cargo_volume'),
+    'total_boxes': Sum('box_count'),
+    'avg_removal_rate': Avg('removal_rate'),
+    'avg_delivery_rate_day1': Avg('delivery_rate_day1'),
+    'avg_delivery_rate_day2': Avg('delivery_rate_day2'),
+    'avg_delivery_rate_day3': Avg('delivery_rate_day3'),
+    'total_removed': Sum('removed_packages'),
+    'exception_count': Count('id', filter=~Q(exception_notes='')),
+    'report_count': Count('id'),
+}
+
+# 仓内报告按劳务公司汇总时使用的聚合表达式
+WAREHOUSE_COMPANY_AGGREGATES = {
+    'attendance': Sum('attendance_count'),
+    'hours': Sum('actual_hours'),
+    'packages': Sum('packages_produced'),
+    'sorting_count': Sum('sorting_count'),
+    'exchange_count': Sum('exchange_count'),
+    'cost_per_ticket': Avg('cost_per_ticket'),
+    'work_type': Max('work_type'),
+    'exception_count': Count('id', filter=~Q(exception_notes='')),
+}
+
+# 需要保留两位小数的平均值字段
+DELIVERY_AVG_FIELDS = (
+    'avg_removal_rate',
+    'avg_delivery_rate_day1',
+    'avg_delivery_rate_day2',
+    'avg_delivery_rate_day3',
+)
+
+
+def published_reports(model, start_date=None, end_date=None, **filters):
+    """
+    获取已发布日报下的子报表查询集
+
+    直接按子表的 report_date 过滤，不再逐个日报查询。
+    """
+    queryset = model.objects.filter(daily_report__is_published=True, **filters)
+    if start_date and end_date:
+        queryset = queryset.filter(report_date__range=[start_date, end_date])
+    elif start_date:
+        queryset = queryset.filter(report_date=start_date)
+    return queryset
+
+
+def group_aggregate(queryset, group_by, aggregates):
+    """
+    按字段分组聚合
+
+    返回 {分组键: 聚合结果字典} ，分组键为单个字段值或多个字段值组成的元组。
+    """
+    if isinstance(group_by, str):
+        group_by = (group_by,)
+    rows = queryset.order_by().values(*group_by).annotate(**aggregates)
+
+    result = {}
+    for row in rows:
+        key = tuple(row.pop(field) for field in group_by)
+        result[key[0] if len(key) == 1 else key] = row
+    return result
+
+
+def _round_averages(stats, fields, digits=2):
+    """将平均值字段四舍五入，空值按0处理"""
+    for field in fields:
+        stats[field] = round(stats[field] or 0, digits)
+    return stats
+
+
+def delivery_city_stats(queryset=None):
+    """
+    配送数据按城市汇总（单条分组查询）
+
+    返回结构与配送模块模板中的 city_stats 一致。
+    """
+    if queryset is None:
+        queryset = DeliveryReport.objects.all()
+    stats = group_aggregate(queryset, 'city', DELIVERY_CITY_AGGREGATES)
+    for city in stats:
+        _round_averages(stats[city], DELIVERY_AVG_FIELDS)
+    return dict(sorted(stats.items()))
+
+
+def delivery_daily_stats(queryset=None):
+    """
+    配送数据按日期汇总（单条分组查询）
+
+    按 (report_date, city) 分组取回每日各城市的货量与分箱数，再在内存中折叠为
+    每日汇总，返回结构与配送模块模板中的 daily_stats 一致，按日期倒序排列。
+    """
+    if queryset is None:
+        queryset = DeliveryReport.objects.all()
+    rows = group_aggregate(queryset, ('report_date', 'city'), {
+        'cargo': Sum('cargo_volume'),
+        'boxes': Sum('box_count'),
+    })
+
+    daily_stats = {}
+    for (report_date, city), row in sorted(rows.items(), key=lambda item: item[0]):
+        day = daily_stats.setdefault(report_date, {
+            'total_cargo': 0,
+            'total_boxes': 0,
+            'cities': [],
+            'city_count': 0,
+        })
+        day['total_cargo'] += row['cargo'] or 0
+        day['total_boxes'] += row['boxes'] or 0
+        day['cities'].append(city)
+        day['city_count'] += 1
+    return dict(sorted(daily_stats.items(), reverse=True))
+
+
+def warehouse_company_stats(queryset=None):
+    """
+    仓内数据按劳务公司汇总（单条分组查询）
+
+    返回结构与仓内模块模板中的 company_stats 一致。
+    """
+    if queryset is None:
+        queryset = WarehouseReport.objects.all()
+    stats = group_aggregate(queryset, 'contractor_company', WAREHOUSE_COMPANY_AGGREGATES)
+    for company, row in stats.items():
+        row['cost_per_ticket'] = round(row['cost_per_ticket'] or 0, 4)
+        row['has_exception'] = row.pop('exception_count') > 0
+        row['has_sorting_data'] = (row['sorting_count'] or 0) > 0
+        row['has_exchange_data'] = (row['exchange_count'] or 0) > 0
+    return dict(sorted(stats.items()))
+
+
+def warehouse_totals(queryset=None):
+    """仓内数据总计（单条聚合查询），成本按 实际工时 × 每小时工资 计算"""
+    if queryset is None:
+        queryset = WarehouseReport.objects.all()
+    totals = queryset.aggregate(
+        total_companies=Count('contractor_company', distinct=True),
+        total_attendance=Sum('attendance_count'),
+        total_hours=Sum('actual_hours'),
+        total_packages=Sum('packages_produced'),
+        avg_cost_per_ticket=Avg('cost_per_ticket'),
+        total_sorting_count=Sum('sorting_count'),
+        total_exchange_count=Sum('exchange_count'),
+        total_cost=Sum(F('actual_hours') * F('hourly_rate')),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    totals['avg_cost_per_ticket'] = round(totals['avg_cost_per_ticket'], 4)
+    return totals
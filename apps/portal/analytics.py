@@ -0,0 +1,392 @@
+"""
+列式分析快照
+
+季度、年度尺度的趋势（各城市移除率、各劳务公司单票成本等）要读取数年的子报表，
+ORM 逐行构造带 Decimal 字段的模型实例，数据多时既慢又占内存。快照用 values_list
+分块读取已发布日报下的配送、仓内、成本报表，每列存为一个 NumPy 数组，城市、劳务公司、
+成本类别按字典编码为整数；按 (类别, 周期) 分组聚合与滚动平均都在数组上向量化计算。
+
+快照常驻进程内存。日报或子报表变更时，信号把日报id写入共享缓存中的变更日志
+（record_change），各进程下次读取快照时只重新加载这些日报的行；日志不连续
+（缓存被清空、条目过期或变更过多）时整体重建。变更日志记录的是主库的写入，
+快照也始终从主库读取，不经过报表分析只读库（只读库的复制有延迟）。
+
+NumPy 是可选依赖（requirements/analytics.txt），未安装时 is_available() 为 False。
+"""
+import threading
+import uuid
+from collections import namedtuple
+from datetime import date
+from itertools import islice
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from .models import CostReport, DeliveryReport, WarehouseReport
+
+CHUNK_SIZE = 5000
+
+TableSpec = namedtuple('TableSpec', 'model category columns')
+
+# 快照中的表：模型、字典编码的类别字段、数值列
+SNAPSHOT_TABLES = {
+    'delivery': TableSpec(DeliveryReport, 'city', (
+        'cargo_volume', 'box_count', 'delivery_rate_day1', 'delivery_rate_day2', 'delivery_rate_day3',
+        'removed_packages', 'removal_rate',
+    )),
+    'warehouse': TableSpec(WarehouseReport, 'contractor_company', (
+        'attendance_count', 'actual_hours', 'hourly_rate', 'packages_produced', 'cost_per_ticket',
+    )),
+    'cost': TableSpec(CostReport, 'cost_category', (
+        'planned_cost', 'actual_cost', 'variance', 'variance_rate',
+    )),
+}
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+EPOCH_KEY = 'portal:analytics:epoch'
+SEQUENCE_KEY = 'portal:analytics:sequence'
+CHANGE_KEY = 'portal:analytics:change:{}'
+CHANGE_LOG_TIMEOUT = 24 * 60 * 60
+# 未同步的变更超过该数目时整体重建
+MAX_INCREMENTAL_CHANGES = 500
+
+
+class AnalyticsError(ValueError):
+    """分析参数错误"""
+
+
+def is_available():
+    """是否安装了 NumPy"""
+    return np is not None
+
+
+# ==================== 变更日志 ====================
+
+def _cache():
+    return caches['default']
+
+
+def change_log_state():
+    """返回 (纪元, 序号)；缓存中没有时开始新纪元，已有快照随之整体重建"""
+    cache = _cache()
+    state = cache.get_many([EPOCH_KEY, SEQUENCE_KEY])
+    if EPOCH_KEY not in state or SEQUENCE_KEY not in state:
+        cache.set_many({EPOCH_KEY: uuid.uuid4().hex, SEQUENCE_KEY: 0}, timeout=None)
+        state = cache.get_many([EPOCH_KEY, SEQUENCE_KEY])
+    return state.get(EPOCH_KEY), state.get(SEQUENCE_KEY, 0)
+
+
+def record_change(daily_report_id):
+    """记录某份日报的数据有变化（发布、撤回、子报表增删改）"""
+    cache = _cache()
+    change_log_state()
+    try:
+        sequence = cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        # 期间缓存被清空：开始新纪元
+        change_log_state()
+        return
+    cache.set(CHANGE_KEY.format(sequence), daily_report_id, timeout=CHANGE_LOG_TIMEOUT)
+
+
+def _changes_since(sequence, current):
+    """序号 (sequence, current] 内变更的日报id集合；日志不完整时返回 None"""
+    if current - sequence > MAX_INCREMENTAL_CHANGES:
+        return None
+    keys = [CHANGE_KEY.format(number) for number in range(sequence + 1, current + 1)]
+    found = _cache().get_many(keys)
+    if len(found) != len(keys):
+        return None
+    return set(found.values())
+
+
+# ==================== 列式表 ====================
+
+class ColumnTable:
+    """
+    一类子报表的列式数据
+
+    report_ids、days（datetime64[D]）、codes（类别编码）与 columns 中的各数值列（float64，
+    空值为 NaN）长度相同、按行对齐；categories[code] 为类别名称。
+    """
+
+    def __init__(self, spec, report_ids, days, codes, columns, categories):
+        self.spec = spec
+        self.report_ids = report_ids
+        self.days = days
+        self.codes = codes
+        self.columns = columns
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.report_ids)
+
+    @property
+    def nbytes(self):
+        arrays = [self.report_ids, self.days, self.codes, *self.columns.values()]
+        return sum(array.nbytes for array in arrays)
+
+
+def _float_column(values):
+    return np.fromiter(
+        (np.nan if value is None else float(value) for value in values), dtype=np.float64, count=len(values)
+    )
+
+
+def _read_rows(spec, categories, lookup, report_ids=None, using=None):
+    """分块读取已发布日报下的行，返回各列数组；新出现的类别追加到 categories"""
+    queryset = spec.model.objects.filter(daily_report__is_published=True)
+    if using:
+        queryset = queryset.using(using)
+    if report_ids is not None:
+        queryset = queryset.filter(daily_report_id__in=list(report_ids))
+    rows = queryset.order_by().values_list(
+        'daily_report_id', 'daily_report__report_date', spec.category, *spec.columns
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    chunks = []
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        values = list(zip(*chunk))
+        codes = []
+        for name in values[2]:
+            code = lookup.get(name)
+            if code is None:
+                code = lookup[name] = len(categories)
+                categories.append(name)
+            codes.append(code)
+        chunks.append((
+            np.array(values[0], dtype=np.int64),
+            np.array(values[1], dtype='datetime64[D]'),
+            np.array(codes, dtype=np.int32),
+            [_float_column(column) for column in values[3:]],
+        ))
+
+    if not chunks:
+        return (
+            np.empty(0, dtype=np.int64), np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.int32),
+            [np.empty(0, dtype=np.float64) for _ in spec.columns],
+        )
+    return (
+        np.concatenate([chunk[0] for chunk in chunks]),
+        np.concatenate([chunk[1] for chunk in chunks]),
+        np.concatenate([chunk[2] for chunk in chunks]),
+        [np.concatenate([chunk[3][index] for chunk in chunks]) for index in range(len(spec.columns))],
+    )
+
+
+def load_table(spec, using=None):
+    """全量加载一张表"""
+    categories = []
+    lookup = {}
+    report_ids, days, codes, columns = _read_rows(spec, categories, lookup, using=using)
+    return ColumnTable(spec, report_ids, days, codes, dict(zip(spec.columns, columns)), categories)
+
+
+def refresh_table(table, report_ids, using=None):
+    """返回新的表：去掉指定日报的旧行，再读入这些日报当前已发布的行"""
+    categories = list(table.categories)
+    lookup = {name: code for code, name in enumerate(categories)}
+    keep = ~np.isin(table.report_ids, np.fromiter(report_ids, dtype=np.int64))
+    new_ids, new_days, new_codes, new_columns = _read_rows(
+        table.spec, categories, lookup, report_ids=report_ids, using=using
+    )
+    columns = {
+        name: np.concatenate([table.columns[name][keep], new_columns[index]])
+        for index, name in enumerate(table.spec.columns)
+    }
+    return ColumnTable(
+        table.spec,
+        np.concatenate([table.report_ids[keep], new_ids]),
+        np.concatenate([table.days[keep], new_days]),
+        np.concatenate([table.codes[keep], new_codes]),
+        columns,
+        categories,
+    )
+
+
+class AnalyticsSnapshot:
+    """进程内的列式快照，读取时按变更日志增量更新"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = None
+        self._state = None  # (纪元, 序号)
+
+    def tables(self):
+        """返回 {表名: ColumnTable}，必要时先全量加载或增量更新"""
+        if not is_available():
+            raise AnalyticsError('分析快照需要安装 NumPy')
+        with self._lock:
+            epoch, sequence = change_log_state()
+            if self._tables is None or self._state[0] != epoch or sequence < self._state[1]:
+                self._tables = self._load_all()
+            elif sequence > self._state[1]:
+                changed = _changes_since(self._state[1], sequence)
+                if changed is None:
+                    self._tables = self._load_all()
+                else:
+                    self._tables = {
+                        name: refresh_table(table, changed, using=DEFAULT_DB_ALIAS)
+                        for name, table in self._tables.items()
+                    }
+            self._state = (epoch, sequence)
+            return self._tables
+
+    def _load_all(self):
+        return {name: load_table(spec, using=DEFAULT_DB_ALIAS) for name, spec in SNAPSHOT_TABLES.items()}
+
+    def table(self, name):
+        return self.tables()[name]
+
+    def reset(self):
+        with self._lock:
+            self._tables = None
+            self._state = None
+
+
+snapshot = AnalyticsSnapshot()
+
+
+# ==================== 向量化计算 ====================
+
+def period_keys(days, granularity):
+    """把 datetime64[D] 日期映射为周期的整数键（周从周一开始）"""
+    if granularity not in GRANULARITIES:
+        raise AnalyticsError(f'未知粒度: {granularity}')
+    numbers = days.astype(np.int64)
+    if granularity == 'day':
+        return numbers
+    if granularity == 'week':
+        # 1970-01-01 是星期四
+        return numbers - (numbers + 3) % 7
+    months = days.astype('datetime64[M]').astype(np.int64)
+    if granularity == 'month':
+        return months
+    if granularity == 'quarter':
+        return months // 3
+    return days.astype('datetime64[Y]').astype(np.int64)
+
+
+def period_label(key, granularity):
+    """周期键对应的标签：日、周为起始日期，其余为 2025-03 / 2025-Q1 / 2025"""
+    key = int(key)
+    if granularity in ('day', 'week'):
+        return str(np.datetime64(key, 'D'))
+    if granularity == 'month':
+        return str(np.datetime64(key, 'M'))
+    if granularity == 'quarter':
+        return f'{1970 + key // 4}-Q{key % 4 + 1}'
+    return str(1970 + key)
+
+
+def grouped_matrix(table, column, granularity='month', start_date=None, end_date=None, how='mean'):
+    """
+    按 (类别, 周期) 分组聚合一列
+
+    how 为 mean（平均，忽略空值）或 sum。返回 (类别名称列表, 周期键数组, 矩阵)，
+    矩阵形状为 (类别数, 周期数)，没有数据的格子为 NaN。
+    """
+    if column not in table.columns:
+        raise AnalyticsError(f'未知列: {column}')
+    if how not in ('mean', 'sum'):
+        raise AnalyticsError(f'未知聚合方式: {how}')
+    values = table.columns[column]
+    mask = ~np.isnan(values)
+    if start_date:
+        mask &= table.days >= np.datetime64(start_date, 'D')
+    if end_date:
+        mask &= table.days <= np.datetime64(end_date, 'D')
+
+    periods, period_index = np.unique(period_keys(table.days[mask], granularity), return_inverse=True)
+    codes, group_index = np.unique(table.codes[mask], return_inverse=True)
+    size = len(codes) * len(periods)
+    flat = group_index * len(periods) + period_index
+
+    counts = np.bincount(flat, minlength=size)
+    totals = np.bincount(flat, weights=values[mask], minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = totals / counts if how == 'mean' else np.where(counts > 0, totals, np.nan)
+    matrix = result.reshape(len(codes), len(periods))
+    return [table.categories[code] for code in codes], periods, matrix
+
+
+def rolling_mean(matrix, window):
+    """沿周期方向的滚动平均（每行独立，忽略 NaN；窗口内全为空时为 NaN）"""
+    if window < 1:
+        raise AnalyticsError('滚动窗口至少为1')
+    valid = ~np.isnan(matrix)
+    zeros = np.zeros((matrix.shape[0], 1))
+    sums = np.concatenate([zeros, np.cumsum(np.where(valid, matrix, 0.0), axis=1)], axis=1)
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+    lagged = np.maximum(np.arange(1, matrix.shape[1] + 1) - window, 0)
+    window_sums = sums[:, 1:] - sums[:, lagged]
+    window_counts = counts[:, 1:] - counts[:, lagged]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+
+# ==================== 趋势 ====================
+
+TrendMetric = namedtuple('TrendMetric', 'table column label how permission')
+
+TREND_METRICS = {
+    'removal_rate': TrendMetric('delivery', 'removal_rate', '各城市移除率(%)', 'mean', 'delivery.read'),
+    'delivery_rate_day1': TrendMetric('delivery', 'delivery_rate_day1', '各城市第1天达成率(%)', 'mean', 'delivery.read'),
+    'cargo_volume': TrendMetric('delivery', 'cargo_volume', '各城市货量', 'sum', 'delivery.read'),
+    'cost_per_ticket': TrendMetric('warehouse', 'cost_per_ticket', '各劳务公司单票成本', 'mean', 'warehouse.read'),
+    'actual_hours': TrendMetric('warehouse', 'actual_hours', '各劳务公司实际工时', 'sum', 'warehouse.read'),
+    'actual_cost': TrendMetric('cost', 'actual_cost', '各类别实际成本', 'sum', 'cost.read'),
+}
+
+
+def _json_values(row, digits=4):
+    return [None if np.isnan(value) else round(float(value), digits) for value in row]
+
+
+def trend(metric, granularity='month', start_date=None, end_date=None, window=None):
+    """
+    某指标按类别的趋势
+
+    返回 {'metric', 'label', 'granularity', 'labels': [...], 'series': [{'name', 'values', 'rolling'}]}，
+    没有数据的周期为 None；window 为滚动平均的周期数（None 时不计算）。
+    """
+    if metric not in TREND_METRICS:
+        raise AnalyticsError(f'未知指标: {metric}')
+    spec = TREND_METRICS[metric]
+    names, periods, matrix = grouped_matrix(
+        snapshot.table(spec.table), spec.column, granularity, start_date, end_date, spec.how
+    )
+    rolling = rolling_mean(matrix, window) if window else None
+    return {
+        'metric': metric,
+        'label': spec.label,
+        'granularity': granularity,
+        'labels': [period_label(key, granularity) for key in periods],
+        'series': [
+            {
+                'name': name,
+                'values': _json_values(matrix[index]),
+                'rolling': _json_values(rolling[index]) if rolling is not None else None,
+            }
+            for index, name in enumerate(names)
+        ],
+    }
+
+
+def default_range(years=3, today=None):
+    """默认时间范围：最近 years 年"""
+    today = today or date.today()
+    try:
+        start = today.replace(year=today.year - years)
+    except ValueError:  # 2月29日
+        start = today.replace(year=today.year - years, day=28)
+    return start, today
@@ -0,0 +1,109 @@
+"""
+当前有效公告
+
+公告在已发布且处于 [start_date, end_date) 时间窗口内时有效（未设置的一端不限制）。
+仪表板的公告列表在进程内缓存，有效期到下一个开始或结束时间点为止，到点后重新查询；
+公告保存、删除时通过信号更换缓存令牌，各进程在下一次读取时发现令牌变化并重新加载。
+令牌检查只读缓存，不访问数据库。
+"""
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import Announcement
+
+TOKEN_KEY = 'portal:announcement_feed:token'
+
+# 进程内缓存的公告条数，仪表板只显示前几条
+FEED_SIZE = 20
+
+
+def active_q(now=None):
+    """已发布且处于时间窗口内的公告条件"""
+    now = now or timezone.now()
+    return (
+        Q(is_published=True)
+        & (Q(start_date__isnull=True) | Q(start_date__lte=now))
+        & (Q(end_date__isnull=True) | Q(end_date__gt=now))
+    )
+
+
+def active_announcements(now=None):
+    """当前有效公告的查询集（按优先级、创建时间倒序）"""
+    return Announcement.objects.filter(active_q(now))
+
+
+def next_boundary(now):
+    """now 之后最近的一个开始或结束时间点，没有时返回 None"""
+    bounds = Announcement.objects.filter(is_published=True).aggregate(
+        next_start=Min('start_date', filter=Q(start_date__gt=now)),
+        next_end=Min('end_date', filter=Q(end_date__gt=now)),
+    )
+    candidates = [value for value in bounds.values() if value is not None]
+    return min(candidates) if candidates else None
+
+
+def _token_cache():
+    return caches['default']
+
+
+def current_token():
+    """当前缓存令牌，不存在时（如缓存被清空）生成一个新令牌"""
+    cache = _token_cache()
+    token = cache.get(TOKEN_KEY)
+    if token is None:
+        cache.add(TOKEN_KEY, uuid.uuid4().hex, timeout=None)
+        token = cache.get(TOKEN_KEY)
+    return token
+
+
+class AnnouncementFeed:
+    """进程内缓存的当前有效公告列表"""
+
+    def __init__(self, size=FEED_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._state = None  # (令牌, 过期时间, 公告列表)
+
+    def _max_age(self):
+        # 批量 update() 不触发信号，最多这么久之后也会重新加载
+        return timedelta(seconds=getattr(settings, 'ANNOUNCEMENT_FEED_TIMEOUT', 300))
+
+    def get(self, limit=5, now=None):
+        """返回前 limit 条当前有效公告；缓存有效时不访问数据库"""
+        now = now or timezone.now()
+        token = current_token()
+        with self._lock:
+            state = self._state
+        if state is None or state[0] != token or now >= state[1]:
+            state = self._load(token, now)
+        return list(state[2][:limit])
+
+    def _load(self, token, now):
+        announcements = list(active_announcements(now).select_related('author')[:self.size])
+        expires_at = now + self._max_age()
+        boundary = next_boundary(now)
+        if boundary is not None:
+            expires_at = min(expires_at, boundary)
+        state = (token, expires_at, announcements)
+        with self._lock:
+            self._state = state
+        return state
+
+    def invalidate(self):
+        with self._lock:
+            self._state = None
+
+
+announcement_feed = AnnouncementFeed()
+
+
+def invalidate_announcement_feed():
+    """更换缓存令牌，使所有进程中的公告列表失效"""
+    announcement_feed.invalidate()
+    _token_cache().set(TOKEN_KEY, uuid.uuid4().hex, timeout=None)
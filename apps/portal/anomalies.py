@@ -0,0 +1,194 @@
+"""
+配送指标异常检测
+
+对每个城市的第1~3天达成率、移除率、包裹移除数，以该城市之前 ANOMALY_WINDOW_DAYS 天的
+数据为基准计算稳健 Z 分数：(当日值 - 中位数) / (1.4826 × MAD)。中位数与 MAD 不受窗口内
+个别极端值影响，比均值/标准差更适合只有几周历史的场景。|Z| 不小于 ANOMALY_Z_THRESHOLD
+记为异常。
+
+数据取自列式分析快照（analytics.py）：按 (城市, 日期) 展开成矩阵后用 sliding_window_view
+一次算出所有城市、所有日期的滚动中位数与 MAD，一年的全部城市在毫秒级完成。
+日报发布（或已发布日报的配送报表变更）后，在事务提交时检测该日报并写入 DeliveryAnomaly。
+"""
+import warnings
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from . import analytics
+from .analytics import np
+from .models import DailyReport, DeliveryAnomaly
+from .view_cache import invalidate_view_cache
+
+METRICS = tuple(code for code, _ in DeliveryAnomaly.METRIC_CHOICES)
+
+# 各指标分母（1.4826 × MAD）的下限：历史几乎不变时，避免极小的波动得到很大的分数
+MIN_SCALE = {
+    'delivery_rate_day1': 0.5,
+    'delivery_rate_day2': 0.5,
+    'delivery_rate_day3': 0.5,
+    'removal_rate': 0.1,
+    'removed_packages': 1.0,
+}
+
+MAD_SCALE = 1.4826
+
+Scores = namedtuple('Scores', 'cities start values baseline scores')
+
+
+def _window():
+    return getattr(settings, 'ANOMALY_WINDOW_DAYS', 28)
+
+
+def _min_history():
+    return getattr(settings, 'ANOMALY_MIN_HISTORY', 7)
+
+
+def _threshold():
+    return getattr(settings, 'ANOMALY_Z_THRESHOLD', 3.5)
+
+
+def city_day_matrix(table, column, start_date, end_date):
+    """
+    把一列展开为 (城市, 日期) 矩阵，同一城市同一天有多行时取平均，没有数据为 NaN
+
+    返回 (城市名称列表, 矩阵)，矩阵第 j 列对应 start_date + j 天。
+    """
+    values = table.columns[column]
+    start = np.datetime64(start_date, 'D')
+    days = (end_date - start_date).days + 1
+    mask = ~np.isnan(values) & (table.days >= start) & (table.days <= np.datetime64(end_date, 'D'))
+    codes, city_index = np.unique(table.codes[mask], return_inverse=True)
+    flat = city_index * days + (table.days[mask] - start).astype(np.int64)
+    size = len(codes) * days
+    counts = np.bincount(flat, minlength=size)
+    totals = np.bincount(flat, weights=values[mask], minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = (totals / counts).reshape(len(codes), days)
+    return [table.categories[code] for code in codes], matrix
+
+
+def robust_scores(matrix, window, min_history, min_scale=0.0):
+    """
+    每个格子相对于同一行之前 window 列（不含自身）的稳健 Z 分数
+
+    返回 (基准中位数矩阵, Z 分数矩阵)；窗口内有效值少于 min_history 时为 NaN。
+    """
+    rows, columns = matrix.shape
+    padded = np.concatenate([np.full((rows, window), np.nan), matrix], axis=1)
+    # windows[i, j] 为 matrix[i, j-window:j]
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)[:, :columns]
+    history = np.count_nonzero(~np.isnan(windows), axis=2)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 全为 NaN 的窗口
+        median = np.nanmedian(windows, axis=2)
+        mad = np.nanmedian(np.abs(windows - median[..., np.newaxis]), axis=2)
+    scale = np.maximum(MAD_SCALE * mad, min_scale)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = np.where((history >= min_history) & (scale > 0), (matrix - median) / scale, np.nan)
+    return median, scores
+
+
+def score_history(column, start_date, end_date, window=None, min_history=None):
+    """计算 [start_date, end_date] 内各城市每天某指标的稳健 Z 分数"""
+    window = window or _window()
+    min_history = _min_history() if min_history is None else min_history
+    table = analytics.snapshot.table('delivery')
+    history_start = start_date - timedelta(days=window)
+    cities, matrix = city_day_matrix(table, column, history_start, end_date)
+    baseline, scores = robust_scores(matrix, window, min_history, MIN_SCALE.get(column, 0.0))
+    return Scores(cities, start_date, matrix[:, window:], baseline[:, window:], scores[:, window:])
+
+
+def find_anomalies(start_date, end_date, metrics=METRICS, threshold=None):
+    """
+    返回 [start_date, end_date] 内 |Z| 不小于阈值的 (城市, 日期, 指标)
+
+    每项为字典：report_date、city、metric、value、baseline、score。
+    """
+    threshold = _threshold() if threshold is None else threshold
+    anomalies = []
+    for metric in metrics:
+        result = score_history(metric, start_date, end_date)
+        with np.errstate(invalid='ignore'):
+            rows, columns = np.nonzero(np.abs(result.scores) >= threshold)
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            anomalies.append({
+                'report_date': result.start + timedelta(days=column),
+                'city': result.cities[row],
+                'metric': metric,
+                'value': round(float(result.values[row, column]), 4),
+                'baseline': round(float(result.baseline[row, column]), 4),
+                'score': round(float(result.scores[row, column]), 2),
+            })
+    anomalies.sort(key=lambda item: (item['report_date'], item['city'], item['metric']))
+    return anomalies
+
+
+def _save(daily_reports, anomalies):
+    """替换这些日报的异常记录；daily_reports 为 {报告日期: 日报id}"""
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        DeliveryAnomaly.objects.filter(daily_report_id__in=daily_reports.values()).delete()
+        DeliveryAnomaly.objects.bulk_create([
+            DeliveryAnomaly(daily_report_id=daily_reports[item['report_date']], **item)
+            for item in anomalies if item['report_date'] in daily_reports
+        ])
+    invalidate_view_cache()
+
+
+def detect_report_anomalies(daily_report_id):
+    """检测一份日报的配送指标异常并写入；日报未发布时清除其异常记录，返回异常数"""
+    try:
+        daily_report = DailyReport.objects.using(DEFAULT_DB_ALIAS).get(pk=daily_report_id)
+    except DailyReport.DoesNotExist:
+        return 0
+    if not daily_report.is_published:
+        deleted, _ = DeliveryAnomaly.objects.filter(daily_report_id=daily_report_id).delete()
+        if deleted:
+            invalidate_view_cache()
+        return 0
+    if not analytics.is_available():
+        return 0
+    anomalies = find_anomalies(daily_report.report_date, daily_report.report_date)
+    _save({daily_report.report_date: daily_report.pk}, anomalies)
+    return len(anomalies)
+
+
+def detect_range(start_date, end_date):
+    """重新检测日期范围内全部已发布日报（回填历史数据），返回异常数"""
+    daily_reports = dict(DailyReport.objects.filter(
+        is_published=True, report_date__range=[start_date, end_date]
+    ).values_list('report_date', 'pk'))
+    anomalies = find_anomalies(start_date, end_date)
+    _save(daily_reports, anomalies)
+    return len(anomalies)
+
+
+def schedule_detection(daily_report_id, using=DEFAULT_DB_ALIAS):
+    """
+    在当前事务提交后检测该日报，不在事务中时立即执行
+
+    同一 atomic 块内多次调用（如日报与其下各城市的配送报表依次保存）只安排一次。
+    已安排的日报id按当前（最内层）atomic 块记在连接上：嵌套块回滚时其中安排的回调被丢弃，
+    回到外层块后再次调用会重新安排。
+    """
+    connection = connections[using]
+    scheduled = None
+    if connection.in_atomic_block:
+        block = connection.atomic_blocks[-1]
+        scheduled = getattr(connection, 'anomaly_detection_scheduled', None)
+        if scheduled is None or scheduled[0] is not block:
+            scheduled = connection.anomaly_detection_scheduled = (block, set())
+        if daily_report_id in scheduled[1]:
+            return
+        scheduled[1].add(daily_report_id)
+
+    def detect():
+        if scheduled is not None:
+            scheduled[1].discard(daily_report_id)
+        detect_report_anomalies(daily_report_id)
+
+    detect.anomaly_report_id = daily_report_id
+    transaction.on_commit(detect, using=using)
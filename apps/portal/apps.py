@@ -5,3 +5,6 @@ class PortalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.portal'
     verbose_name = '门户管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
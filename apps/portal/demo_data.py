@@ -0,0 +1,176 @@
+"""
+演示数据生成
+
+基于LAX日报实际运营情况的城市、劳务公司参数，使用固定随机种子生成确定的演示数据并写入数据库。
+只需执行一次（manage.py seed_demo_data），模块页面统一从数据库读取。
+"""
+import random
+from datetime import date, time, timedelta
+
+from django.db import transaction
+
+from .importer import system_reporter
+from .models import (
+    DailyReport, DeliveryReport, WarehouseReport, PickupReport, ExchangeOrderReport
+)
+
+DEFAULT_SEED = 20251028
+
+# LAX日报实际城市数据 - 基于真实运营情况
+CITY_PROFILES = {
+    'SAN': {
+        'base_cargo': 1741,
+        'base_boxes': 30,
+        'open_time': time(5, 30),
+        'delivery_range': (78, 96),
+        'removal_range': (15, 25),
+        'removal_rate_range': (1.0, 1.5),
+        'site_situations': ['408 422删除分箱积压', '货少删除分箱', '分箱积压严重'],
+        'typical_issues': ['异常移除线路：407-4件 404-4件', '408和422货少删除分箱', '402和418取货非常慢，催促车队两次'],
+    },
+    'LAX': {
+        'base_cargo': 4500,
+        'base_boxes': 750,
+        'open_time': time(6, 0),
+        'delivery_range': (92, 97),
+        'removal_range': (50, 80),
+        'removal_rate_range': (1.0, 1.8),
+        'site_situations': ['分箱积压', '设备故障', '人员不足'],
+        'typical_issues': ['航班延误', '海关清关延迟', '交通拥堵'],
+    },
+    'SFO': {
+        'base_cargo': 3200,
+        'base_boxes': 580,
+        'open_time': time(7, 0),
+        'delivery_range': (94, 98),
+        'removal_range': (35, 60),
+        'removal_rate_range': (1.0, 1.9),
+        'site_situations': ['雾天影响', '设备故障', '人员不足'],
+        'typical_issues': ['雾天影响', '设备故障', '人员不足'],
+    },
+    'SEA': {
+        'base_cargo': 2800,
+        'base_boxes': 520,
+        'open_time': time(7, 30),
+        'delivery_range': (93, 97),
+        'removal_range': (30, 55),
+        'removal_rate_range': (1.0, 2.0),
+        'site_situations': ['雨天影响', '道路施工', '分拣延迟'],
+        'typical_issues': ['雨天影响', '道路施工', '分拣延迟'],
+    },
+}
+
+# 基于LAX日报实际仓内数据
+CONTRACTOR_PROFILES = {
+    'HR Solution': {
+        'base_attendance': 5,
+        'work_type': 'Regular Sorter',
+        'base_hours': 40,
+        'hourly_rate': 20,
+        'base_packages': 4500,
+        'sorting_count': 58341,
+        'exchange_count': 14211,
+        # 单票成本：工时总数 × 20 ÷ (分拣数量 + 换单数量) = 40 × 20 ÷ (58341 + 14211) ≈ 0.0110
+        'cost_per_ticket': '0.0110',
+        'typical_issues': ['人员不足', '工时超时', '成本控制'],
+    },
+    'Ocean': {
+        'base_attendance': 54,
+        'work_type': 'Regular Sorter',
+        'base_hours': 545,
+        'hourly_rate': 20,
+        'base_packages': 38000,
+        'sorting_count': 108000,
+        'exchange_count': 32000,
+        # 单票成本：工时总数 × 20 ÷ (分拣数量 + 换单数量) = 545 × 20 ÷ (108000 + 32000) ≈ 0.0779
+        'cost_per_ticket': '0.0779',
+        'typical_issues': ['设备故障', '人员调配', '效率提升'],
+    },
+}
+
+
+def _delivery_report(rng, daily_report, city, profile):
+    # 配送率基于城市特点（3天递进）
+    delivery_base = rng.uniform(*profile['delivery_range'])
+    exception_notes = ''
+    if rng.random() < 0.15:  # 15%概率有异常
+        exception_notes = rng.choice(profile['typical_issues'])
+    return DeliveryReport(
+        daily_report=daily_report,
+        city=city,
+        cargo_volume=int(profile['base_cargo'] * rng.uniform(0.85, 1.15)),
+        box_count=int(profile['base_boxes'] * rng.uniform(0.9, 1.1)),
+        open_time=profile['open_time'],
+        site_situation=rng.choice(profile['site_situations']),
+        delivery_rate_day1=round(delivery_base - rng.uniform(0, 3), 2),
+        delivery_rate_day2=round(min(delivery_base + rng.uniform(0, 2), 100), 2),
+        delivery_rate_day3=round(min(delivery_base + rng.uniform(2, 5), 100), 2),
+        removed_packages=rng.randint(*profile['removal_range']),
+        removal_rate=round(rng.uniform(*profile['removal_rate_range']), 2),
+        exception_notes=exception_notes,
+    )
+
+
+def _warehouse_report(rng, daily_report, company, profile):
+    attendance_count = int(profile['base_attendance'] * rng.uniform(0.9, 1.1))
+    actual_hours = int(profile['base_hours'] * rng.uniform(0.95, 1.05))
+    exception_notes = ''
+    if rng.random() < 0.2:  # 20%概率有异常
+        exception_notes = rng.choice(profile['typical_issues'])
+    return WarehouseReport(
+        daily_report=daily_report,
+        contractor_company=company,
+        attendance_count=attendance_count,
+        # 出勤人数通常比到岗人数稍高
+        actual_attendance_count=attendance_count + rng.randint(0, 2),
+        work_type=profile['work_type'],
+        actual_hours=actual_hours,
+        packages_produced=int(profile['base_packages'] * rng.uniform(0.9, 1.1)),
+        hourly_rate=profile['hourly_rate'],
+        sorting_count=profile['sorting_count'],
+        exchange_count=profile['exchange_count'],
+        cost_per_ticket=profile['cost_per_ticket'],
+        total_cost=actual_hours * profile['hourly_rate'],
+        exception_notes=exception_notes,
+    )
+
+
+def generate_demo_reports(days=7, seed=DEFAULT_SEED, end_date=None):
+    """
+    生成最近 days 天的演示日报
+
+    相同的种子与日期总是生成相同的数据；已存在日报的日期会跳过，
+    因此可以重复执行。返回新建的日报列表。
+    """
+    end_date = end_date or date.today()
+    reporter = system_reporter()
+
+    existing = set(DailyReport.objects.filter(
+        report_date__range=[end_date - timedelta(days=days - 1), end_date]
+    ).values_list('report_date', flat=True))
+
+    created_reports = []
+    with transaction.atomic():
+        for offset in range(days):
+            report_date = end_date - timedelta(days=offset)
+            if report_date in existing:
+                continue
+            # 每天独立的随机序列，补生成某一天时不影响其他日期的数据
+            rng = random.Random(f'{seed}-{report_date.isoformat()}')
+            daily_report = DailyReport.objects.create(
+                report_date=report_date, reporter=reporter, is_published=True, notes='演示数据'
+            )
+            for city, profile in CITY_PROFILES.items():
+                _delivery_report(rng, daily_report, city, profile).save()
+            for company, profile in CONTRACTOR_PROFILES.items():
+                _warehouse_report(rng, daily_report, company, profile).save()
+            # 基于截图数据：换单渠道=YWE+USPS+UNI, 换单量=14211
+            ExchangeOrderReport.objects.create(
+                daily_report=daily_report, exchange_channel='YWE+USPS+UNI', exchange_count=14211
+            )
+            # 基于截图数据：揽收区域=LAX, 揽收情况=/, 回库件数=39490
+            PickupReport.objects.create(
+                daily_report=daily_report, pickup_area='LAX', pickup_situation='/', return_count=39490
+            )
+            created_reports.append(daily_report)
+    return created_reports
@@ -0,0 +1,227 @@
+"""
+文档下载
+
+文件以 FileResponse 分块流式读出，不整体读入内存；支持单段 Range（断点续传、PDF 按页加载）
+与 If-Modified-Since / If-Range 条件请求。DOCUMENT_DOWNLOAD_BACKEND 为 nginx 或 sendfile 时，
+权限检查与计数仍由 Django 完成，文件本身交给前端服务器发送（X-Accel-Redirect / X-Sendfile）。
+
+下载次数用 F() 表达式原子递增，并发下载不会丢失计数。DOCUMENT_DOWNLOAD_FLUSH_INTERVAL 大于 0 时
+改为在进程内累计：第一次计数后启动后台定时器，最迟 DOCUMENT_DOWNLOAD_FLUSH_INTERVAL 秒后
+合并成 UPDATE 写入；进程正常退出时写入剩余计数，被强制终止（kill -9）时尚未写入的计数会丢失。
+"""
+import atexit
+import logging
+import os
+import re
+import threading
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from django.views.static import was_modified_since
+
+from .models import Document
+
+DOWNLOAD_BACKENDS = ('django', 'nginx', 'sendfile')
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+logger = logging.getLogger(__name__)
+
+
+def can_download(user, document):
+    """公开文档登录即可下载；非公开文档仅上传者与管理员可下载"""
+    return document.is_public or document.uploaded_by_id == user.pk or user.is_staff
+
+
+def parse_range(header, size):
+    """
+    解析单段 Range 请求头，返回 (起始, 结束)（含结束字节）
+
+    没有 Range、格式不支持或为多段时返回 None（按完整文件响应）；
+    范围不可满足时抛出 ValueError。
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start, end = max(0, size - int(last)), size - 1
+        if int(last) == 0:
+            raise ValueError('empty suffix range')
+    if start >= size:
+        raise ValueError('range not satisfiable')
+    return start, end
+
+
+class _RangeFile:
+    """只读出文件中 [start, end] 区间的包装对象，供 FileResponse 分块读取"""
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.remaining = end - start + 1
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class DownloadCounter:
+    """按文档累计下载次数，由后台定时器定期合并写入数据库"""
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _interval(self):
+        if self.interval is not None:
+            return self.interval
+        return getattr(settings, 'DOCUMENT_DOWNLOAD_FLUSH_INTERVAL', 0)
+
+    def record(self, document_id):
+        interval = self._interval()
+        if interval <= 0:
+            Document.objects.filter(pk=document_id).update(download_count=F('download_count') + 1)
+            return
+        with self._lock:
+            self._pending[document_id] = self._pending.get(document_id, 0) + 1
+            if self._timer is None:
+                # 守护线程：不阻止进程退出，剩余计数由 atexit 写入
+                self._timer = threading.Timer(interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        """写入累计的计数，返回写入的下载次数；增量相同的文档合并为一条 UPDATE"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            timer, self._timer = self._timer, None
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+        by_increment = {}
+        for document_id, increment in pending.items():
+            by_increment.setdefault(increment, []).append(document_id)
+        for increment, ids in by_increment.items():
+            Document.objects.filter(pk__in=ids).update(download_count=F('download_count') + increment)
+        return sum(pending.values())
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('写入下载计数失败')
+        finally:
+            # 定时器线程不经过请求周期，用完即关闭本线程的数据库连接
+            connections.close_all()
+
+
+download_counter = DownloadCounter()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        download_counter.flush()
+    except Exception:
+        logger.exception('进程退出时写入下载计数失败')
+
+
+def _backend():
+    backend = getattr(settings, 'DOCUMENT_DOWNLOAD_BACKEND', 'django')
+    if backend not in DOWNLOAD_BACKENDS:
+        raise ValueError(f'未知的 DOCUMENT_DOWNLOAD_BACKEND: {backend}')
+    return backend
+
+
+def _handoff_response(document, path, filename):
+    """只返回响应头，由前端服务器读取并发送文件（同时处理 Range 与条件请求）"""
+    response = HttpResponse(content_type='application/octet-stream')
+    if _backend() == 'nginx':
+        prefix = getattr(settings, 'DOCUMENT_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(document.file.name)
+    else:
+        # 响应头只能是 ASCII：中文文件名按 URL 编码（mod_xsendfile 默认 XSendFileUnescape On）
+        response['X-Sendfile'] = quote(path)
+    # 让前端服务器按文件扩展名设置 Content-Type
+    del response['Content-Type']
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def document_response(request, document):
+    """
+    返回文档的下载响应，并在需要时记录一次下载
+
+    只有 GET 请求、且返回完整文件或从第0字节开始的片段时计数，
+    断点续传的后续片段、HEAD 与 304 不计数。
+    """
+    try:
+        path = document.file.path
+        stat = os.stat(path)
+    except (ValueError, NotImplementedError, OSError):
+        raise Http404('文件不存在')
+
+    filename = os.path.basename(document.file.name)
+    size = stat.st_size
+    last_modified = http_date(stat.st_mtime)
+
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        response = HttpResponseNotModified()
+        response['Last-Modified'] = last_modified
+        return response
+
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and if_range:
+        # 文件在客户端取得前一部分之后被替换过：返回完整文件
+        if_range_time = parse_http_date_safe(if_range)
+        if if_range_time is None or int(stat.st_mtime) > if_range_time:
+            range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if request.method == 'GET' and (byte_range is None or byte_range[0] == 0):
+        download_counter.record(document.pk)
+
+    if _backend() != 'django':
+        return _handoff_response(document, path, filename)
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=True, filename=filename)
+    else:
+        start, end = byte_range
+        response = FileResponse(_RangeFile(file, start, end), as_attachment=True, filename=filename)
+        response.status_code = 206
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = last_modified
+    return response
@@ -0,0 +1,154 @@
+"""
+异常信息流
+
+将九类子报表中非空的 exception_notes 通过一条 UNION ALL 查询取回，
+并提供按 (report_date 倒序, 模块, id) 排序的游标分页，供异常处理页面与JSON接口使用。
+
+异步视图使用 aexception_page：数据库支持多个连接同时读取时，九个来源各自取一页并发执行，
+再按同一排序键归并，结果与 UNION ALL 查询相同。
+"""
+import heapq
+from datetime import date
+from functools import partial
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from django.db.models import CharField, F, IntegerField, Q, Value
+from django.db.models.functions import Concat
+
+from apps.core.concurrency import can_query_concurrently, gather_queries
+
+from .aggregation import published_reports
+from .pagination import InvalidCursor, encode_cursor as _encode, decode_cursor as _decode
+from .models import (
+    DeliveryReport, WarehouseReport, PickupReport, LinehaulReport, ChangeOrderChannel,
+    SortingMachineReport, EquipmentReport, QualityReport, CostReport
+)
+
+
+# (模型, 模块名称, 项目名称表达式)，顺序即同一日期内的模块排列顺序
+EXCEPTION_SOURCES = (
+    (DeliveryReport, '配送管理', Concat(F('city'), Value('配送'), output_field=CharField())),
+    (WarehouseReport, '仓内管理', F('contractor_company')),
+    (PickupReport, '揽收管理', F('pickup_area')),
+    (LinehaulReport, '干线管理', F('supplier')),
+    (ChangeOrderChannel, '换单管理', F('channel_name')),
+    (SortingMachineReport, '分拣机管理', F('machine_name')),
+    (EquipmentReport, '设备维护', F('equipment_name')),
+    (QualityReport, '质量监控', F('quality_type')),
+    (CostReport, '成本分析', F('cost_category')),
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+FEED_FIELDS = ('id', 'report_date', 'exception_notes', 'source', 'module', 'item')
+
+
+def encode_cursor(row):
+    """将一行的排序键编码为不透明游标"""
+    return _encode([row['report_date'], row['source'], row['id']])
+
+
+def decode_cursor(cursor):
+    """解析游标，返回 (report_date, source, id)"""
+    try:
+        report_date, source, pk = _decode(cursor)
+        return date.fromisoformat(report_date), int(source), int(pk)
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _after_cursor(source, cursor):
+    """
+    生成某一来源在游标之后的过滤条件
+
+    来源序号在每个子查询中是常量，因此复合排序键的比较可以在各子查询内
+    化简为只涉及 report_date 与 id 的条件，从而继续利用 report_date 索引。
+    """
+    cursor_date, cursor_source, cursor_id = cursor
+    if source > cursor_source:
+        return Q(report_date__lte=cursor_date)
+    if source == cursor_source:
+        return Q(report_date__lt=cursor_date) | Q(report_date=cursor_date, id__gt=cursor_id)
+    return Q(report_date__lt=cursor_date)
+
+
+def source_querysets(start_date, end_date, cursor=None):
+    """各来源在游标之后的异常记录，每项为未排序的 values 查询集，顺序与 EXCEPTION_SOURCES 相同"""
+    querysets = []
+    for source, (model, module, item) in enumerate(EXCEPTION_SOURCES):
+        queryset = published_reports(model, start_date, end_date).exclude(exception_notes='')
+        if cursor is not None:
+            queryset = queryset.filter(_after_cursor(source, cursor))
+        querysets.append(
+            queryset.order_by().annotate(
+                source=Value(source, output_field=IntegerField()),
+                module=Value(module, output_field=CharField()),
+                item=item,
+            ).values(*FEED_FIELDS)
+        )
+    return querysets
+
+
+def exception_queryset(start_date, end_date, cursor=None):
+    """
+    构建跨全部模块的 UNION ALL 查询
+
+    返回按 report_date 倒序、模块顺序、id 排序的 values 查询集，尚未求值。
+    """
+    first, *rest = source_querysets(start_date, end_date, cursor)
+    return first.union(*rest, all=True).order_by('-report_date', 'source', 'id')
+
+
+def _prepare(cursor, page_size):
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    if isinstance(cursor, str):
+        cursor = decode_cursor(cursor)
+    return cursor, page_size
+
+
+def _paginate(rows, page_size):
+    """rows 多取了一行，用于判断是否还有下一页"""
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+
+def _sort_key(row):
+    return -row['report_date'].toordinal(), row['source'], row['id']
+
+
+def merge_source_rows(row_lists, page_size):
+    """归并各来源已按排序键排好的行，返回 (rows, next_cursor)，与 exception_page 的结果相同"""
+    return _paginate(list(islice(heapq.merge(*row_lists, key=_sort_key), page_size + 1)), page_size)
+
+
+def exception_page(start_date, end_date, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    获取一页异常数据
+
+    多取一行用于判断是否还有下一页，返回 (rows, next_cursor)。
+    """
+    cursor, page_size = _prepare(cursor, page_size)
+    return _paginate(list(exception_queryset(start_date, end_date, cursor)[:page_size + 1]), page_size)
+
+
+async def aexception_page(start_date, end_date, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    exception_page 的异步版本
+
+    可以并发读取时，每个来源各取 page_size + 1 行（同时执行），归并后取一页；
+    否则执行与 exception_page 相同的一条 UNION ALL 查询。
+    """
+    cursor, page_size = _prepare(cursor, page_size)
+    if not can_query_concurrently():
+        return await sync_to_async(exception_page)(start_date, end_date, cursor, page_size)
+    row_lists = await gather_queries(*(
+        partial(list, queryset.order_by('-report_date', 'id')[:page_size + 1])
+        for queryset in source_querysets(start_date, end_date, cursor)
+    ))
+    return merge_source_rows(row_lists, page_size)
@@ -0,0 +1,230 @@
+"""
+报表导出
+
+按报表类型、日期范围、城市导出已发布日报下的子报表。查询使用 values_list +
+iterator(chunk_size) 分块读取，CSV / XLSX 均以生成器逐块输出，配合 StreamingHttpResponse
+使内存占用与导出的天数无关。XLSX 只依赖标准库 zipfile，工作表使用内联字符串逐行写入。
+"""
+import csv
+import zipfile
+from datetime import date, time
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.db.models import DecimalField, ExpressionWrapper, F
+
+from .aggregation import published_reports
+from .importer import REPORT_TYPES, SKIPPED_FIELDS
+from .models import DeliveryReport, WarehouseReport, PickupReport, AirTransportReport
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# 没有独立菜单资源的报表类型 -> 展示其数据的模块资源（其余类型的资源编码与报表类型相同）
+EXPORT_RESOURCES = {
+    'exchange_order': 'pickup',
+}
+
+# 支持按城市过滤的子报表 -> 城市字段
+CITY_FIELDS = {
+    DeliveryReport: 'city',
+    PickupReport: 'pickup_area',
+    AirTransportReport: 'flight_city',
+}
+
+# 导出时按其他字段重新计算的列（与模块页面的计算方式一致）
+COMPUTED_COLUMNS = {
+    WarehouseReport: {
+        'total_cost': ExpressionWrapper(
+            F('actual_hours') * F('hourly_rate'),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+    },
+}
+
+
+def export_permission(report_type):
+    """导出某类报表需要的权限编码"""
+    return f'{EXPORT_RESOURCES.get(report_type, report_type)}.read'
+
+
+def export_columns(model):
+    """导出列，返回 [(查询字段名, 表头)]，报告日期在第一列"""
+    computed = COMPUTED_COLUMNS.get(model, {})
+    columns = [('report_date', str(model._meta.get_field('report_date').verbose_name))]
+    for field in model._meta.concrete_fields:
+        if field.name in SKIPPED_FIELDS:
+            continue
+        name = f'export_{field.name}' if field.name in computed else field.name
+        columns.append((name, str(field.verbose_name)))
+    return columns
+
+
+def export_rows(report_type, start_date, end_date, city=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    获取导出数据，返回 (表头列表, 行元组迭代器)
+
+    city 只对有城市字段的子报表生效；行按 (报告日期, id) 排序，分块从数据库读取。
+    """
+    model = REPORT_TYPES[report_type]
+    queryset = published_reports(model, start_date, end_date)
+    if city and model in CITY_FIELDS:
+        queryset = queryset.filter(**{CITY_FIELDS[model]: city})
+    queryset = queryset.annotate(**{
+        f'export_{name}': expression
+        for name, expression in COMPUTED_COLUMNS.get(model, {}).items()
+    })
+
+    columns = export_columns(model)
+    rows = (
+        queryset.order_by('report_date', 'id')
+        .values_list(*[name for name, _ in columns])
+        .iterator(chunk_size=chunk_size)
+    )
+    return [header for _, header in columns], rows
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+class _Echo:
+    """csv.writer 的伪文件对象，write 直接返回写入的内容"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(headers, rows):
+    """逐行生成CSV文本，带BOM以便Excel正确识别中文"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_text(value) for value in row])
+
+
+class _StreamBuffer:
+    """不可定位的输出缓冲，zipfile 写入的数据在每次 drain 时取出"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_END = '</sheetData></worksheet>'
+
+# XML 1.0 不允许的控制字符
+_ILLEGAL_XML_CHARS = dict.fromkeys(i for i in range(32) if i not in (9, 10, 13))
+
+XLSX_FLUSH_SIZE = 64 * 1024
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(_text(value).translate(_ILLEGAL_XML_CHARS))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(number, values):
+    return f'<row r="{number}">{"".join(_xlsx_cell(value) for value in values)}</row>'
+
+
+def xlsx_stream(headers, rows, sheet_name='Sheet1'):
+    """逐块生成单工作表的XLSX文件内容"""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(name=escape(sheet_name[:31], {'"': '&quot;'})))
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((XLSX_SHEET_START + _xlsx_row(1, headers)).encode())
+            for number, row in enumerate(rows, start=2):
+                sheet.write(_xlsx_row(number, row).encode())
+                if buffer.size >= XLSX_FLUSH_SIZE:
+                    yield buffer.drain()
+            sheet.write(XLSX_SHEET_END.encode())
+    yield buffer.drain()
+
+
+def export_stream(report_type, file_format, start_date, end_date, city=None):
+    """按格式生成导出内容"""
+    headers, rows = export_rows(report_type, start_date, end_date, city)
+    if file_format == 'xlsx':
+        sheet_name = str(REPORT_TYPES[report_type]._meta.verbose_name)
+        return xlsx_stream(headers, rows, sheet_name)
+    return csv_stream(headers, rows)
+
+
+def export_filename(report_type, file_format, start_date, end_date, city=None):
+    parts = [report_type, start_date.isoformat(), end_date.isoformat()]
+    if city:
+        parts.append(''.join(char for char in city if char.isalnum()))
+    return f"{'_'.join(parts)}.{file_format}"
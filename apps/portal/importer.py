@@ -0,0 +1,280 @@
+"""
+日报批量导入
+
+读取LAX日报表格导出的 CSV / JSON（JSON Lines）数据，逐行流式校验后按报告日期分组，
+每天一个事务、用 bulk_create 分批写入子报表。report_date 在构造实例时直接填入，
+不经过子报表 save() 中对 daily_report 的逐行外键访问；bulk_create 不触发 save() 和信号，
+因此每天写入后重新汇总KPI、重建该日报的全文索引，并在提交后记录分析快照的变更、检测配送指标异常，
+全部导入结束后统一使模块页面缓存失效。
+"""
+import csv
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import (
+    DailyReport, DeliveryReport, WarehouseReport, ExchangeOrderReport, PickupReport,
+    AirTransportReport, LinehaulReport, ChangeOrderChannel, SortingMachineReport,
+    EquipmentReport, QualityReport, CostReport
+)
+from .analytics import record_change
+from .anomalies import schedule_detection
+from .rollup import refresh_rollup
+from .search import index_daily_report
+from .view_cache import invalidate_view_cache
+
+# 报表类型 -> 子报表模型
+REPORT_TYPES = {
+    'delivery': DeliveryReport,
+    'warehouse': WarehouseReport,
+    'exchange_order': ExchangeOrderReport,
+    'pickup': PickupReport,
+    'air_transport': AirTransportReport,
+    'linehaul': LinehaulReport,
+    'change_order': ChangeOrderChannel,
+    'sorting_machine': SortingMachineReport,
+    'equipment': EquipmentReport,
+    'quality': QualityReport,
+    'cost': CostReport,
+}
+
+# 需要维护KPI汇总的子报表 -> 汇总模块
+ROLLUP_MODULES = {
+    DeliveryReport: 'delivery',
+    WarehouseReport: 'warehouse',
+    ChangeOrderChannel: 'change_order',
+}
+
+# 导出数据中未提供时按其他字段计算的值
+DERIVED_FIELDS = {
+    WarehouseReport: {
+        'total_cost': lambda report: report.actual_hours * report.hourly_rate,
+    },
+}
+
+# 不从导入数据中读取的字段
+SKIPPED_FIELDS = ('id', 'daily_report', 'report_date', 'created_at', 'updated_at')
+
+TYPE_COLUMNS = ('report_type', '报表类型')
+DATE_COLUMNS = ('report_date', '报告日期')
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class ReportImportError(ValueError):
+    """导入数据格式或内容错误"""
+
+    def __init__(self, message, line=None):
+        self.line = line
+        if line is not None:
+            message = f'第{line}行: {message}'
+        super().__init__(message)
+
+
+def system_reporter():
+    """获取（不存在时创建）系统报告人"""
+    User = get_user_model()
+    reporter, created = User.objects.get_or_create(
+        username='system_reporter',
+        defaults={'email': 'system@example.com', 'first_name': 'System', 'last_name': 'Reporter'},
+    )
+    if created:
+        reporter.set_unusable_password()
+        reporter.save()
+    return reporter
+
+
+def import_fields(model):
+    """
+    模型可导入的字段，返回 {列名: 字段}
+
+    列名既可以是字段名，也可以是字段的中文名称（与表格导出的表头一致）。
+    """
+    columns = {}
+    for field in model._meta.concrete_fields:
+        if field.name in SKIPPED_FIELDS:
+            continue
+        columns[field.name] = field
+        columns[str(field.verbose_name)] = field
+    return columns
+
+
+def read_rows(path, file_format=None):
+    """
+    逐行读取导出文件，产出 (行号, 原始数据字典)
+
+    CSV 与 JSON Lines 逐行读取；JSON 文件可以是对象数组，或 {报表类型: 对象数组}。
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, encoding='utf-8-sig', newline='') as handle:
+        if file_format == 'csv':
+            # 第1行为表头
+            yield from enumerate(csv.DictReader(handle), start=2)
+        elif file_format == 'jsonl':
+            for line, text in enumerate(handle, start=1):
+                if text.strip():
+                    yield line, _json_object(text, line)
+        elif file_format == 'json':
+            data = json.load(handle)
+            if isinstance(data, dict):
+                data = [
+                    {'report_type': report_type, **row}
+                    for report_type, rows in data.items()
+                    for row in rows
+                ]
+            for index, row in enumerate(data, start=1):
+                if not isinstance(row, dict):
+                    raise ReportImportError('每条记录必须是对象', index)
+                yield index, row
+        else:
+            raise ReportImportError(f'不支持的文件格式: {file_format}')
+
+
+def _json_object(text, line):
+    try:
+        row = json.loads(text)
+    except ValueError as exc:
+        raise ReportImportError(f'JSON格式错误: {exc}', line)
+    if not isinstance(row, dict):
+        raise ReportImportError('每条记录必须是对象', line)
+    return row
+
+
+def _first(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _clean_value(field, value):
+    """按模型字段转换并校验单个值，空值使用字段默认值"""
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ''):
+        if field.has_default():
+            return field.get_default()
+        if field.null:
+            return None
+        if field.blank:
+            return ''
+    value = field.to_python(value)
+    field.run_validators(value)
+    field.validate(value, None)
+    return value
+
+
+class ReportImporter:
+    """
+    按报告日期分组写入子报表
+
+    输入按日期排列（表格导出的自然顺序）时内存中只保留一天的数据；
+    同一日期在输入中多次出现时分多次写入同一份日报。
+    """
+
+    def __init__(self, reporter=None, report_type=None, publish=False, replace=False,
+                 batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+        self.reporter = reporter
+        self.report_type = report_type
+        self.publish = publish
+        self.replace = replace
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.counts = {report_type: 0 for report_type in REPORT_TYPES}
+        self.dates = set()
+        self._columns = {model: import_fields(model) for model in REPORT_TYPES.values()}
+        self._replaced = set()
+
+    def build(self, line, row):
+        """校验一行数据，返回 (报告日期, 报表类型, 未保存的子报表实例)"""
+        report_type = _first(row, TYPE_COLUMNS) or self.report_type
+        if report_type not in REPORT_TYPES:
+            raise ReportImportError(f'未知的报表类型: {report_type}', line)
+        model = REPORT_TYPES[report_type]
+
+        raw_date = _first(row, DATE_COLUMNS)
+        if raw_date is None:
+            raise ReportImportError('缺少报告日期', line)
+        try:
+            report_date = DailyReport._meta.get_field('report_date').to_python(raw_date)
+        except ValidationError:
+            raise ReportImportError(f'报告日期格式错误: {raw_date}', line)
+
+        columns = self._columns[model]
+        provided = {
+            columns[column].name for column, value in row.items()
+            if column in columns and value not in (None, '')
+        }
+        values = {}
+        for field in dict.fromkeys(columns.values()):
+            raw = row.get(field.name)
+            if raw is None:
+                raw = row.get(str(field.verbose_name))
+            try:
+                values[field.attname] = _clean_value(field, raw)
+            except ValidationError as exc:
+                raise ReportImportError(f'{field.verbose_name}: {"; ".join(exc.messages)}', line)
+
+        # report_date 直接填入，写入时不再通过 daily_report 外键读取
+        instance = model(report_date=report_date, **values)
+        for name, compute in DERIVED_FIELDS.get(model, {}).items():
+            if name not in provided:
+                setattr(instance, name, compute(instance))
+        return report_date, report_type, instance
+
+    def run(self, rows):
+        """导入 (行号, 原始数据) 序列，返回各报表类型写入的行数"""
+        current_date, pending = None, {}
+        for line, row in rows:
+            report_date, report_type, instance = self.build(line, row)
+            if report_date != current_date:
+                self.flush(current_date, pending)
+                current_date, pending = report_date, {}
+            pending.setdefault(report_type, []).append(instance)
+        self.flush(current_date, pending)
+
+        if self.dates and not self.dry_run:
+            invalidate_view_cache()
+        return self.counts
+
+    def flush(self, report_date, pending):
+        """在一个事务内写入某一天的全部子报表"""
+        if not pending:
+            return
+        self.dates.add(report_date)
+        for report_type, instances in pending.items():
+            self.counts[report_type] += len(instances)
+        if self.dry_run:
+            return
+
+        if self.reporter is None:
+            self.reporter = system_reporter()
+        with transaction.atomic():
+            daily_report, created = DailyReport.objects.get_or_create(
+                report_date=report_date,
+                defaults={'reporter': self.reporter, 'is_published': self.publish},
+            )
+            if self.publish and not daily_report.is_published:
+                daily_report.is_published = True
+                daily_report.save(update_fields=['is_published', 'updated_at'])
+
+            for report_type, instances in pending.items():
+                model = REPORT_TYPES[report_type]
+                if self.replace and not created and (report_date, model) not in self._replaced:
+                    model.objects.filter(daily_report=daily_report).delete()
+                self._replaced.add((report_date, model))
+                for instance in instances:
+                    instance.daily_report = daily_report
+                model.objects.bulk_create(instances, batch_size=self.batch_size)
+
+                if model in ROLLUP_MODULES:
+                    refresh_rollup(ROLLUP_MODULES[model], report_date, daily_report.pk)
+
+            # bulk_create 不触发信号，按日报重建全文索引；提交后记录分析快照的变更并检测异常
+            index_daily_report(daily_report)
+            transaction.on_commit(lambda: record_change(daily_report.pk))
+            schedule_detection(daily_report.pk)
@@ -0,0 +1,89 @@
+import statistics
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Avg
+from django.db.models.functions import TruncMonth
+
+from apps.portal import analytics
+from apps.portal.demo_data import generate_demo_reports
+from apps.portal.models import DailyReport, DeliveryReport
+
+
+class Rollback(Exception):
+    """基准结束后回滚生成的演示数据"""
+
+
+def _timed(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+class Command(BaseCommand):
+    help = (
+        '对比多年数据下各城市按月平均移除率的三种计算方式：逐行加载模型实例、ORM 分组聚合、'
+        '列式分析快照。数据不足时在事务中生成演示日报，结束后回滚'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=3, help='数据年数（默认3）')
+        parser.add_argument('--repeat', type=int, default=5, help='每种方式重复次数，取中位数（默认5）')
+
+    def handle(self, *args, **options):
+        if not analytics.is_available():
+            raise CommandError('需要安装 NumPy：pip install -r requirements/analytics.txt')
+        start_date, end_date = analytics.default_range(options['years'])
+        try:
+            with transaction.atomic():
+                days = (end_date - start_date).days + 1
+                if DailyReport.objects.filter(report_date__range=[start_date, end_date]).count() < days:
+                    self.stdout.write(f'生成 {days} 天演示数据……')
+                    generate_demo_reports(days=days, end_date=end_date)
+                self.run(start_date, end_date, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+        analytics.snapshot.reset()
+
+    def run(self, start_date, end_date, repeat):
+        reports = DeliveryReport.objects.filter(
+            daily_report__is_published=True, report_date__range=[start_date, end_date]
+        )
+        self.stdout.write(f'配送报告 {reports.count()} 行，{start_date} ~ {end_date}')
+
+        def orm_instances():
+            groups = defaultdict(list)
+            for report in reports.all():
+                groups[(report.city, report.report_date.replace(day=1))].append(report.removal_rate)
+            return {key: sum(values) / len(values) for key, values in groups.items()}
+
+        def orm_aggregate():
+            return list(
+                reports.annotate(month=TruncMonth('report_date'))
+                .values('city', 'month').annotate(avg=Avg('removal_rate')).order_by()
+            )
+
+        def snapshot_trend():
+            return analytics.trend('removal_rate', 'month', start_date, end_date, window=3)
+
+        analytics.snapshot.reset()
+        build = _timed(lambda: (analytics.snapshot.reset(), analytics.snapshot.tables()), 1)
+        table = analytics.snapshot.table('delivery')
+        results = [
+            ('逐行加载模型实例', _timed(orm_instances, repeat)),
+            ('ORM 分组聚合', _timed(orm_aggregate, repeat)),
+            ('列式快照（含3期滚动平均）', _timed(snapshot_trend, repeat)),
+        ]
+        for label, seconds in results:
+            self.stdout.write(f'{label}：{seconds * 1000:.2f} ms')
+        self.stdout.write(
+            f'快照全量加载 {build * 1000:.1f} ms，配送表 {len(table)} 行，约 {table.nbytes / 1024:.0f} KiB'
+        )
+        aggregate, columnar = results[1][1], results[2][1]
+        self.stdout.write(self.style.SUCCESS(f'列式快照比 ORM 分组聚合快 {aggregate / columnar:.1f} 倍'))
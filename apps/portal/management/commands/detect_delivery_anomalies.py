@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.portal import analytics, anomalies
+
+
+class Command(BaseCommand):
+    help = '重新检测日期范围内全部已发布日报的配送指标异常（回填历史数据或修改阈值后使用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=1, help='检测最近几年（默认1）')
+
+    def handle(self, *args, **options):
+        if not analytics.is_available():
+            raise CommandError('需要安装 NumPy：pip install -r requirements/analytics.txt')
+        start_date, end_date = analytics.default_range(options['years'])
+        analytics.snapshot.tables()
+        start = time.perf_counter()
+        count = anomalies.detect_range(start_date, end_date)
+        seconds = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'{start_date} ~ {end_date} 检测出 {count} 条配送指标异常，耗时 {seconds * 1000:.1f} ms'
+        ))
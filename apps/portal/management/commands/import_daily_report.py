@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.portal.importer import (
+    DEFAULT_BATCH_SIZE, REPORT_TYPES, ReportImporter, ReportImportError, read_rows
+)
+
+
+class Command(BaseCommand):
+    help = '从LAX日报表格导出的 CSV / JSON 文件批量导入子报表（每天一个事务，bulk_create 分批写入）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='导出文件路径（.csv / .json / .jsonl）')
+        parser.add_argument(
+            '--type',
+            choices=list(REPORT_TYPES),
+            dest='report_type',
+            help='文件中没有 report_type 列时使用的报表类型',
+        )
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'], help='文件格式（默认按扩展名判断）')
+        parser.add_argument('--reporter', help='新建日报的报告人用户名（默认 system_reporter）')
+        parser.add_argument('--publish', action='store_true', help='导入后发布对应日期的日报')
+        parser.add_argument('--replace', action='store_true', help='先删除已存在日报中同类型的子报表')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='bulk_create 每批行数')
+        parser.add_argument('--dry-run', action='store_true', help='只校验数据，不写入数据库')
+
+    def handle(self, *args, **options):
+        reporter = None
+        if options['reporter']:
+            try:
+                reporter = get_user_model().objects.get(username=options['reporter'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"报告人不存在: {options['reporter']}")
+
+        importer = ReportImporter(
+            reporter=reporter,
+            report_type=options['report_type'],
+            publish=options['publish'],
+            replace=options['replace'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        for path in options['paths']:
+            try:
+                importer.run(read_rows(path, options['format']))
+            except (OSError, ReportImportError) as exc:
+                raise CommandError(f'{path}: {exc}')
+
+        for report_type, count in importer.counts.items():
+            if count:
+                self.stdout.write(f'  {report_type}: {count}')
+        action = '校验通过' if options['dry_run'] else '已导入'
+        total = sum(importer.counts.values())
+        self.stdout.write(self.style.SUCCESS(f'{action} {len(importer.dates)} 天、{total} 条子报表记录'))
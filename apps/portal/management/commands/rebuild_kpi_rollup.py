@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.portal.rollup import ROLLUP_SPECS, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = '从明细报表全量重建每日KPI汇总表'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module',
+            action='append',
+            choices=list(ROLLUP_SPECS),
+            dest='modules',
+            help='只重建指定模块，可重复指定（默认全部模块）',
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups(options['modules'])
+        self.stdout.write(self.style.SUCCESS(f'已重建 {count} 条KPI汇总记录'))
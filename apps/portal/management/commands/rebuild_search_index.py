@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.portal.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = '从已发布日报的子报表全量重建全文搜索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='数据库别名（默认 default）')
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index(using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f'已写入 {count} 条索引记录'))
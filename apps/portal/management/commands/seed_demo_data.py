@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.portal.demo_data import DEFAULT_SEED, generate_demo_reports
+
+
+class Command(BaseCommand):
+    help = '使用固定随机种子生成演示日报数据（配送、仓内、揽收、换单），已存在的日期会跳过'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='生成最近多少天的数据（默认7天）')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='随机种子')
+
+    def handle(self, *args, **options):
+        reports = generate_demo_reports(days=options['days'], seed=options['seed'])
+        self.stdout.write(self.style.SUCCESS(f'已生成 {len(reports)} 天的演示日报'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.core.routers import reporting_alias
+from apps.portal.view_cache import invalidate_view_cache
+
+
+class Command(BaseCommand):
+    help = '用 SQLite 在线备份把 default 数据库复制到报表分析只读库，可由 cron 定时执行'
+
+    def handle(self, *args, **options):
+        alias = reporting_alias()
+        if alias is None:
+            raise CommandError('未配置报表分析只读库（REPORTING_DATABASE_PATH）')
+        source, target = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+            raise CommandError('只支持 SQLite，其他数据库请使用数据库自身的复制功能')
+
+        source.ensure_connection()
+        target.ensure_connection()
+        # 备份在源库上只持有读锁，期间不阻塞写入
+        source.connection.backup(target.connection)
+        # 复制前页面缓存可能已按旧副本重新填充，复制后统一失效
+        invalidate_view_cache()
+        self.stdout.write(self.style.SUCCESS(f'已将 {source.settings_dict["NAME"]} 复制到 {target.settings_dict["NAME"]}'))
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:49
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, F, Q, Sum
+import django.db.models.deletion
+
+# 迁移时的汇总规则（固定在迁移内，不随 apps.portal.rollup 变化）
+ROLLUPS = {
+    'delivery': ('DeliveryReport', {
+        'cargo_volume': Sum('cargo_volume'),
+        'box_count': Sum('box_count'),
+        'removed_packages': Sum('removed_packages'),
+        'avg_removal_rate': Avg('removal_rate'),
+        'avg_delivery_rate_day1': Avg('delivery_rate_day1'),
+        'avg_delivery_rate_day2': Avg('delivery_rate_day2'),
+        'avg_delivery_rate_day3': Avg('delivery_rate_day3'),
+    }),
+    'warehouse': ('WarehouseReport', {
+        'total_cost': Sum(F('actual_hours') * F('hourly_rate')),
+        'attendance_count': Sum('attendance_count'),
+        'actual_hours': Sum('actual_hours'),
+    }),
+    'change_order': ('ChangeOrderChannel', {
+        'change_order_count': Sum('change_order_count'),
+    }),
+}
+
+
+def build_rollups(apps, schema_editor):
+    DailyKpiRollup = apps.get_model('portal', 'DailyKpiRollup')
+    rollups = []
+    for module, (model_name, aggregates) in ROLLUPS.items():
+        rows = (
+            apps.get_model('portal', model_name).objects.filter(report_date__isnull=False)
+            .order_by()
+            .values('report_date', 'daily_report_id')
+            .annotate(record_count=Count('id'), exception_count=Count('id', filter=~Q(exception_notes='')), **aggregates)
+        )
+        for row in rows:
+            values = {
+                field: round(value, 2) if field.startswith('avg_') and value is not None else (value or 0)
+                for field, value in row.items()
+            }
+            rollups.append(DailyKpiRollup(module=module, **values))
+    DailyKpiRollup.objects.bulk_create(rollups, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0006_alter_airtransportreport_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyKpiRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('report_date', models.DateField(verbose_name='报告日期')),
+                ('module', models.CharField(choices=[('delivery', '配送'), ('warehouse', '仓内'), ('change_order', '换单')], max_length=20, verbose_name='模块')),
+                ('record_count', models.PositiveIntegerField(default=0, verbose_name='记录数')),
+                ('exception_count', models.PositiveIntegerField(default=0, verbose_name='异常数')),
+                ('cargo_volume', models.PositiveIntegerField(default=0, verbose_name='货量')),
+                ('box_count', models.PositiveIntegerField(default=0, verbose_name='分箱数')),
+                ('removed_packages', models.PositiveIntegerField(default=0, verbose_name='包裹移除数')),
+                ('avg_removal_rate', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='平均移除率(%)')),
+                ('avg_delivery_rate_day1', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='第1天平均达成率(%)')),
+                ('avg_delivery_rate_day2', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='第2天平均达成率(%)')),
+                ('avg_delivery_rate_day3', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='第3天平均达成率(%)')),
+                ('attendance_count', models.PositiveIntegerField(default=0, verbose_name='到岗人数')),
+                ('actual_hours', models.PositiveIntegerField(default=0, verbose_name='实际工时')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='总成本')),
+                ('change_order_count', models.PositiveIntegerField(default=0, verbose_name='换单量')),
+                ('daily_report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kpi_rollups', to='portal.dailyreport', verbose_name='日报')),
+            ],
+            options={
+                'verbose_name': '每日KPI汇总',
+                'verbose_name_plural': '每日KPI汇总',
+                'ordering': ['-report_date', 'module'],
+                'unique_together': {('report_date', 'module')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:06
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    Department = apps.get_model('portal', 'Department')
+    departments = {department.pk: department for department in Department.objects.all()}
+
+    def path_of(department, seen=()):
+        if department.path:
+            return department.path
+        parent = departments.get(department.parent_id)
+        # 已有数据中的循环引用按根部门处理
+        prefix = path_of(parent, seen + (department.pk,)) if parent and parent.pk not in seen else ''
+        department.path = f'{prefix}{department.pk:08d}/'
+        department.depth = len(department.path) // 9 - 1
+        return department.path
+
+    for department in departments.values():
+        path_of(department)
+    Department.objects.bulk_update(departments.values(), ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0007_dailykpirollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='层级'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='层级路径'),
+        ),
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['path'], name='portal_depa_path_534a3b_idx'),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0008_department_path'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-priority', '-created_at', '-id'], name='announcement_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyreport',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-report_date'], name='dailyreport_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='document_list_idx'),
+        ),
+    ]
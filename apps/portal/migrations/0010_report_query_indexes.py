@@ -0,0 +1,145 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0009_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='airtransportreport',
+            name='portal_airt_report__7eb50a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='changeorderchannel',
+            name='portal_chan_report__5c8ba4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='costreport',
+            name='portal_cost_report__44013c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='deliveryreport',
+            name='portal_deli_report__d54e6d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='equipmentreport',
+            name='portal_equi_report__19345f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='exchangeorderreport',
+            name='portal_exch_report__ecc25c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='linehaulreport',
+            name='portal_line_report__b09b1a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='pickupreport',
+            name='portal_pick_report__7d636d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='qualityreport',
+            name='portal_qual_report__880ad8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='sortingmachinereport',
+            name='portal_sort_report__22527c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='warehousereport',
+            name='portal_ware_report__d3b1a2_idx',
+        ),
+        migrations.AddIndex(
+            model_name='airtransportreport',
+            index=models.Index(fields=['-report_date', 'flight_city'], name='airtransport_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='airtransportreport',
+            index=models.Index(fields=['daily_report', 'flight_city'], name='airtransport_report_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changeorderchannel',
+            index=models.Index(fields=['-report_date', 'channel_name'], name='changeorder_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changeorderchannel',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='changeorder_exception_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costreport',
+            index=models.Index(fields=['-report_date', 'cost_category'], name='cost_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costreport',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='cost_exception_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deliveryreport',
+            index=models.Index(fields=['-report_date', 'city'], name='delivery_date_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deliveryreport',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='delivery_exception_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmentreport',
+            index=models.Index(fields=['-report_date', 'equipment_name'], name='equipment_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmentreport',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='equipment_exception_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exchangeorderreport',
+            index=models.Index(fields=['-report_date', 'exchange_channel'], name='exchange_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='linehaulreport',
+            index=models.Index(fields=['-report_date', 'supplier'], name='linehaul_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='linehaulreport',
+            index=models.Index(fields=['daily_report', 'supplier', 'transport_type'], name='linehaul_report_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='linehaulreport',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='linehaul_exception_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickupreport',
+            index=models.Index(fields=['-report_date', 'pickup_area'], name='pickup_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickupreport',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='pickup_exception_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qualityreport',
+            index=models.Index(fields=['-report_date', 'quality_type'], name='quality_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qualityreport',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='quality_exception_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sortingmachinereport',
+            index=models.Index(fields=['-report_date', 'machine_name'], name='sorting_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sortingmachinereport',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='sorting_exception_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehousereport',
+            index=models.Index(fields=['-report_date', 'contractor_company'], name='warehouse_date_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehousereport',
+            index=models.Index(condition=models.Q(('exception_notes', ''), _negated=True), fields=['-report_date'], name='warehouse_exception_idx'),
+        ),
+    ]
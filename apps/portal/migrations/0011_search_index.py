@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:05
+
+from django.db import migrations
+
+
+# 迁移时的表结构（固定在迁移内，不随 apps.portal.search 变化）。
+# 迁移只建空表；已有数据用 python manage.py rebuild_search_index 写入索引
+CREATE_TABLE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS portal_search_index USING fts5(
+    body,
+    source UNINDEXED,
+    object_id UNINDEXED,
+    daily_report_id UNINDEXED,
+    report_date UNINDEXED,
+    field UNINDEXED,
+    item UNINDEXED,
+    content UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+DROP_TABLE_SQL = 'DROP TABLE IF EXISTS portal_search_index'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(CREATE_TABLE_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(DROP_TABLE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0010_report_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
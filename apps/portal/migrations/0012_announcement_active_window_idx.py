@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='announcement',
+            name='announcement_list_idx',
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-priority', '-created_at', '-id', 'start_date', 'end_date'], name='announcement_list_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0012_announcement_active_window_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('report_date', models.DateField(verbose_name='报告日期')),
+                ('city', models.CharField(max_length=10, verbose_name='配送城市')),
+                ('metric', models.CharField(choices=[('delivery_rate_day1', '第1天达成率(%)'), ('delivery_rate_day2', '第2天达成率(%)'), ('delivery_rate_day3', '第3天达成率(%)'), ('removal_rate', '移除率(%)'), ('removed_packages', '包裹移除数')], max_length=30, verbose_name='指标')),
+                ('value', models.FloatField(verbose_name='当日值')),
+                ('baseline', models.FloatField(verbose_name='近期中位数')),
+                ('score', models.FloatField(verbose_name='稳健Z分数')),
+                ('daily_report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_anomalies', to='portal.dailyreport', verbose_name='日报')),
+            ],
+            options={
+                'verbose_name': '配送指标异常',
+                'verbose_name_plural': '配送指标异常',
+                'ordering': ['-report_date', 'city', 'metric'],
+                'indexes': [models.Index(fields=['-report_date', 'city'], name='delivery_anomaly_date_idx')],
+                'unique_together': {('daily_report', 'city', 'metric')},
+            },
+        ),
+    ]
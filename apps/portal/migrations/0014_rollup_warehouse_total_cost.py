@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import F, Sum
+
+
+def recompute_total_cost(apps, schema_editor):
+    """按 实际工时 × 每小时工资 重新计算已有仓内汇总的总成本（之前汇总的是后台录入时为0的 total_cost 列）"""
+    DailyKpiRollup = apps.get_model('portal', 'DailyKpiRollup')
+    WarehouseReport = apps.get_model('portal', 'WarehouseReport')
+    totals = dict(
+        WarehouseReport.objects.filter(report_date__isnull=False)
+        .order_by()
+        .values('report_date')
+        .annotate(total=Sum(F('actual_hours') * F('hourly_rate')))
+        .values_list('report_date', 'total')
+    )
+    rollups = list(DailyKpiRollup.objects.filter(module='warehouse'))
+    for rollup in rollups:
+        rollup.total_cost = totals.get(rollup.report_date) or 0
+    DailyKpiRollup.objects.bulk_update(rollups, ['total_cost'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0013_deliveryanomaly'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_total_cost, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Concat, Substr
 from django.contrib.auth import get_user_model
 from apps.core.models import BaseModel
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
+from .rollup import refresh_rollup
 
 User = get_user_model()
 
@@ -20,6 +23,12 @@ class Announcement(BaseModel):
         verbose_name = '公告'
         verbose_name_plural = '公告'
         ordering = ['-priority', '-created_at']
+        indexes = [
+            # 公告列表游标分页：只索引已发布公告的排序键（SQLite 上布尔过滤不能使用复合索引前缀）；
+            # 末尾带上时间窗口两列，按顺序扫描索引时直接在索引中判断是否有效，不回表
+            models.Index(fields=['-priority', '-created_at', '-id', 'start_date', 'end_date'],
+                         condition=models.Q(is_published=True), name='announcement_list_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -39,6 +48,11 @@ class DailyReport(BaseModel):
         verbose_name_plural = '日报'
         ordering = ['-report_date']
         unique_together = ['report_date']
+        indexes = [
+            # 日报列表游标分页：只索引已发布日报的排序键
+            models.Index(fields=['-report_date'], condition=models.Q(is_published=True),
+                         name='dailyreport_list_idx'),
+        ]
 
     def __str__(self):
         return f"LAX日报 - {self.report_date}"
@@ -75,13 +89,26 @@ class DeliveryReport(BaseModel):
         verbose_name_plural = '配送报告'
         ordering = ['-report_date', 'city']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, city) 读取或分组
+            models.Index(fields=['-report_date', 'city'], name='delivery_date_city_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='delivery_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
+        previous_date = self.report_date
         if self.daily_report:
             self.report_date = self.daily_report.report_date
         super().save(*args, **kwargs)
+        refresh_rollup('delivery', self.report_date, self.daily_report_id)
+        if previous_date and previous_date != self.report_date:
+            refresh_rollup('delivery', previous_date)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        refresh_rollup('delivery', self.report_date)
+        return result
 
     def __str__(self):
         return f"{self.city}配送报告 - {self.report_date}"
@@ -113,13 +140,26 @@ class WarehouseReport(BaseModel):
         verbose_name_plural = '仓内报告'
         ordering = ['-report_date', 'contractor_company']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, contractor_company) 读取或分组
+            models.Index(fields=['-report_date', 'contractor_company'], name='warehouse_date_name_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='warehouse_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
+        previous_date = self.report_date
         if self.daily_report:
             self.report_date = self.daily_report.report_date
         super().save(*args, **kwargs)
+        refresh_rollup('warehouse', self.report_date, self.daily_report_id)
+        if previous_date and previous_date != self.report_date:
+            refresh_rollup('warehouse', previous_date)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        refresh_rollup('warehouse', self.report_date)
+        return result
 
     def __str__(self):
         return f"{self.contractor_company}仓内报告 - {self.report_date}"
@@ -138,7 +178,8 @@ class ExchangeOrderReport(BaseModel):
         verbose_name_plural = '换单报告'
         ordering = ['-report_date', 'exchange_channel']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, exchange_channel) 读取或分组
+            models.Index(fields=['-report_date', 'exchange_channel'], name='exchange_date_name_idx'),
         ]
     
     def save(self, *args, **kwargs):
@@ -164,7 +205,11 @@ class PickupReport(BaseModel):
         verbose_name_plural = '揽收报告'
         ordering = ['-report_date', 'pickup_area']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, pickup_area) 读取或分组
+            models.Index(fields=['-report_date', 'pickup_area'], name='pickup_date_name_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='pickup_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
@@ -190,7 +235,10 @@ class AirTransportReport(BaseModel):
         verbose_name_plural = '空运报告'
         ordering = ['-report_date', 'flight_city']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, flight_city) 读取或分组
+            models.Index(fields=['-report_date', 'flight_city'], name='airtransport_date_name_idx'),
+            # 按单个日报读取并排序
+            models.Index(fields=['daily_report', 'flight_city'], name='airtransport_report_idx'),
         ]
 
     def save(self, *args, **kwargs):
@@ -217,7 +265,13 @@ class LinehaulReport(BaseModel):
         verbose_name_plural = '干线报告'
         ordering = ['-report_date', 'supplier']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, supplier) 读取或分组
+            models.Index(fields=['-report_date', 'supplier'], name='linehaul_date_name_idx'),
+            # 按单个日报读取并排序
+            models.Index(fields=['daily_report', 'supplier', 'transport_type'], name='linehaul_report_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='linehaul_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
@@ -242,13 +296,26 @@ class ChangeOrderChannel(BaseModel):
         verbose_name_plural = '换单渠道'
         ordering = ['-report_date', 'channel_name']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, channel_name) 读取或分组
+            models.Index(fields=['-report_date', 'channel_name'], name='changeorder_date_name_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='changeorder_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
+        previous_date = self.report_date
         if self.daily_report:
             self.report_date = self.daily_report.report_date
         super().save(*args, **kwargs)
+        refresh_rollup('change_order', self.report_date, self.daily_report_id)
+        if previous_date and previous_date != self.report_date:
+            refresh_rollup('change_order', previous_date)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        refresh_rollup('change_order', self.report_date)
+        return result
 
     def __str__(self):
         return f"{self.channel_name}换单渠道 - {self.report_date}"
@@ -271,7 +338,11 @@ class SortingMachineReport(BaseModel):
         verbose_name_plural = '分拣机报告'
         ordering = ['-report_date', 'machine_name']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, machine_name) 读取或分组
+            models.Index(fields=['-report_date', 'machine_name'], name='sorting_date_name_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='sorting_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
@@ -299,7 +370,11 @@ class EquipmentReport(BaseModel):
         verbose_name_plural = '设备报告'
         ordering = ['-report_date', 'equipment_name']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, equipment_name) 读取或分组
+            models.Index(fields=['-report_date', 'equipment_name'], name='equipment_date_name_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='equipment_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
@@ -327,7 +402,11 @@ class QualityReport(BaseModel):
         verbose_name_plural = '质量报告'
         ordering = ['-report_date', 'quality_type']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, quality_type) 读取或分组
+            models.Index(fields=['-report_date', 'quality_type'], name='quality_date_name_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='quality_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
@@ -355,7 +434,11 @@ class CostReport(BaseModel):
         verbose_name_plural = '成本报告'
         ordering = ['-report_date', 'cost_category']
         indexes = [
-            models.Index(fields=['report_date']),
+            # 日期范围查询按模型默认排序 (报告日期倒序, cost_category) 读取或分组
+            models.Index(fields=['-report_date', 'cost_category'], name='cost_date_name_idx'),
+            # 异常信息流只读取有异常说明的记录
+            models.Index(fields=['-report_date'], condition=~models.Q(exception_notes=''),
+                         name='cost_exception_idx'),
         ]
 
     def save(self, *args, **kwargs):
@@ -367,6 +450,78 @@ class CostReport(BaseModel):
         return f"{self.cost_category}成本报告 - {self.report_date}"
 
 
+class DailyKpiRollup(BaseModel):
+    """每日KPI汇总 - 每个报告日期、每个模块一行，由子报表保存/删除时增量维护"""
+    MODULE_CHOICES = (
+        ('delivery', '配送'),
+        ('warehouse', '仓内'),
+        ('change_order', '换单'),
+    )
+
+    daily_report = models.ForeignKey(DailyReport, on_delete=models.CASCADE, related_name='kpi_rollups', verbose_name='日报')
+    report_date = models.DateField(verbose_name='报告日期')
+    module = models.CharField(max_length=20, choices=MODULE_CHOICES, verbose_name='模块')
+    record_count = models.PositiveIntegerField(default=0, verbose_name='记录数')
+    exception_count = models.PositiveIntegerField(default=0, verbose_name='异常数')
+
+    # 配送
+    cargo_volume = models.PositiveIntegerField(default=0, verbose_name='货量')
+    box_count = models.PositiveIntegerField(default=0, verbose_name='分箱数')
+    removed_packages = models.PositiveIntegerField(default=0, verbose_name='包裹移除数')
+    avg_removal_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0, verbose_name='平均移除率(%)')
+    avg_delivery_rate_day1 = models.DecimalField(max_digits=5, decimal_places=2, default=0, verbose_name='第1天平均达成率(%)')
+    avg_delivery_rate_day2 = models.DecimalField(max_digits=5, decimal_places=2, default=0, verbose_name='第2天平均达成率(%)')
+    avg_delivery_rate_day3 = models.DecimalField(max_digits=5, decimal_places=2, default=0, verbose_name='第3天平均达成率(%)')
+
+    # 仓内
+    attendance_count = models.PositiveIntegerField(default=0, verbose_name='到岗人数')
+    actual_hours = models.PositiveIntegerField(default=0, verbose_name='实际工时')
+    total_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name='总成本')
+
+    # 换单
+    change_order_count = models.PositiveIntegerField(default=0, verbose_name='换单量')
+
+    class Meta:
+        verbose_name = '每日KPI汇总'
+        verbose_name_plural = '每日KPI汇总'
+        ordering = ['-report_date', 'module']
+        unique_together = ['report_date', 'module']
+
+    def __str__(self):
+        return f"{self.get_module_display()}KPI汇总 - {self.report_date}"
+
+
+class DeliveryAnomaly(BaseModel):
+    """配送指标异常 - 某城市某天的指标明显偏离该城市近期水平，日报发布时检测（见 anomalies.py）"""
+    METRIC_CHOICES = (
+        ('delivery_rate_day1', '第1天达成率(%)'),
+        ('delivery_rate_day2', '第2天达成率(%)'),
+        ('delivery_rate_day3', '第3天达成率(%)'),
+        ('removal_rate', '移除率(%)'),
+        ('removed_packages', '包裹移除数'),
+    )
+
+    daily_report = models.ForeignKey(DailyReport, on_delete=models.CASCADE, related_name='delivery_anomalies', verbose_name='日报')
+    report_date = models.DateField(verbose_name='报告日期')
+    city = models.CharField(max_length=10, verbose_name='配送城市')
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES, verbose_name='指标')
+    value = models.FloatField(verbose_name='当日值')
+    baseline = models.FloatField(verbose_name='近期中位数')
+    score = models.FloatField(verbose_name='稳健Z分数')
+
+    class Meta:
+        verbose_name = '配送指标异常'
+        verbose_name_plural = '配送指标异常'
+        ordering = ['-report_date', 'city', 'metric']
+        unique_together = ['daily_report', 'city', 'metric']
+        indexes = [
+            models.Index(fields=['-report_date', 'city'], name='delivery_anomaly_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.city} {self.get_metric_display()}异常 - {self.report_date}"
+
+
 class Department(BaseModel):
     """部门模型"""
     name = models.CharField(max_length=100, unique=True, verbose_name='部门名称')
@@ -376,11 +531,89 @@ class Department(BaseModel):
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, 
                               verbose_name='上级部门')
     is_active = models.BooleanField(default=True, verbose_name='是否激活')
+    # 物化路径：从根部门到本部门的id（定长补零）依次拼接，如 "00000001/00000004/"
+    path = models.CharField(max_length=255, blank=True, default='', editable=False, verbose_name='层级路径')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='层级')
+
+    PATH_STEP = 9  # 每级 8 位id + "/"
 
     class Meta:
         verbose_name = '部门'
         verbose_name_plural = '部门'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['path']),
+        ]
+
+    def clean(self):
+        if self.parent_id and self.path and self.parent.path.startswith(self.path):
+            raise ValidationError({'parent': '上级部门不能是本部门或其下级部门'})
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._update_path()
+
+    def _update_path(self):
+        """保存后重新计算物化路径，路径变化时用一条UPDATE同步全部下级部门"""
+        parent_path = ''
+        if self.parent_id:
+            parent_path = Department.objects.values_list('path', flat=True).get(pk=self.parent_id)
+            if self.path and parent_path.startswith(self.path):
+                raise ValueError('上级部门不能是本部门或其下级部门')
+        old_path = self.path
+        new_path = f'{parent_path}{self.pk:08d}/'
+        if new_path == old_path:
+            return
+        new_depth = len(new_path) // self.PATH_STEP - 1
+        Department.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        if old_path:
+            Department.objects.filter(
+                path__gt=old_path, path__lt=old_path[:-1] + '0'
+            ).update(
+                path=Concat(models.Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=models.F('depth') + (new_depth - self.depth),
+            )
+        self.path, self.depth = new_path, new_depth
+
+    def get_descendants(self, include_self=False):
+        """全部下级部门（按路径范围的一条索引查询）"""
+        # path 以 "/" 结尾，下级部门的 path 都落在 [path, path[:-1] + "0") 区间内
+        queryset = Department.objects.filter(path__gte=self.path, path__lt=self.path[:-1] + '0')
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
+    def get_ancestors(self, include_self=False):
+        """全部上级部门，从根部门开始排列（按路径中的id一条查询）"""
+        ids = [int(part) for part in self.path.split('/') if part]
+        if not include_self:
+            ids = ids[:-1]
+        return Department.objects.filter(pk__in=ids).order_by('depth')
+
+    @classmethod
+    def tree(cls, queryset=None):
+        """
+        一条查询加载部门树（连同部门经理），返回根部门列表
+
+        每个部门的 tree_children 为按名称排序的下级部门列表。
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        departments = list(queryset.select_related('manager').order_by('path'))
+        by_id = {department.pk: department for department in departments}
+        roots = []
+        for department in departments:
+            department.tree_children = []
+        for department in departments:
+            parent = by_id.get(department.parent_id)
+            if parent is None:
+                roots.append(department)
+            else:
+                parent.tree_children.append(department)
+        for department in departments:
+            department.tree_children.sort(key=lambda child: child.name)
+        return sorted(roots, key=lambda root: root.name)
 
     def __str__(self):
         return self.name
@@ -410,6 +643,11 @@ class Document(BaseModel):
         verbose_name = '文档'
         verbose_name_plural = '文档'
         ordering = ['-created_at']
+        indexes = [
+            # 文档列表游标分页：只索引公开文档的排序键
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_public=True),
+                         name='document_list_idx'),
+        ]
 
     def __str__(self):
         return self.title
\ No newline at end of file
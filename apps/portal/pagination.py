@@ -0,0 +1,189 @@
+"""
+游标分页
+
+按模型的固定排序进行键集（keyset）分页：游标中保存上一页边界行的排序键，
+下一页查询用 WHERE 条件从边界之后开始读取，而不是 COUNT(*) + OFFSET。
+配合以排序字段为后缀的复合索引，任意深度的页面与第一页的查询代价相同。
+
+游标是对排序键的 JSON 编码后再做 URL 安全的 base64，对页面不透明；
+总数是可选的近似值（缓存的 COUNT 结果），只在需要显示时计算。
+"""
+import base64
+import hashlib
+import json
+import operator
+from datetime import date, datetime
+from functools import reduce
+
+from django.core.cache import cache
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+# 近似总数的缓存时间（秒）
+APPROXIMATE_COUNT_TIMEOUT = 5 * 60
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析"""
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    """将排序键列表编码为不透明游标"""
+    payload = json.dumps([_json_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解析游标，返回排序键列表（日期等值为字符串，由调用方转换）"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def approximate_count(queryset):
+    """
+    查询集的近似总数
+
+    COUNT 结果按查询语句缓存 APPROXIMATE_COUNT_TIMEOUT 秒，翻页时不再重复计数；
+    新增或删除的记录在缓存过期后才反映到总数中。
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+    key = f'portal:approximate_count:{digest}'
+    total = cache.get(key)
+    if total is None:
+        total = queryset.order_by().count()
+        cache.set(key, total, APPROXIMATE_COUNT_TIMEOUT)
+    return total
+
+
+class CursorPage:
+    """一页数据及前后页游标，可像列表一样迭代"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class CursorPaginator:
+    """
+    键集分页器
+
+    ordering 为排序字段（'-' 前缀表示倒序），最后一个字段必须唯一（通常是 id），
+    以保证排序键能唯一定位一行。
+    """
+
+    def __init__(self, queryset, ordering, page_size=DEFAULT_PAGE_SIZE):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-'), queryset.model._meta.get_field(name.lstrip('-')))
+            for name in self.ordering
+        ]
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    def _keys(self, obj):
+        return [getattr(obj, field.attname) for _, _, field in self.fields]
+
+    def _parse(self, cursor):
+        """解析游标，返回 (方向, 排序键)；方向 'n' 为下一页，'p' 为上一页"""
+        values = decode_cursor(cursor)
+        if len(values) != len(self.fields) + 1 or values[0] not in ('n', 'p'):
+            raise InvalidCursor(cursor)
+        try:
+            keys = [field.to_python(value) for (_, _, field), value in zip(self.fields, values[1:])]
+        except Exception as exc:
+            raise InvalidCursor(cursor) from exc
+        return values[0], keys
+
+    def _after(self, keys, reverse=False):
+        """
+        排序键在 keys 之后（reverse 时为之前）的过滤条件
+
+        展开为 (a < x) OR (a = x AND b < y) OR ...，并额外加上首个字段的非严格范围条件，
+        使数据库可以直接在复合索引上定位起点。
+        """
+        branches = []
+        equal = Q()
+        for (name, descending, _), value in zip(self.fields, keys):
+            lookup = 'lt' if descending != reverse else 'gt'
+            branches.append(equal & Q(**{f'{name}__{lookup}': value}))
+            equal &= Q(**{name: value})
+        condition = reduce(operator.or_, branches)
+        name, descending, _ = self.fields[0]
+        bound = Q(**{f"{name}__{'lte' if descending != reverse else 'gte'}": keys[0]})
+        return bound & condition
+
+    def _order(self, reverse=False):
+        if not reverse:
+            return self.ordering
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+    def page(self, cursor=None, with_total=False):
+        """
+        获取游标所在页，cursor 为空时返回第一页
+
+        多取一行用于判断该方向上是否还有数据；向前翻页时按相反顺序读取后再反转。
+        无法解析的游标抛出 InvalidCursor。
+        """
+        direction, keys = self._parse(cursor) if cursor else ('n', None)
+        reverse = direction == 'p'
+        queryset = self.queryset
+        if keys is not None:
+            queryset = queryset.filter(self._after(keys, reverse))
+        rows = list(queryset.order_by(*self._order(reverse))[:self.page_size + 1])
+
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # 从某一行翻页过来时，翻页方向的反方向上必然还有数据
+        if reverse:
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, keys is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(['n'] + self._keys(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(['p'] + self._keys(rows[0]))
+
+        total = approximate_count(self.queryset) if with_total else None
+        return CursorPage(rows, next_cursor, previous_cursor, total)
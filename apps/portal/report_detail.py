@@ -0,0 +1,121 @@
+"""
+日报详情
+
+通过 prefetch_related 按各子报表的 related_name 一次取回日报下的全部子报表
+（日报本身1条查询 + 每类子报表1条查询，与子报表行数无关），并在遍历这些行时
+同时计算每个分区的汇总行。完整日报的JSON表示按模块页面缓存代数缓存。
+"""
+from decimal import Decimal
+
+from django.shortcuts import get_object_or_404
+
+from .models import DailyReport
+from .view_cache import cached_value
+
+# (related_name, 标题, 求和字段, 平均字段)，顺序即详情页分区顺序
+DETAIL_SECTIONS = (
+    ('delivery_reports', '配送报告',
+     ('cargo_volume', 'box_count', 'removed_packages'),
+     ('removal_rate', 'delivery_rate_day1', 'delivery_rate_day2', 'delivery_rate_day3')),
+    ('warehouse_reports', '仓内报告',
+     ('attendance_count', 'actual_attendance_count', 'actual_hours', 'packages_produced',
+      'sorting_count', 'exchange_count'),
+     ('cost_per_ticket',)),
+    ('exchange_order_reports', '换单数据', ('exchange_count',), ()),
+    ('pickup_reports', '揽收报告', ('return_count',), ()),
+    ('air_transport_reports', '空运报告', ('box_count',), ()),
+    ('linehaul_reports', '干线报告', ('vehicle_type_count',), ()),
+    ('change_order_channels', '换单渠道', ('change_order_count',), ()),
+    ('sorting_machine_reports', '分拣机报告', ('throughput', 'downtime_hours'), ('error_rate',)),
+    ('equipment_reports', '设备报告', ('maintenance_hours',), ('utilization_rate',)),
+    ('quality_reports', '质量报告', ('total_count', 'error_count'), ('error_rate',)),
+    ('cost_reports', '成本报告', ('planned_cost', 'actual_cost', 'variance'), ('variance_rate',)),
+)
+
+# JSON 表示中不输出的字段
+HIDDEN_FIELDS = ('daily_report', 'created_at', 'updated_at')
+
+
+def load_report(pk):
+    """加载已发布日报及其全部子报表，查询次数固定"""
+    queryset = DailyReport.objects.select_related('reporter').prefetch_related(
+        *[related_name for related_name, *_ in DETAIL_SECTIONS]
+    )
+    return get_object_or_404(queryset, pk=pk, is_published=True)
+
+
+def _summarize(rows, sums, averages):
+    summary = {'count': len(rows), 'exception_count': 0}
+    summary.update({field: 0 for field in sums})
+    for row in rows:
+        if getattr(row, 'exception_notes', ''):
+            summary['exception_count'] += 1
+        for field in sums + averages:
+            summary[field] = summary.get(field, 0) + (getattr(row, field) or 0)
+    for field in averages:
+        summary[field] = round(Decimal(summary.get(field, 0)) / len(rows), 2) if rows else 0
+    return summary
+
+
+def _warehouse_extra(rows, summary):
+    # 成本按 实际工时 × 每小时工资 计算，与仓内模块一致
+    for row in rows:
+        row.cost = row.actual_hours * row.hourly_rate
+    summary['total_cost'] = sum(row.cost for row in rows)
+
+
+def _quality_extra(rows, summary):
+    # 总错误率按件数加权，而不是各质量类型错误率的简单平均
+    if summary['total_count']:
+        summary['error_rate'] = round(Decimal(summary['error_count']) * 100 / summary['total_count'], 2)
+
+
+SUMMARY_EXTRAS = {
+    'warehouse_reports': _warehouse_extra,
+    'quality_reports': _quality_extra,
+}
+
+
+def report_sections(report):
+    """
+    按分区整理预取的子报表，返回 {related_name: {'title', 'rows', 'summary'}}
+
+    汇总行在同一次遍历中计算，不再额外查询。
+    """
+    sections = {}
+    for related_name, title, sums, averages in DETAIL_SECTIONS:
+        rows = list(getattr(report, related_name).all())
+        summary = _summarize(rows, sums, averages)
+        if related_name in SUMMARY_EXTRAS and rows:
+            SUMMARY_EXTRAS[related_name](rows, summary)
+        sections[related_name] = {'title': title, 'rows': rows, 'summary': summary}
+    return sections
+
+
+def _row_data(row):
+    return {
+        field.name: getattr(row, field.attname)
+        for field in row._meta.concrete_fields
+        if field.name not in HIDDEN_FIELDS
+    }
+
+
+def report_payload(pk):
+    """完整日报的JSON数据（含各分区明细与汇总），子报表变更后缓存自动失效"""
+    def build():
+        report = load_report(pk)
+        return {
+            'id': report.pk,
+            'report_date': report.report_date,
+            'reporter': report.reporter.display_name,
+            'notes': report.notes,
+            'sections': {
+                related_name: {
+                    'title': section['title'],
+                    'summary': section['summary'],
+                    'rows': [_row_data(row) for row in section['rows']],
+                }
+                for related_name, section in report_sections(report).items()
+            },
+        }
+    return cached_value(f'daily_report:{pk}', build)
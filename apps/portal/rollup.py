@@ -0,0 +1,116 @@
+"""
+每日KPI汇总维护
+
+子报表（配送、仓内、换单）保存或删除时，只重新汇总受影响日期的该模块数据，
+写入 DailyKpiRollup；仪表板等读取汇总表，读取成本与天数成正比而不是与明细行数成正比。
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Sum, Avg, Count, F, Q
+
+
+# 模块 -> (子报表模型名, {汇总字段: 聚合表达式})
+ROLLUP_SPECS = {
+    'delivery': ('DeliveryReport', {
+        'cargo_volume': Sum('cargo_volume'),
+        'box_count': Sum('box_count'),
+        'removed_packages': Sum('removed_packages'),
+        'avg_removal_rate': Avg('removal_rate'),
+        'avg_delivery_rate_day1': Avg('delivery_rate_day1'),
+        'avg_delivery_rate_day2': Avg('delivery_rate_day2'),
+        'avg_delivery_rate_day3': Avg('delivery_rate_day3'),
+    }),
+    'warehouse': ('WarehouseReport', {
+        # 与仓内模块、导出一致按 实际工时 × 每小时工资 计算；total_cost 列在后台录入时不会自动计算。
+        # 须排在 actual_hours 之前，否则 F('actual_hours') 会解析为同名的汇总注解
+        'total_cost': Sum(F('actual_hours') * F('hourly_rate')),
+        'attendance_count': Sum('attendance_count'),
+        'actual_hours': Sum('actual_hours'),
+    }),
+    'change_order': ('ChangeOrderChannel', {
+        'change_order_count': Sum('change_order_count'),
+    }),
+}
+
+# 所有模块共有的计数字段
+COMMON_AGGREGATES = {
+    'record_count': Count('id'),
+    'exception_count': Count('id', filter=~Q(exception_notes='')),
+}
+
+
+def _aggregates(module):
+    model_name, aggregates = ROLLUP_SPECS[module]
+    return apps.get_model('portal', model_name), {**COMMON_AGGREGATES, **aggregates}
+
+
+def _clean(values):
+    """空值按0处理，平均值保留两位小数"""
+    return {
+        field: round(value, 2) if field.startswith('avg_') and value is not None else (value or 0)
+        for field, value in values.items()
+    }
+
+
+def refresh_rollup(module, report_date, daily_report_id=None):
+    """
+    重新汇总某一日期某一模块的KPI
+
+    只聚合该日期的明细行（按 report_date 索引），没有明细时删除汇总行。
+    """
+    if report_date is None:
+        return
+    DailyKpiRollup = apps.get_model('portal', 'DailyKpiRollup')
+    model, aggregates = _aggregates(module)
+    values = _clean(model.objects.filter(report_date=report_date).aggregate(**aggregates))
+
+    with transaction.atomic():
+        if not values['record_count']:
+            DailyKpiRollup.objects.filter(report_date=report_date, module=module).delete()
+            return
+        if daily_report_id is None:
+            daily_report_id = model.objects.filter(report_date=report_date).values_list(
+                'daily_report_id', flat=True
+            ).first()
+        DailyKpiRollup.objects.update_or_create(
+            report_date=report_date,
+            module=module,
+            defaults={'daily_report_id': daily_report_id, **values},
+        )
+
+
+def rebuild_rollups(modules=None):
+    """
+    从明细数据全量重建KPI汇总表
+
+    每个模块一条分组查询，批量写入，返回写入的汇总行数。
+    """
+    DailyKpiRollup = apps.get_model('portal', 'DailyKpiRollup')
+    modules = modules or list(ROLLUP_SPECS)
+
+    rollups = []
+    for module in modules:
+        model, aggregates = _aggregates(module)
+        rows = (
+            model.objects.filter(report_date__isnull=False)
+            .order_by()
+            .values('report_date', 'daily_report_id')
+            .annotate(**aggregates)
+        )
+        for row in rows:
+            row = _clean(row)
+            rollups.append(DailyKpiRollup(module=module, **row))
+
+    with transaction.atomic():
+        DailyKpiRollup.objects.filter(module__in=modules).delete()
+        DailyKpiRollup.objects.bulk_create(rollups, batch_size=500)
+    return len(rollups)
+
+
+def rollups_for_date(report_date):
+    """获取某一日期全部模块的汇总，返回 {模块: 汇总行}"""
+    DailyKpiRollup = apps.get_model('portal', 'DailyKpiRollup')
+    return {
+        rollup.module: rollup
+        for rollup in DailyKpiRollup.objects.filter(report_date=report_date)
+    }
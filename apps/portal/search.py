@@ -0,0 +1,262 @@
+"""
+报表全文搜索
+
+九类子报表的异常说明，以及配送现场情况、揽收情况、质量改进措施，写入 SQLite FTS5
+虚拟表 portal_search_index，每个（记录, 字段）一行，只收录已发布日报下的记录。
+子报表与日报保存、删除时由信号同步（见 signals.py），批量导入后按日报重建。
+
+中文分词：unicode61 分词器把连续的汉字当作一个词，无法按词语检索。写入与查询时都在
+每个汉字两侧加空格，索引按单字建立，查询词转为短语查询（"积 压"），匹配相邻的字，
+任意长度的中文查询都能使用索引。原文另存一列，高亮片段在 Python 中从原文生成。
+
+rowid 由 (记录id, 来源序号, 字段序号) 编码，更新、删除某条记录时按 rowid 定位，
+不需要扫描 UNINDEXED 列。
+"""
+import re
+from collections import namedtuple
+
+from django.apps import apps
+from django.db import connections, router, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TABLE = 'portal_search_index'
+
+CREATE_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+    body,
+    source UNINDEXED,
+    object_id UNINDEXED,
+    daily_report_id UNINDEXED,
+    report_date UNINDEXED,
+    field UNINDEXED,
+    item UNINDEXED,
+    content UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+SearchSource = namedtuple('SearchSource', 'model_name module permission fields item')
+
+# 顺序参与 rowid 编码，只能在末尾追加
+SEARCH_SOURCES = (
+    SearchSource('DeliveryReport', '配送管理', 'delivery.read',
+                 ('exception_notes', 'site_situation'), lambda obj: f'{obj.city}配送'),
+    SearchSource('WarehouseReport', '仓内管理', 'warehouse.read',
+                 ('exception_notes',), lambda obj: obj.contractor_company),
+    SearchSource('PickupReport', '揽收管理', 'pickup.read',
+                 ('exception_notes', 'pickup_situation'), lambda obj: obj.pickup_area),
+    SearchSource('LinehaulReport', '干线管理', 'linehaul.read',
+                 ('exception_notes',), lambda obj: obj.supplier),
+    SearchSource('ChangeOrderChannel', '换单管理', 'change_order.read',
+                 ('exception_notes',), lambda obj: obj.channel_name),
+    SearchSource('SortingMachineReport', '分拣机管理', 'sorting_machine.read',
+                 ('exception_notes',), lambda obj: obj.machine_name),
+    SearchSource('EquipmentReport', '设备维护', 'equipment.read',
+                 ('exception_notes',), lambda obj: obj.equipment_name),
+    SearchSource('QualityReport', '质量监控', 'quality.read',
+                 ('exception_notes', 'improvement_measures'), lambda obj: obj.quality_type),
+    SearchSource('CostReport', '成本分析', 'cost.read',
+                 ('exception_notes',), lambda obj: obj.cost_category),
+)
+
+SOURCE_INDEX = {source.model_name: index for index, source in enumerate(SEARCH_SOURCES)}
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+SNIPPET_LENGTH = 80
+
+# 汉字、假名、谚文：每个字单独成词
+_CJK = re.compile(r'([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff])')
+_WORD = re.compile(r'\w')
+
+
+def tokenize(text):
+    """在每个汉字两侧加空格，使 unicode61 分词器按单字建立索引"""
+    return _CJK.sub(r' \1 ', text)
+
+
+def search_terms(query):
+    """按空白切分查询，去掉不含文字的部分"""
+    return [term for term in query.split() if _WORD.search(term)]
+
+
+def match_expression(terms):
+    """每个查询词转为带前缀匹配的短语，多个词同时满足"""
+    return ' AND '.join('"{}"*'.format(tokenize(term).replace('"', '""')) for term in terms)
+
+
+def _rowid(object_id, source_index, field_index):
+    return object_id * 64 + source_index * 4 + field_index
+
+
+def _connection(model, write=False):
+    alias = router.db_for_write(model) if write else router.db_for_read(model)
+    return connections[alias]
+
+
+def is_available(connection):
+    return connection.vendor == 'sqlite'
+
+
+def _rows(source_index, obj):
+    """一条子报表记录的索引行，空字段不写入"""
+    source = SEARCH_SOURCES[source_index]
+    item = source.item(obj)
+    for field_index, field in enumerate(source.fields):
+        text = getattr(obj, field) or ''
+        if text.strip():
+            yield (
+                _rowid(obj.pk, source_index, field_index), tokenize(text), source.model_name, obj.pk,
+                obj.daily_report_id, obj.report_date.isoformat() if obj.report_date else '', field, item, text,
+            )
+
+
+def _write(cursor, rowids, rows):
+    if rowids:
+        placeholders = ', '.join(['%s'] * len(rowids))
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})', rowids)
+    if rows:
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, body, source, object_id, daily_report_id, report_date, field, item, content) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def _object_rowids(source_index, object_id):
+    return [_rowid(object_id, source_index, field_index)
+            for field_index in range(len(SEARCH_SOURCES[source_index].fields))]
+
+
+def index_object(obj, published=None, using=None):
+    """写入或更新一条子报表记录；所属日报未发布时只删除"""
+    source_index = SOURCE_INDEX[type(obj).__name__]
+    connection = connections[using] if using else _connection(type(obj), write=True)
+    if not is_available(connection):
+        return
+    if published is None:
+        published = obj.daily_report.is_published
+    rows = list(_rows(source_index, obj)) if published else []
+    with connection.cursor() as cursor:
+        _write(cursor, _object_rowids(source_index, obj.pk), rows)
+
+
+def remove_object(obj, using=None):
+    """删除一条子报表记录的索引行"""
+    source_index = SOURCE_INDEX[type(obj).__name__]
+    connection = connections[using] if using else _connection(type(obj), write=True)
+    if not is_available(connection):
+        return
+    with connection.cursor() as cursor:
+        _write(cursor, _object_rowids(source_index, obj.pk), [])
+
+
+def index_daily_report(daily_report, using=None):
+    """重建一份日报下全部子报表的索引行（发布状态变化、批量导入后调用）"""
+    connection = connections[using] if using else _connection(type(daily_report), write=True)
+    if not is_available(connection):
+        return
+    rowids, rows = [], []
+    for source_index, source in enumerate(SEARCH_SOURCES):
+        model = apps.get_model('portal', source.model_name)
+        for obj in model.objects.using(connection.alias).filter(daily_report_id=daily_report.pk):
+            rowids.extend(_object_rowids(source_index, obj.pk))
+            if daily_report.is_published:
+                rows.extend(_rows(source_index, obj))
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        _write(cursor, rowids, rows)
+
+
+def rebuild_search_index(using='default', batch_size=2000):
+    """清空并重建全文索引（表不存在时先建表），返回写入的行数"""
+    connection = connections[using]
+    if not is_available(connection):
+        return 0
+    count = 0
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        cursor.execute(f'DELETE FROM {TABLE}')
+        for source_index, source in enumerate(SEARCH_SOURCES):
+            model = apps.get_model('portal', source.model_name)
+            queryset = model.objects.using(using).filter(daily_report__is_published=True).order_by('pk')
+            rows = []
+            for obj in queryset.iterator(chunk_size=batch_size):
+                rows.extend(_rows(source_index, obj))
+                if len(rows) >= batch_size:
+                    _write(cursor, [], rows)
+                    count += len(rows)
+                    rows = []
+            _write(cursor, [], rows)
+            count += len(rows)
+    return count
+
+
+def highlight(text, terms, length=SNIPPET_LENGTH):
+    """截取原文中第一个命中位置附近的片段，命中部分用 <mark> 标出（已转义）"""
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.I)
+    first = pattern.search(text)
+    start = max(0, (first.start() if first else 0) - length // 4)
+    end = min(len(text), start + length)
+    fragment = text[start:end]
+
+    parts, position = [], 0
+    for match in pattern.finditer(fragment):
+        parts.append(escape(fragment[position:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(escape(fragment[position:]))
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if end < len(text) else ''
+    return mark_safe(prefix + ''.join(parts) + suffix)
+
+
+def search(query, sources=None, start_date=None, end_date=None, limit=DEFAULT_LIMIT, offset=0):
+    """
+    按相关度（bm25）搜索，返回 (命中列表, 是否还有更多)
+
+    sources 为允许的模型名列表（按用户权限过滤），None 表示全部。
+    每条命中包含 module、item、field、report_date、daily_report_id、snippet。
+    """
+    terms = search_terms(query)
+    if not terms or sources == []:
+        return [], False
+    DeliveryReport = apps.get_model('portal', 'DeliveryReport')
+    connection = _connection(DeliveryReport)
+    if not is_available(connection):
+        return [], False
+
+    limit = max(1, min(limit, MAX_LIMIT))
+    conditions, params = [f'{TABLE} MATCH %s'], [match_expression(terms)]
+    if sources is not None:
+        conditions.append(f"source IN ({', '.join(['%s'] * len(sources))})")
+        params.extend(sources)
+    if start_date:
+        conditions.append('report_date >= %s')
+        params.append(start_date.isoformat())
+    if end_date:
+        conditions.append('report_date <= %s')
+        params.append(end_date.isoformat())
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT source, object_id, daily_report_id, report_date, field, item, content FROM {TABLE} '
+            f'WHERE {" AND ".join(conditions)} ORDER BY rank LIMIT %s OFFSET %s',
+            params + [limit + 1, offset],
+        )
+        rows = cursor.fetchall()
+
+    hits = []
+    for source, object_id, daily_report_id, report_date, field, item, content in rows[:limit]:
+        model = apps.get_model('portal', source)
+        hits.append({
+            'module': SEARCH_SOURCES[SOURCE_INDEX[source]].module,
+            'item': item,
+            'field': str(model._meta.get_field(field).verbose_name),
+            'report_date': report_date,
+            'daily_report_id': daily_report_id,
+            'object_id': object_id,
+            'snippet': highlight(content, terms),
+        })
+    return hits, len(rows) > limit
@@ -0,0 +1,104 @@
+"""
+门户信号处理
+
+日报及各子报表变更时使模块页面缓存失效，同步全文搜索索引，并记录分析快照的变更；
+日报发布或配送报表变更后在事务提交时检测配送指标异常；公告变更时使进程内的有效公告列表失效。
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .analytics import SNAPSHOT_TABLES, record_change
+from .anomalies import schedule_detection
+from .announcement_feed import invalidate_announcement_feed
+from .models import (
+    Announcement, DailyReport, DeliveryReport, WarehouseReport, ExchangeOrderReport, PickupReport,
+    AirTransportReport, LinehaulReport, ChangeOrderChannel, SortingMachineReport,
+    EquipmentReport, QualityReport, CostReport
+)
+from .search import SEARCH_SOURCES, index_daily_report, index_object, remove_object
+from .view_cache import invalidate_view_cache
+
+REPORT_MODELS = (
+    DailyReport, DeliveryReport, WarehouseReport, ExchangeOrderReport, PickupReport,
+    AirTransportReport, LinehaulReport, ChangeOrderChannel, SortingMachineReport,
+    EquipmentReport, QualityReport, CostReport,
+)
+
+
+def invalidate_report_views(sender, using, **kwargs):
+    """
+    日报或子报表保存、删除后清除模块页面缓存
+
+    提交后才递增缓存代数：否则并发请求可能在提交前用旧数据重建上下文，并缓存在新代数下。
+    """
+    transaction.on_commit(invalidate_view_cache, using=using)
+
+
+for model in REPORT_MODELS:
+    post_save.connect(invalidate_report_views, sender=model, dispatch_uid=f'view_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_report_views, sender=model, dispatch_uid=f'view_cache_delete_{model.__name__}')
+
+
+def index_report_text(sender, instance, using, raw=False, **kwargs):
+    """子报表保存后更新其全文索引行（loaddata 时跳过，之后用 rebuild_search_index 重建）"""
+    if not raw:
+        index_object(instance, using=using)
+
+
+def remove_report_text(sender, instance, using, **kwargs):
+    """子报表删除后删除其全文索引行"""
+    remove_object(instance, using=using)
+
+
+def reindex_daily_report(sender, instance, using, created=False, raw=False, update_fields=None, **kwargs):
+    """日报发布状态可能变化时重建其下全部子报表的索引行；新建的日报还没有子报表"""
+    if raw or created or (update_fields is not None and 'is_published' not in update_fields):
+        return
+    index_daily_report(instance, using=using)
+
+
+SEARCH_MODELS = tuple(
+    model for model in REPORT_MODELS if model.__name__ in {source.model_name for source in SEARCH_SOURCES}
+)
+
+post_save.connect(reindex_daily_report, sender=DailyReport, dispatch_uid='search_index_daily_report')
+for model in SEARCH_MODELS:
+    post_save.connect(index_report_text, sender=model, dispatch_uid=f'search_index_save_{model.__name__}')
+    post_delete.connect(remove_report_text, sender=model, dispatch_uid=f'search_index_delete_{model.__name__}')
+
+
+def record_analytics_change(sender, instance, using, raw=False, **kwargs):
+    """
+    日报或快照中的子报表变更后，让分析快照重新加载该日报的行
+
+    提交后才记录：否则其他进程可能在提交前按新序号读到旧行，并把该序号记为已应用。
+    """
+    if not raw:
+        daily_report_id = instance.pk if sender is DailyReport else instance.daily_report_id
+        transaction.on_commit(lambda: record_change(daily_report_id), using=using)
+
+
+for model in (DailyReport, *(spec.model for spec in SNAPSHOT_TABLES.values())):
+    post_save.connect(record_analytics_change, sender=model, dispatch_uid=f'analytics_save_{model.__name__}')
+    post_delete.connect(record_analytics_change, sender=model, dispatch_uid=f'analytics_delete_{model.__name__}')
+
+
+def detect_delivery_anomalies(sender, instance, using, raw=False, **kwargs):
+    """日报或配送报表变更后，提交时重新检测该日报的配送指标异常（未发布的日报清除异常记录）"""
+    if not raw:
+        schedule_detection(instance.pk if sender is DailyReport else instance.daily_report_id, using=using)
+
+
+# 须在 record_analytics_change 之后连接，检测时快照已能看到本次变更
+post_save.connect(detect_delivery_anomalies, sender=DailyReport, dispatch_uid='anomalies_daily_report')
+post_save.connect(detect_delivery_anomalies, sender=DeliveryReport, dispatch_uid='anomalies_save_delivery')
+post_delete.connect(detect_delivery_anomalies, sender=DeliveryReport, dispatch_uid='anomalies_delete_delivery')
+
+
+def invalidate_announcements(sender, **kwargs):
+    """公告保存、删除后重新加载有效公告列表"""
+    invalidate_announcement_feed()
+
+
+post_save.connect(invalidate_announcements, sender=Announcement, dispatch_uid='announcement_feed_save')
+post_delete.connect(invalidate_announcements, sender=Announcement, dispatch_uid='announcement_feed_delete')
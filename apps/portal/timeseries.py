@@ -0,0 +1,104 @@
+"""
+时间序列查询
+
+基于每日KPI汇总表（DailyKpiRollup），按日/周/月一条分组查询同时计算多个指标，
+返回按列组织的数组，供图表使用。
+"""
+import hashlib
+
+from django.db.models import Count, F, FloatField, Max, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import DailyKpiRollup
+from .rollup import COMMON_AGGREGATES, ROLLUP_SPECS
+
+
+GRANULARITIES = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+class TimeseriesError(ValueError):
+    """时间序列参数错误"""
+
+
+def available_metrics(module):
+    """某模块可查询的指标列表"""
+    if module not in ROLLUP_SPECS:
+        raise TimeseriesError(f'未知模块: {module}')
+    return list(COMMON_AGGREGATES) + list(ROLLUP_SPECS[module][1])
+
+
+def _rollups(module, start_date, end_date):
+    return DailyKpiRollup.objects.filter(
+        module=module,
+        daily_report__is_published=True,
+        report_date__range=[start_date, end_date],
+    )
+
+
+def timeseries(module, metrics, start_date, end_date, granularity='day'):
+    """
+    计算时间序列
+
+    平均值类指标（avg_*）按记录数加权后再跨日聚合，其余指标直接求和。
+    返回 {'labels': [...], 'series': {指标: [...]}}。
+    """
+    if granularity not in GRANULARITIES:
+        raise TimeseriesError(f'未知粒度: {granularity}')
+    allowed = available_metrics(module)
+    unknown = [metric for metric in metrics if metric not in allowed]
+    if unknown:
+        raise TimeseriesError(f'未知指标: {", ".join(unknown)}')
+
+    # 聚合别名加前缀，避免与字段同名时后面的 F('record_count') 等引用到已添加的聚合
+    aggregates = {'_weight': Sum('record_count')}
+    for metric in metrics:
+        if metric.startswith('avg_'):
+            aggregates[f'_{metric}'] = Sum(F(metric) * F('record_count'), output_field=FloatField())
+        else:
+            aggregates[f'_{metric}'] = Sum(metric)
+
+    trunc = GRANULARITIES[granularity]
+    queryset = _rollups(module, start_date, end_date).order_by()
+    if trunc:
+        queryset = queryset.annotate(bucket=trunc('report_date'))
+    else:
+        queryset = queryset.annotate(bucket=F('report_date'))
+    rows = queryset.values('bucket').annotate(**aggregates).order_by('bucket')
+
+    result = {'labels': [], 'series': {metric: [] for metric in metrics}}
+    for row in rows:
+        result['labels'].append(row['bucket'].isoformat())
+        weight = row['_weight'] or 0
+        for metric in metrics:
+            value = row[f'_{metric}'] or 0
+            if metric.startswith('avg_'):
+                value = round(value / weight, 2) if weight else 0
+            elif not isinstance(value, int):
+                value = float(value)
+            result['series'][metric].append(value)
+    return result
+
+
+def timeseries_fingerprint(module, metrics, start_date, end_date, granularity='day'):
+    """
+    计算时间序列的版本信息，用于 ETag / Last-Modified
+
+    汇总行或日报的任何变更（含发布状态变化、行删除）都会改变返回值。
+    返回 (etag, last_modified)。
+    """
+    state = _rollups(module, start_date, end_date).aggregate(
+        count=Count('id'),
+        rollup_updated=Max('updated_at'),
+        report_updated=Max('daily_report__updated_at'),
+    )
+    timestamps = [ts for ts in (state['rollup_updated'], state['report_updated']) if ts]
+    last_modified = max(timestamps) if timestamps else None
+    digest = hashlib.md5(
+        f"{module}|{','.join(metrics)}|{granularity}|{start_date}|{end_date}|{state['count']}|"
+        f"{state['rollup_updated']}|{state['report_updated']}".encode()
+    ).hexdigest()
+    return digest, last_modified
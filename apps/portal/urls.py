@@ -9,6 +9,7 @@ urlpatterns = [
     path('announcements/', views.announcements_view, name='announcements'),
     path('announcements/<int:pk>/', views.announcement_detail_view, name='announcement_detail'),
     path('documents/', views.documents_view, name='documents'),
+    path('documents/<int:pk>/download/', views.document_download_view, name='document_download'),
     path('departments/', views.departments_view, name='departments'),
     
     # LAX日报相关页面
@@ -35,6 +36,22 @@ urlpatterns = [
     # 成本管理模块
     path('cost-analysis/', views.cost_analysis_module_view, name='cost_analysis_module'),
     
+    # 报表导出
+    path('export/<str:report_type>/', views.report_export_view, name='report_export'),
+    
+    # 趋势分析
+    path('trends/', views.trends_view, name='trends'),
+    
+    # 全文搜索
+    path('search/', views.search_view, name='search'),
+    
     # API接口
     path('api/dashboard/', views.dashboard_api_view, name='dashboard_api'),
+    path('api/exceptions/', views.exception_feed_api_view, name='exception_feed_api'),
+    path('api/timeseries/', views.timeseries_api_view, name='timeseries_api'),
+    path('api/daily-reports/<int:pk>/', views.daily_report_json_view, name='daily_report_json'),
+    path('api/metrics/', views.metrics_api_view, name='metrics_api'),
+    path('api/search/', views.search_api_view, name='search_api'),
+    path('api/trends/', views.trends_api_view, name='trends_api'),
+    path('api/delivery-anomalies/', views.delivery_anomalies_api_view, name='delivery_anomalies_api'),
 ]
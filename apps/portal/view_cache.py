@@ -0,0 +1,89 @@
+"""
+模块页面缓存
+
+缓存模块视图计算出的模板上下文（而不是渲染后的HTML，页面中含有当前用户信息），
+缓存键由 (视图, 所选日期, 所选城市, 用户权限集合) 组成。日报或任一子报表变更时
+通过信号递增缓存代数，使全部旧条目失效。
+"""
+import hashlib
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.rbac.permissions import permission_fingerprint
+
+CACHE_ALIAS = 'portal_views'
+GENERATION_KEY = 'portal_views:generation'
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def current_generation():
+    """当前缓存代数，不存在时初始化为1"""
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def invalidate_view_cache():
+    """递增缓存代数，使所有已缓存的页面上下文失效"""
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, timeout=None)
+
+
+def view_cache_key(request, view_name):
+    """生成缓存键：视图、日期、城市、权限集合；包含当天日期，跨天后默认日期随之变化"""
+    raw = '|'.join([
+        view_name,
+        date.today().isoformat(),
+        request.GET.get('date', ''),
+        request.GET.get('city', ''),
+        permission_fingerprint(request.user),
+    ])
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'portal_views:{current_generation()}:{view_name}:{digest}'
+
+
+def cached_view_context(request, view_name, build_context):
+    """
+    获取（或计算并缓存）某个视图的模板上下文
+
+    命中时不访问数据库；PORTAL_VIEW_CACHE_ENABLED 为 False 时直接计算。
+    """
+    if not getattr(settings, 'PORTAL_VIEW_CACHE_ENABLED', True):
+        return build_context(request)
+
+    cache = get_cache()
+    key = view_cache_key(request, view_name)
+    context = cache.get(key)
+    if context is None:
+        context = build_context(request)
+        cache.set(key, context)
+    return context
+
+
+def cached_value(name, build):
+    """
+    获取（或计算并缓存）与请求参数无关的数据，随缓存代数一起失效
+
+    PORTAL_VIEW_CACHE_ENABLED 为 False 时直接计算。
+    """
+    if not getattr(settings, 'PORTAL_VIEW_CACHE_ENABLED', True):
+        return build()
+
+    cache = get_cache()
+    key = f'portal_views:{current_generation()}:value:{name}'
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value)
+    return value
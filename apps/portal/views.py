@@ -1,57 +1,92 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Sum, Avg, Count
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+from asgiref.sync import sync_to_async
 from datetime import datetime, date, timedelta
-import random
 from .models import (
     Announcement, Document, Department,
-    DailyReport, DeliveryReport, WarehouseReport, 
-    PickupReport, AirTransportReport, LinehaulReport, ChangeOrderChannel
+    DailyReport, DeliveryReport, DeliveryAnomaly, WarehouseReport, ExchangeOrderReport,
+    PickupReport, AirTransportReport, LinehaulReport, ChangeOrderChannel,
+    SortingMachineReport, EquipmentReport, QualityReport, CostReport
 )
+from . import analytics
+from .announcement_feed import active_announcements, announcement_feed
+from .downloads import can_download, document_response
+from .aggregation import (
+    published_reports, delivery_city_stats, delivery_daily_stats,
+    warehouse_company_stats, warehouse_totals
+)
+from .export import EXPORT_FORMATS, export_filename, export_permission, export_stream
+from .importer import REPORT_TYPES
+from .exception_feed import aexception_page, exception_page, DEFAULT_PAGE_SIZE
+from .pagination import CursorPaginator, InvalidCursor
+from .report_detail import load_report, report_payload, report_sections
+from .search import SEARCH_SOURCES, DEFAULT_LIMIT as SEARCH_PAGE_SIZE, search
+from .rollup import rollups_for_date
+from .timeseries import timeseries, timeseries_fingerprint, available_metrics
+from .view_cache import cached_view_context
+from apps.core.concurrency import gather_queries
+from apps.core.metrics import route_metrics
+from apps.core.routers import reporting_reads
+from apps.rbac.decorators import enforce_permission, require_permission
+from apps.rbac.permissions import has_permission
 
-@login_required(login_url='/login/')
-def dashboard_view(request):
-    """仪表板视图"""
-    announcements = Announcement.objects.filter(is_published=True)[:5]
-    documents = Document.objects.filter(is_public=True)[:5]
-    departments = Department.objects.all()[:5]
-    
-    # 获取最新的日报数据
+
+def _dashboard_stats():
+    """最新已发布日报的关键指标（读取每日KPI汇总表）"""
     latest_report = DailyReport.objects.filter(is_published=True).first()
-    
-    # 计算关键指标
-    dashboard_stats = {}
-    if latest_report:
-        # 配送统计
-        delivery_stats = DeliveryReport.objects.filter(daily_report=latest_report).aggregate(
-            total_cargo=Sum('cargo_volume'),
-            total_boxes=Sum('box_count'),
-            avg_removal_rate=Avg('removal_rate'),
-            total_removed=Sum('removed_packages')
-        )
-        
-        # 仓内统计
-        warehouse_stats = WarehouseReport.objects.filter(daily_report=latest_report).aggregate(
-            total_attendance=Sum('attendance_count'),
-            total_hours=Sum('actual_hours'),
-            total_cost=Sum('yesterday_cost')
-        )
-        
-        # 换单统计
-        change_order_stats = ChangeOrderChannel.objects.filter(daily_report=latest_report).aggregate(
-            total_change_orders=Sum('change_order_count')
-        )
-        
-        dashboard_stats = {
-            'latest_report': latest_report,
-            'delivery_stats': delivery_stats,
-            'warehouse_stats': warehouse_stats,
-            'change_order_stats': change_order_stats,
-        }
-    
+    if not latest_report:
+        return {}
+
+    rollups = rollups_for_date(latest_report.report_date)
+    delivery = rollups.get('delivery')
+    warehouse = rollups.get('warehouse')
+    change_order = rollups.get('change_order')
+
+    # 配送统计
+    delivery_stats = {
+        'total_cargo': delivery.cargo_volume if delivery else None,
+        'total_boxes': delivery.box_count if delivery else None,
+        'avg_removal_rate': delivery.avg_removal_rate if delivery else None,
+        'total_removed': delivery.removed_packages if delivery else None,
+    }
+
+    # 仓内统计
+    warehouse_stats = {
+        'total_attendance': warehouse.attendance_count if warehouse else None,
+        'total_hours': warehouse.actual_hours if warehouse else None,
+        'total_cost': warehouse.total_cost if warehouse else None,
+    }
+
+    # 换单统计
+    change_order_stats = {
+        'total_change_orders': change_order.change_order_count if change_order else None,
+    }
+
+    return {
+        'latest_report': latest_report,
+        'delivery_stats': delivery_stats,
+        'warehouse_stats': warehouse_stats,
+        'change_order_stats': change_order_stats,
+    }
+
+
+@require_permission(login_url='/login/')
+async def dashboard_view(request):
+    """仪表板视图 - 公告、文档、部门与关键指标相互独立，并发读取"""
+    announcements, documents, departments, dashboard_stats = await gather_queries(
+        lambda: announcement_feed.get(5),
+        lambda: list(Document.objects.filter(is_public=True)[:5]),
+        lambda: list(Department.objects.select_related('manager')[:5]),
+        _dashboard_stats,
+    )
+
     context = {
         'announcements': announcements,
         'documents': documents,
@@ -59,18 +94,29 @@ def dashboard_view(request):
         'user': request.user,
         'dashboard_stats': dashboard_stats,
     }
-    return render(request, 'portal/dashboard.html', context)
+    return await sync_to_async(render)(request, 'portal/dashboard.html', context)
+
+
+def _cursor_page(request, queryset, ordering):
+    """按请求中的游标取一页（附带近似总数），游标无效时回到第一页"""
+    paginator = CursorPaginator(queryset, ordering)
+    try:
+        return paginator.page(request.GET.get('cursor') or None, with_total=True)
+    except InvalidCursor:
+        return paginator.page(with_total=True)
+
 
 @login_required
 def announcements_view(request):
-    """公告列表视图"""
-    announcements = Announcement.objects.filter(is_published=True)
-    paginator = Paginator(announcements, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    """公告列表视图 - 当前有效公告，按 (优先级, 创建时间) 游标分页"""
+    # 时间窗口按分钟判断：一分钟内查询语句不变，近似总数的缓存才能命中
+    now = timezone.now().replace(second=0, microsecond=0)
+    announcements = active_announcements(now).select_related('author')
+    page_obj = _cursor_page(request, announcements, ('-priority', '-created_at', '-id'))
     
     context = {
         'page_obj': page_obj,
+        'announcements': page_obj,
     }
     return render(request, 'portal/announcements.html', context)
 
@@ -78,7 +124,7 @@ def announcements_view(request):
 def announcement_detail_view(request, pk):
     """公告详情视图"""
     try:
-        announcement = Announcement.objects.get(pk=pk, is_published=True)
+        announcement = active_announcements().select_related('author').get(pk=pk)
     except Announcement.DoesNotExist:
         messages.error(request, '公告不存在或已被删除。')
         return redirect('portal:announcements')
@@ -90,21 +136,29 @@ def announcement_detail_view(request, pk):
 
 @login_required
 def documents_view(request):
-    """文档列表视图"""
-    documents = Document.objects.filter(is_public=True)
-    paginator = Paginator(documents, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    """文档列表视图 - 按创建时间游标分页"""
+    documents = Document.objects.filter(is_public=True).select_related('uploaded_by')
+    page_obj = _cursor_page(request, documents, ('-created_at', '-id'))
     
     context = {
         'page_obj': page_obj,
+        'documents': page_obj,
     }
     return render(request, 'portal/documents.html', context)
 
+@login_required
+@require_safe
+def document_download_view(request, pk):
+    """文档下载 - 检查权限后流式发送文件，支持断点续传与条件请求"""
+    document = get_object_or_404(Document, pk=pk)
+    if not can_download(request.user, document):
+        raise Http404('文档不存在')
+    return document_response(request, document)
+
 @login_required
 def departments_view(request):
-    """部门列表视图"""
-    departments = Department.objects.all()
+    """部门列表视图 - 一条查询加载完整部门树及部门经理"""
+    departments = Department.tree()
     
     context = {
         'departments': departments,
@@ -114,13 +168,11 @@ def departments_view(request):
 
 # ==================== LAX日报相关视图 ====================
 
-@login_required
+@require_permission('daily_report.read')
 def daily_reports_view(request):
-    """日报列表视图"""
-    reports = DailyReport.objects.filter(is_published=True)
-    paginator = Paginator(reports, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    """日报列表视图 - 按报告日期游标分页（report_date 唯一，无需 id 兜底）"""
+    reports = DailyReport.objects.filter(is_published=True).select_related('reporter')
+    page_obj = _cursor_page(request, reports, ('-report_date',))
     
     context = {
         'page_obj': page_obj,
@@ -128,34 +180,50 @@ def daily_reports_view(request):
     return render(request, 'portal/daily_reports.html', context)
 
 
-@login_required
+@require_permission('daily_report.read')
 def daily_report_detail_view(request, pk):
-    """日报详情视图"""
-    report = get_object_or_404(DailyReport, pk=pk, is_published=True)
-    
-    # 获取各模块数据
-    delivery_reports = DeliveryReport.objects.filter(daily_report=report)
-    warehouse_reports = WarehouseReport.objects.filter(daily_report=report)
-    pickup_reports = PickupReport.objects.filter(daily_report=report)
-    air_transport_reports = AirTransportReport.objects.filter(daily_report=report)
-    linehaul_reports = LinehaulReport.objects.filter(daily_report=report)
-    change_order_channels = ChangeOrderChannel.objects.filter(daily_report=report)
+    """日报详情视图 - 预取全部子报表，查询次数固定"""
+    report = load_report(pk)
+    sections = report_sections(report)
     
     context = {
         'report': report,
-        'delivery_reports': delivery_reports,
-        'warehouse_reports': warehouse_reports,
-        'pickup_reports': pickup_reports,
-        'air_transport_reports': air_transport_reports,
-        'linehaul_reports': linehaul_reports,
-        'change_order_channels': change_order_channels,
+        'sections': sections,
+        'summaries': {name: section['summary'] for name, section in sections.items()},
     }
+    # 兼容原模板变量名
+    context.update({name: section['rows'] for name, section in sections.items()})
     return render(request, 'portal/daily_report_detail.html', context)
 
 
+@require_permission('daily_report.read')
+@reporting_reads
+def daily_report_json_view(request, pk):
+    """日报详情API - 完整日报（各分区明细与汇总）的JSON表示，带缓存"""
+    return JsonResponse(report_payload(pk))
+
+
 @login_required
+def metrics_api_view(request):
+    """性能指标API - 当前进程内各路由的耗时百分位与平均SQL次数，仅管理员可见"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': '无权访问'}, status=403)
+    return JsonResponse({
+        'slow_request_threshold_ms': settings.SLOW_REQUEST_THRESHOLD_MS,
+        'routes': route_metrics.snapshot(),
+    })
+
+
+@require_permission('delivery.read')
+@reporting_reads
 def delivery_module_view(request):
     """配送管理模块视图"""
+    context = cached_view_context(request, 'delivery_module', _delivery_module_context)
+    return render(request, 'portal/delivery_module.html', context)
+
+
+def _delivery_module_context(request):
+    """计算配送管理模块的模板上下文"""
     # 获取城市参数
     selected_city = request.GET.get('city', '')
     # 获取日期参数，默认为今天
@@ -174,228 +242,28 @@ def delivery_module_view(request):
     end_date = date.today()
     start_date = end_date - timedelta(days=30)
     
-    reports = DailyReport.objects.filter(
-        is_published=True,
-        report_date__range=[start_date, end_date]
-    ).order_by('-report_date')
-    
-    delivery_data = []
-    city_stats = {}
-    daily_stats = {}
-    
-    for report in reports:
-        delivery_reports = DeliveryReport.objects.filter(daily_report=report)
-        daily_total_cargo = 0
-        daily_total_boxes = 0
-        daily_cities = []
-        
-        for dr in delivery_reports:
-            # 添加到详细数据列表
-            delivery_data.append({
-                'report_date': report.report_date,
-                'city': dr.city,
-                'cargo_volume': dr.cargo_volume,
-                'box_count': dr.box_count,
-                'open_time': dr.open_time,
-                'site_situation': dr.site_situation,
-                'delivery_rate_day1': dr.delivery_rate_day1,
-                'delivery_rate_day2': dr.delivery_rate_day2,
-                'delivery_rate_day3': dr.delivery_rate_day3,
-                'removed_packages': dr.removed_packages,
-                'removal_rate': dr.removal_rate,
-                'exception_notes': dr.exception_notes,
-            })
-            
-            # 统计城市数据
-            if dr.city not in city_stats:
-                city_stats[dr.city] = {
-                    'total_cargo': 0,
-                    'total_boxes': 0,
-                    'avg_removal_rate': 0,
-                    'avg_delivery_rate_day1': 0,
-                    'avg_delivery_rate_day2': 0,
-                    'avg_delivery_rate_day3': 0,
-                    'total_removed': 0,
-                    'exception_count': 0,
-                    'report_count': 0
-                }
-            
-            city_stats[dr.city]['total_cargo'] += dr.cargo_volume
-            city_stats[dr.city]['total_boxes'] += dr.box_count
-            city_stats[dr.city]['avg_removal_rate'] += dr.removal_rate
-            city_stats[dr.city]['avg_delivery_rate_day1'] += dr.delivery_rate_day1
-            city_stats[dr.city]['avg_delivery_rate_day2'] += dr.delivery_rate_day2
-            city_stats[dr.city]['avg_delivery_rate_day3'] += dr.delivery_rate_day3
-            city_stats[dr.city]['total_removed'] += dr.removed_packages
-            city_stats[dr.city]['report_count'] += 1
-            
-            if dr.exception_notes:
-                city_stats[dr.city]['exception_count'] += 1
-            
-            daily_total_cargo += dr.cargo_volume
-            daily_total_boxes += dr.box_count
-            daily_cities.append(dr.city)
-        
-        # 统计每日数据
-        if delivery_reports.exists():
-            daily_stats[report.report_date] = {
-                'total_cargo': daily_total_cargo,
-                'total_boxes': daily_total_boxes,
-                'cities': daily_cities,
-                'city_count': len(daily_cities)
-            }
+    # 按 report_date 分组聚合，固定查询次数，不再逐个日报查询
+    daily_stats = delivery_daily_stats(published_reports(DeliveryReport, start_date, end_date))
     
-    # 计算城市平均值
-    for city in city_stats:
-        count = city_stats[city]['report_count']
-        if count > 0:
-            city_stats[city]['avg_removal_rate'] = round(city_stats[city]['avg_removal_rate'] / count, 2)
-            city_stats[city]['avg_delivery_rate_day1'] = round(city_stats[city]['avg_delivery_rate_day1'] / count, 2)
-            city_stats[city]['avg_delivery_rate_day2'] = round(city_stats[city]['avg_delivery_rate_day2'] / count, 2)
-            city_stats[city]['avg_delivery_rate_day3'] = round(city_stats[city]['avg_delivery_rate_day3'] / count, 2)
-    
-    # 创建基于LAX日报的示例数据（用于演示）
-    # 由于数据库中没有真实数据，直接创建示例数据
-    delivery_data = []
-    
-    # LAX日报实际城市数据 - 基于真实运营情况
-    city_data = {
-        'SAN': {
-            'base_cargo': 1741,
-            'base_boxes': 30,
-            'open_time': '05:30',
-            'delivery_range': (78, 96),
-            'removal_range': (15, 25),
-            'removal_rate_range': (1.0, 1.5),
-            'site_situations': ['408 422删除分箱积压', '货少删除分箱', '分箱积压严重'],
-            'typical_issues': ['异常移除线路：407-4件 404-4件', '408和422货少删除分箱', '402和418取货非常慢，催促车队两次']
-        },
-        'LAX': {
-            'base_cargo': 4500,
-            'base_boxes': 750,
-            'open_time': '06:00',
-            'delivery_range': (92, 97),
-            'removal_range': (50, 80),
-            'removal_rate_range': (1.0, 1.8),
-            'site_situations': ['分箱积压', '设备故障', '人员不足'],
-            'typical_issues': ['航班延误', '海关清关延迟', '交通拥堵']
-        },
-        'SFO': {
-            'base_cargo': 3200,
-            'base_boxes': 580,
-            'open_time': '07:00',
-            'delivery_range': (94, 98),
-            'removal_range': (35, 60),
-            'removal_rate_range': (1.0, 1.9),
-            'site_situations': ['雾天影响', '设备故障', '人员不足'],
-            'typical_issues': ['雾天影响', '设备故障', '人员不足']
-        },
-        'SEA': {
-            'base_cargo': 2800,
-            'base_boxes': 520,
-            'open_time': '07:30',
-            'delivery_range': (93, 97),
-            'removal_range': (30, 55),
-            'removal_rate_range': (1.0, 2.0),
-            'site_situations': ['雨天影响', '道路施工', '分拣延迟'],
-            'typical_issues': ['雨天影响', '道路施工', '分拣延迟']
-        }
-    }
-    
-    sample_dates = [(end_date - timedelta(days=i)) for i in range(7)]
-    
-    for report_date in sample_dates:
-        for city_code, city_info in city_data.items():
-            # 基于城市特点生成数据
-            cargo_variation = random.uniform(0.85, 1.15)
-            box_variation = random.uniform(0.9, 1.1)
-            
-            cargo_volume = int(city_info['base_cargo'] * cargo_variation)
-            box_count = int(city_info['base_boxes'] * box_variation)
-            
-            # 现场情况
-            site_situation = random.choice(city_info['site_situations'])
-            
-            # 配送率基于城市特点（3天递进）
-            delivery_base = random.uniform(*city_info['delivery_range'])
-            delivery_rate_day1 = round(delivery_base - random.uniform(0, 3), 2)
-            delivery_rate_day2 = round(delivery_base + random.uniform(0, 2), 2)
-            delivery_rate_day3 = round(delivery_base + random.uniform(2, 5), 2)
-            
-            # 包裹移除数据
-            removed_packages = random.randint(*city_info['removal_range'])
-            removal_rate = round(random.uniform(*city_info['removal_rate_range']), 2)
-            
-            # 异常情况
-            has_exception = random.random() < 0.15  # 15%概率有异常
-            exception_notes = '无异常'
-            if has_exception:
-                exception_notes = random.choice(city_info['typical_issues'])
-            
-            delivery_data.append({
-                'report_date': report_date,
-                'city': city_code,
-                'cargo_volume': cargo_volume,
-                'box_count': box_count,
-                'open_time': city_info['open_time'],
-                'site_situation': site_situation,
-                'delivery_rate_day1': delivery_rate_day1,
-                'delivery_rate_day2': delivery_rate_day2,
-                'delivery_rate_day3': delivery_rate_day3,
-                'removed_packages': removed_packages,
-                'removal_rate': removal_rate,
-                'exception_notes': exception_notes,
-            })
-    
-    # 如果选择了特定城市，筛选数据
+    # 明细与城市统计按所选日期、城市过滤
+    selected_reports = published_reports(DeliveryReport, selected_date)
     if selected_city:
-        delivery_data = [data for data in delivery_data if data['city'] == selected_city]
+        selected_reports = selected_reports.filter(city=selected_city)
     
-    # 如果选择了特定日期，筛选数据
-    if selected_date:
-        delivery_data = [data for data in delivery_data if data['report_date'] == selected_date]
+    delivery_data = list(selected_reports.order_by('city').values(
+        'report_date', 'city', 'cargo_volume', 'box_count', 'open_time',
+        'site_situation', 'delivery_rate_day1', 'delivery_rate_day2',
+        'delivery_rate_day3', 'removed_packages', 'removal_rate', 'exception_notes',
+    ))
+    city_stats = delivery_city_stats(selected_reports)
     
-    # 重新计算城市统计数据
-    city_stats = {}
-    for data in delivery_data:
-        city = data['city']
-        if city not in city_stats:
-            city_stats[city] = {
-                'total_cargo': 0,
-                'total_boxes': 0,
-                'avg_removal_rate': 0,
-                'avg_delivery_rate_day1': 0,
-                'avg_delivery_rate_day2': 0,
-                'avg_delivery_rate_day3': 0,
-                'total_removed': 0,
-                'exception_count': 0,
-                'report_count': 0
-            }
-        
-        city_stats[city]['total_cargo'] += data['cargo_volume']
-        city_stats[city]['total_boxes'] += data['box_count']
-        city_stats[city]['avg_removal_rate'] += data['removal_rate']
-        city_stats[city]['avg_delivery_rate_day1'] += data['delivery_rate_day1']
-        city_stats[city]['avg_delivery_rate_day2'] += data['delivery_rate_day2']
-        city_stats[city]['avg_delivery_rate_day3'] += data['delivery_rate_day3']
-        city_stats[city]['total_removed'] += data['removed_packages']
-        city_stats[city]['report_count'] += 1
-        
-        if data['exception_notes'] != '无异常':
-            city_stats[city]['exception_count'] += 1
-    
-    # 计算城市平均值
-    for city in city_stats:
-        count = city_stats[city]['report_count']
-        if count > 0:
-            city_stats[city]['avg_removal_rate'] = round(city_stats[city]['avg_removal_rate'] / count, 2)
-            city_stats[city]['avg_delivery_rate_day1'] = round(city_stats[city]['avg_delivery_rate_day1'] / count, 2)
-            city_stats[city]['avg_delivery_rate_day2'] = round(city_stats[city]['avg_delivery_rate_day2'] / count, 2)
-            city_stats[city]['avg_delivery_rate_day3'] = round(city_stats[city]['avg_delivery_rate_day3'] / count, 2)
-        
+    # 日报发布时检测出的配送指标异常（见 anomalies.py）
+    anomalies = DeliveryAnomaly.objects.filter(report_date=selected_date)
+    if selected_city:
+        anomalies = anomalies.filter(city=selected_city)
     
     # 获取所有可用城市列表 - 使用LAX日报中的实际城市（根据Google Sheet内容）
-    all_cities = ['SAN', 'LAX', 'SFO', 'SEA']
+    all_cities = sorted({city for day in daily_stats.values() for city in day['cities']})
     
     # 获取可用日期列表（最近7天）
     available_dates = [(date.today() - timedelta(days=i)) for i in range(7)]
@@ -404,6 +272,7 @@ def delivery_module_view(request):
         'delivery_data': delivery_data,
         'city_stats': city_stats,
         'daily_stats': daily_stats,
+        'anomalies': list(anomalies),
         'date_range': f"{start_date} 至 {end_date}",
         'total_cities': len(city_stats),
         'total_records': len(delivery_data),
@@ -412,12 +281,19 @@ def delivery_module_view(request):
         'available_dates': available_dates,
         'selected_date': selected_date,
     }
-    return render(request, 'portal/delivery_module.html', context)
+    return context
 
 
-@login_required
+@require_permission('warehouse.read')
+@reporting_reads
 def warehouse_module_view(request):
     """仓内管理模块视图"""
+    context = cached_view_context(request, 'warehouse_module', _warehouse_module_context)
+    return render(request, 'portal/warehouse_module.html', context)
+
+
+def _warehouse_module_context(request):
+    """计算仓内管理模块的模板上下文"""
     end_date = date.today()
     selected_date_str = request.GET.get('date')
     if selected_date_str:
@@ -431,140 +307,37 @@ def warehouse_module_view(request):
     # 获取最近7天的日期作为可用日期
     sample_dates = [(end_date - timedelta(days=i)) for i in range(7)]
     
-    warehouse_data = []
-    
-    # 基于LAX日报实际仓内数据
-    contractor_data = {
-        'HR Solution': {
-            'base_attendance': 5,
-            'work_type': 'Regular Sorter',
-            'base_hours': 40,
-            'hourly_rate': 20,  # 每人每小时20元
-            'base_packages': 4500,  # 基础产出包裹数
-            'typical_issues': ['人员不足', '工时超时', '成本控制']
-        },
-        'Ocean': {
-            'base_attendance': 54,
-            'work_type': 'Regular Sorter', 
-            'base_hours': 545,
-            'hourly_rate': 20,  # 每人每小时20元
-            'base_packages': 38000,  # 基础产出包裹数
-            'typical_issues': ['设备故障', '人员调配', '效率提升']
-        }
-    }
-    
-    # 生成示例数据
-    for report_date in sample_dates:
-        for company, company_info in contractor_data.items():
-            # 基于公司特点生成数据
-            attendance_variation = random.uniform(0.9, 1.1)
-            hours_variation = random.uniform(0.95, 1.05)
-            packages_variation = random.uniform(0.9, 1.1)
-            
-            attendance_count = int(company_info['base_attendance'] * attendance_variation)
-            # 出勤人数通常比到岗人数稍高（基于实际数据：HR Solution 5人，Ocean 55人）
-            actual_attendance_count = attendance_count + random.randint(0, 2)
-            actual_hours = int(company_info['base_hours'] * hours_variation)
-            packages_produced = int(company_info['base_packages'] * packages_variation)
-            
-            # 基于实际数据生成分拣数和换单数（而不是成本明细）
-            if company == 'HR Solution':
-                sorting_count = 58341
-                exchange_count = 14211
-                # 单票成本：工时总数 × 20 ÷ (分拣数量 + 换单数量) = 40 × 20 ÷ (58341 + 14211) = 800 ÷ 72552 ≈ 0.0110
-                cost_per_ticket = 0.0110
-            else:  # Ocean
-                sorting_count = 108000
-                exchange_count = 32000
-                # 单票成本：工时总数 × 20 ÷ (分拣数量 + 换单数量) = 545 × 20 ÷ (108000 + 32000) = 10900 ÷ 140000 ≈ 0.0779
-                cost_per_ticket = 0.0779
-            
-            # 异常情况
-            has_exception = random.random() < 0.2  # 20%概率有异常
-            exception_notes = '无异常'
-            if has_exception:
-                exception_notes = random.choice(company_info['typical_issues'])
-            
-            warehouse_data.append({
-                'report_date': report_date,
-                'contractor_company': company,
-                'attendance_count': attendance_count,
-                'actual_attendance_count': actual_attendance_count,
-                'work_type': company_info['work_type'],
-                'actual_hours': actual_hours,
-                'packages_produced': packages_produced,
-                'hourly_rate': company_info['hourly_rate'],
-                'sorting_count': sorting_count,
-                'exchange_count': exchange_count,
-                'cost_per_ticket': cost_per_ticket,
-                'exception_notes': exception_notes,
-            })
+    warehouse_data = list(
+        published_reports(WarehouseReport, sample_dates[-1], end_date)
+        .order_by('-report_date', 'contractor_company')
+        .values(
+            'report_date', 'contractor_company', 'attendance_count', 'actual_attendance_count',
+            'work_type', 'actual_hours', 'packages_produced', 'hourly_rate', 'sorting_count',
+            'exchange_count', 'cost_per_ticket', 'exception_notes',
+        )
+    )
     
-    # 基于实际数据计算统计数据
+    # 选中日期的数据与统计
+    selected_reports = published_reports(WarehouseReport, selected_date)
     today_data = [data for data in warehouse_data if data['report_date'] == selected_date]
-    
-    # 统计数据
-    total_companies = len(today_data)
-    total_attendance = sum(data['attendance_count'] for data in today_data)
-    total_hours = sum(data['actual_hours'] for data in today_data)
-    total_packages = sum(data['packages_produced'] for data in today_data)
-    avg_cost_per_ticket = round(sum(data['cost_per_ticket'] for data in today_data) / len(today_data), 4) if today_data else 0
-    
-    # 总体统计（分拣数量和换单数量总和）
-    total_sorting_count = sum(data['sorting_count'] for data in today_data)
-    total_exchange_count = sum(data['exchange_count'] for data in today_data)
-    total_cost = sum(data['attendance_count'] * data['actual_hours'] * data['hourly_rate'] for data in today_data)
-    
-    # 按公司统计
-    company_stats = {}
-    for data in today_data:
-        company = data['contractor_company']
-        if company not in company_stats:
-            company_stats[company] = {
-                'attendance': 0,
-                'hours': 0,
-                'packages': 0,
-                'sorting_count': 0,
-                'exchange_count': 0,
-                'cost_per_ticket': 0,
-                'work_type': '',
-                'has_exception': False,
-                'has_sorting_data': data['sorting_count'] > 0,  # 是否有分拣数据
-                'has_exchange_data': data['exchange_count'] > 0,  # 是否有换单数据
-            }
-        company_stats[company]['attendance'] += data['attendance_count']
-        company_stats[company]['hours'] += data['actual_hours']
-        company_stats[company]['packages'] += data['packages_produced']
-        company_stats[company]['sorting_count'] += data['sorting_count']
-        company_stats[company]['exchange_count'] += data['exchange_count']
-        company_stats[company]['cost_per_ticket'] = data['cost_per_ticket']
-        company_stats[company]['work_type'] = data['work_type']
-        if data['exception_notes'] and data['exception_notes'] != '无异常':
-            company_stats[company]['has_exception'] = True
+    totals = warehouse_totals(selected_reports)
+    company_stats = warehouse_company_stats(selected_reports)
     
     context = {
         'warehouse_data': warehouse_data,
         'available_dates': sample_dates,
         'selected_date': selected_date,
         'today_data': today_data,
-        'total_companies': total_companies,
-        'total_attendance': total_attendance,
-        'total_hours': total_hours,
-        'total_packages': total_packages,
-        'avg_cost_per_ticket': avg_cost_per_ticket,
-        'total_sorting_count': total_sorting_count,
-        'total_exchange_count': total_exchange_count,
-        'total_cost': total_cost,
         'company_stats': company_stats,
+        **totals,
     }
-    return render(request, 'portal/warehouse_module.html', context)
+    return context
 
 
-@login_required
+@require_permission('pickup.read')
+@reporting_reads
 def pickup_module_view(request):
     """换单揽收模块视图"""
-    from .models import ExchangeOrderReport
-    
     end_date = date.today()
     selected_date_str = request.GET.get('date')
     if selected_date_str:
@@ -577,37 +350,27 @@ def pickup_module_view(request):
 
     # 获取最近7天的日期作为可用日期
     sample_dates = [(end_date - timedelta(days=i)) for i in range(7)]
-    
-    # 生成示例数据 - 昨日BBC（换单数据）
-    exchange_order_data = []
-    # 基于截图数据：换单渠道=YWE+USPS+UNI, 换单量=14211
-    for report_date in sample_dates:
-        exchange_order_data.append({
-            'report_date': report_date,
-            'exchange_channel': 'YWE+USPS+UNI',
-            'exchange_count': 14211,
-            'exception_notes': '',
-        })
-    
-    # 生成示例数据 - 昨日揽收
-    pickup_data = []
-    # 基于截图数据：揽收区域=LAX, 揽收情况=/, 回库件数=39490 (显示为3.949W)
-    for report_date in sample_dates:
-        return_count = 39490
+    start_date = sample_dates[-1]
+    
+    # 昨日BBC（换单数据）
+    exchange_order_data = list(
+        published_reports(ExchangeOrderReport, start_date, end_date)
+        .order_by('-report_date', 'exchange_channel')
+        .values('report_date', 'exchange_channel', 'exchange_count', 'exception_notes')
+    )
+    
+    # 昨日揽收
+    pickup_data = list(
+        published_reports(PickupReport, start_date, end_date)
+        .order_by('-report_date', 'pickup_area')
+        .values('report_date', 'pickup_area', 'pickup_situation', 'return_count', 'exception_notes')
+    )
+    for data in pickup_data:
         # 格式化回库件数：大于10000显示为X.XXXW格式
-        if return_count >= 10000:
-            return_count_formatted = f"{return_count / 10000:.3f}W"
+        if data['return_count'] >= 10000:
+            data['return_count_formatted'] = f"{data['return_count'] / 10000:.3f}W"
         else:
-            return_count_formatted = str(return_count)
-        
-        pickup_data.append({
-            'report_date': report_date,
-            'pickup_area': 'LAX',
-            'pickup_situation': '/',
-            'return_count': return_count,
-            'return_count_formatted': return_count_formatted,
-            'exception_notes': '',
-        })
+            data['return_count_formatted'] = str(data['return_count'])
     
     # 获取选中日期的数据
     today_exchange_data = [data for data in exchange_order_data if data['report_date'] == selected_date]
@@ -624,7 +387,8 @@ def pickup_module_view(request):
     return render(request, 'portal/pickup_module.html', context)
 
 
-@login_required
+@require_permission('air_transport.read')
+@reporting_reads
 def airtransport_module_view(request):
     """空运管理模块视图"""
     end_date = date.today()
@@ -679,7 +443,8 @@ def airtransport_module_view(request):
     return render(request, 'portal/airtransport_module.html', context)
 
 
-@login_required
+@require_permission('linehaul.read')
+@reporting_reads
 def linehaul_module_view(request):
     """干线管理模块视图"""
     end_date = date.today()
@@ -738,7 +503,8 @@ def linehaul_module_view(request):
     return render(request, 'portal/linehaul_module.html', context)
 
 
-@login_required
+@require_permission('air_transport.read', 'linehaul.read')
+@reporting_reads
 def airtransport_linehaul_module_view(request):
     """空运干线管理模块视图 - 合并空运和干线数据"""
     end_date = date.today()
@@ -819,102 +585,223 @@ def airtransport_linehaul_module_view(request):
     return render(request, 'portal/airtransport_linehaul_module.html', context)
 
 
-@login_required
+@require_permission('change_order.read')
+@reporting_reads
 def change_order_module_view(request):
     """换单管理模块视图"""
+    context = cached_view_context(request, 'change_order_module', _change_order_module_context)
+    return render(request, 'portal/change_order_module.html', context)
+
+
+def _change_order_module_context(request):
+    """计算换单管理模块的模板上下文"""
     # 获取最近7天的换单数据
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
     
-    reports = DailyReport.objects.filter(
-        is_published=True,
-        report_date__range=[start_date, end_date]
-    ).order_by('-report_date')
-    
+    # 一条查询取回日期范围内的全部记录，按模型默认排序 (报告日期倒序, 名称)
     change_order_data = []
-    for report in reports:
-        change_order_channels = ChangeOrderChannel.objects.filter(daily_report=report)
-        for coc in change_order_channels:
-            change_order_data.append({
-                'report_date': report.report_date,
-                'channel_name': coc.channel_name,
-                'change_order_count': coc.change_order_count,
-                'exception_notes': coc.exception_notes,
-            })
+    for coc in published_reports(ChangeOrderChannel, start_date, end_date):
+        change_order_data.append({
+            'report_date': coc.report_date,
+            'channel_name': coc.channel_name,
+            'change_order_count': coc.change_order_count,
+            'exception_notes': coc.exception_notes,
+        })
     
     context = {
         'change_order_data': change_order_data,
         'date_range': f"{start_date} 至 {end_date}",
     }
-    return render(request, 'portal/change_order_module.html', context)
+    return context
 
 
 @login_required
+@reporting_reads
 def dashboard_api_view(request):
     """仪表板API视图 - 返回JSON数据用于图表"""
     # 获取最近30天的数据
     end_date = date.today()
     start_date = end_date - timedelta(days=30)
     
-    reports = DailyReport.objects.filter(
-        is_published=True,
-        report_date__range=[start_date, end_date]
-    ).order_by('report_date')
+    # 一条分组查询取回全部序列
+    data = timeseries(
+        'delivery',
+        ['cargo_volume', 'box_count', 'avg_removal_rate', 'avg_delivery_rate_day1'],
+        start_date, end_date,
+    )
     
     # 准备图表数据
     chart_data = {
-        'labels': [],
-        'cargo_volume': [],
-        'box_count': [],
+        'labels': [label[5:] for label in data['labels']],
+        'cargo_volume': data['series']['cargo_volume'],
+        'box_count': data['series']['box_count'],
         'error_rate': [],
-        'delivery_rate': [],
+        'removal_rate': data['series']['avg_removal_rate'],
+        'delivery_rate': data['series']['avg_delivery_rate_day1'],
     }
     
-    for report in reports:
-        chart_data['labels'].append(report.report_date.strftime('%m-%d'))
-        
-        # 配送数据
-        delivery_stats = DeliveryReport.objects.filter(daily_report=report).aggregate(
-            total_cargo=Sum('cargo_volume'),
-            total_boxes=Sum('box_count'),
-            avg_removal_rate=Avg('removal_rate'),
-            avg_delivery_rate=Avg('delivery_rate_day1')
-        )
-        
-        chart_data['cargo_volume'].append(delivery_stats['total_cargo'] or 0)
-        chart_data['box_count'].append(delivery_stats['total_boxes'] or 0)
-        chart_data['removal_rate'].append(float(delivery_stats['avg_removal_rate'] or 0))
-        chart_data['delivery_rate'].append(float(delivery_stats['avg_delivery_rate'] or 0))
-    
     return JsonResponse(chart_data)
 
 
+def _timeseries_params(request):
+    """解析时间序列查询参数，结果缓存在request上供ETag计算与视图共用"""
+    if not hasattr(request, '_timeseries_params'):
+        end_date = date.today()
+        if request.GET.get('end_date'):
+            end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+        start_date = end_date - timedelta(days=30)
+        if request.GET.get('start_date'):
+            start_date = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
+        module = request.GET.get('module', 'delivery')
+        enforce_permission(request.user, f'{module}.read')
+        metrics = [m for m in request.GET.get('metrics', '').split(',') if m] or available_metrics(module)
+        request._timeseries_params = {
+            'module': module,
+            'metrics': metrics,
+            'start_date': start_date,
+            'end_date': end_date,
+            'granularity': request.GET.get('granularity', 'day'),
+        }
+    return request._timeseries_params
+
+
+def _timeseries_etag(request):
+    try:
+        request._timeseries_fingerprint = timeseries_fingerprint(**_timeseries_params(request))
+    except ValueError:
+        # 参数错误交给视图返回400
+        return None
+    return request._timeseries_fingerprint[0]
+
+
+def _timeseries_last_modified(request):
+    fingerprint = getattr(request, '_timeseries_fingerprint', None)
+    return fingerprint[1] if fingerprint else None
+
+
+@login_required
+@reporting_reads
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_timeseries_etag, last_modified_func=_timeseries_last_modified)
+def timeseries_api_view(request):
+    """时间序列API - 按日/周/月返回多个指标的列式数组，支持ETag/Last-Modified条件请求"""
+    try:
+        params = _timeseries_params(request)
+        data = timeseries(**params)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    
+    return JsonResponse({
+        'module': params['module'],
+        'granularity': params['granularity'],
+        'start_date': params['start_date'],
+        'end_date': params['end_date'],
+        **data,
+    })
+
+
+def _trend_params(request):
+    """解析趋势查询参数：指标、粒度、日期范围（默认最近3年）、滚动窗口"""
+    metric = request.GET.get('metric', 'removal_rate')
+    if metric not in analytics.TREND_METRICS:
+        raise analytics.AnalyticsError(f'未知指标: {metric}')
+    enforce_permission(request.user, analytics.TREND_METRICS[metric].permission)
+    start_date, end_date = analytics.default_range()
+    if request.GET.get('end_date'):
+        end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+    if request.GET.get('start_date'):
+        start_date = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
+    return {
+        'metric': metric,
+        'granularity': request.GET.get('granularity', 'month'),
+        'start_date': start_date,
+        'end_date': end_date,
+        'window': int(request.GET.get('window') or 0) or None,
+    }
+
+
+# 趋势页面读取进程内的分析快照，快照始终从主库加载，因此不使用 @reporting_reads
 @login_required
+def trends_view(request):
+    """趋势分析页面 - 多年尺度下各城市、劳务公司、成本类别的指标趋势"""
+    context = {
+        'metrics': analytics.TREND_METRICS,
+        'granularities': analytics.GRANULARITIES,
+        'available': analytics.is_available(),
+    }
+    if context['available']:
+        try:
+            params = _trend_params(request)
+            context.update(params, trend=analytics.trend(**params))
+        except ValueError as exc:
+            context['error'] = str(exc)
+    return render(request, 'portal/trends.html', context)
+
+
+@login_required
+def trends_api_view(request):
+    """趋势API - 某指标按类别、周期聚合的列式数组，可附带滚动平均"""
+    if not analytics.is_available():
+        return JsonResponse({'error': '分析快照需要安装 NumPy'}, status=503)
+    try:
+        params = _trend_params(request)
+        data = analytics.trend(**params)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'start_date': params['start_date'], 'end_date': params['end_date'], **data})
+
+
+@require_permission('delivery.read')
+@reporting_reads
+def delivery_anomalies_api_view(request):
+    """配送异常API - 日期范围内（默认最近30天）各城市配送指标的异常记录，可按城市、指标过滤"""
+    try:
+        end_date = date.today()
+        if request.GET.get('end_date'):
+            end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+        start_date = end_date - timedelta(days=30)
+        if request.GET.get('start_date'):
+            start_date = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': '日期格式应为 YYYY-MM-DD'}, status=400)
+
+    anomalies = DeliveryAnomaly.objects.filter(report_date__range=[start_date, end_date])
+    if request.GET.get('city'):
+        anomalies = anomalies.filter(city=request.GET['city'])
+    if request.GET.get('metric'):
+        anomalies = anomalies.filter(metric=request.GET['metric'])
+
+    return JsonResponse({
+        'start_date': start_date,
+        'end_date': end_date,
+        'anomalies': list(anomalies.values(
+            'report_date', 'city', 'metric', 'value', 'baseline', 'score', 'daily_report_id'
+        )),
+    })
+
+
+@require_permission('sorting_machine.read')
+@reporting_reads
 def sorting_machine_module_view(request):
     """分拣机管理模块视图"""
     # 获取最近7天的分拣机数据
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
     
-    reports = DailyReport.objects.filter(
-        is_published=True,
-        report_date__range=[start_date, end_date]
-    ).order_by('-report_date')
-    
+    # 一条查询取回日期范围内的全部记录，按模型默认排序 (报告日期倒序, 名称)
     sorting_machine_data = []
-    for report in reports:
-        sorting_reports = SortingMachineReport.objects.filter(daily_report=report)
-        for sr in sorting_reports:
-            sorting_machine_data.append({
-                'report_date': report.report_date,
-                'machine_name': sr.machine_name,
-                'machine_type': sr.machine_type,
-                'throughput': sr.throughput,
-                'error_rate': sr.error_rate,
-                'downtime_hours': sr.downtime_hours,
-                'maintenance_status': sr.maintenance_status,
-                'exception_notes': sr.exception_notes,
-            })
+    for sr in published_reports(SortingMachineReport, start_date, end_date):
+        sorting_machine_data.append({
+            'report_date': sr.report_date,
+            'machine_name': sr.machine_name,
+            'machine_type': sr.machine_type,
+            'throughput': sr.throughput,
+            'error_rate': sr.error_rate,
+            'downtime_hours': sr.downtime_hours,
+            'maintenance_status': sr.maintenance_status,
+            'exception_notes': sr.exception_notes,
+        })
     
     context = {
         'sorting_machine_data': sorting_machine_data,
@@ -923,31 +810,26 @@ def sorting_machine_module_view(request):
     return render(request, 'portal/sorting_machine_module.html', context)
 
 
-@login_required
+@require_permission('equipment.read')
+@reporting_reads
 def equipment_maintenance_module_view(request):
     """设备维护模块视图"""
     # 获取最近7天的设备数据
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
     
-    reports = DailyReport.objects.filter(
-        is_published=True,
-        report_date__range=[start_date, end_date]
-    ).order_by('-report_date')
-    
+    # 一条查询取回日期范围内的全部记录，按模型默认排序 (报告日期倒序, 名称)
     equipment_data = []
-    for report in reports:
-        equipment_reports = EquipmentReport.objects.filter(daily_report=report)
-        for er in equipment_reports:
-            equipment_data.append({
-                'report_date': report.report_date,
-                'equipment_name': er.equipment_name,
-                'equipment_type': er.equipment_type,
-                'status': er.status,
-                'utilization_rate': er.utilization_rate,
-                'maintenance_hours': er.maintenance_hours,
-                'exception_notes': er.exception_notes,
-            })
+    for er in published_reports(EquipmentReport, start_date, end_date):
+        equipment_data.append({
+            'report_date': er.report_date,
+            'equipment_name': er.equipment_name,
+            'equipment_type': er.equipment_type,
+            'status': er.status,
+            'utilization_rate': er.utilization_rate,
+            'maintenance_hours': er.maintenance_hours,
+            'exception_notes': er.exception_notes,
+        })
     
     context = {
         'equipment_data': equipment_data,
@@ -956,31 +838,26 @@ def equipment_maintenance_module_view(request):
     return render(request, 'portal/equipment_maintenance_module.html', context)
 
 
-@login_required
+@require_permission('quality.read')
+@reporting_reads
 def quality_monitoring_module_view(request):
     """质量监控模块视图"""
     # 获取最近7天的质量数据
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
     
-    reports = DailyReport.objects.filter(
-        is_published=True,
-        report_date__range=[start_date, end_date]
-    ).order_by('-report_date')
-    
+    # 一条查询取回日期范围内的全部记录，按模型默认排序 (报告日期倒序, 名称)
     quality_data = []
-    for report in reports:
-        quality_reports = QualityReport.objects.filter(daily_report=report)
-        for qr in quality_reports:
-            quality_data.append({
-                'report_date': report.report_date,
-                'quality_type': qr.quality_type,
-                'total_count': qr.total_count,
-                'error_count': qr.error_count,
-                'error_rate': qr.error_rate,
-                'improvement_measures': qr.improvement_measures,
-                'exception_notes': qr.exception_notes,
-            })
+    for qr in published_reports(QualityReport, start_date, end_date):
+        quality_data.append({
+            'report_date': qr.report_date,
+            'quality_type': qr.quality_type,
+            'total_count': qr.total_count,
+            'error_count': qr.error_count,
+            'error_rate': qr.error_rate,
+            'improvement_measures': qr.improvement_measures,
+            'exception_notes': qr.exception_notes,
+        })
     
     context = {
         'quality_data': quality_data,
@@ -989,157 +866,203 @@ def quality_monitoring_module_view(request):
     return render(request, 'portal/quality_monitoring_module.html', context)
 
 
-@login_required
-def exception_handling_module_view(request):
+@require_permission('exception.read')
+@reporting_reads
+async def exception_handling_module_view(request):
     """异常处理模块视图"""
     # 获取最近7天有异常说明的数据
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
     
-    reports = DailyReport.objects.filter(
-        is_published=True,
-        report_date__range=[start_date, end_date]
-    ).order_by('-report_date')
-    
-    exception_data = []
-    for report in reports:
-        # 收集所有有异常说明的数据
-        delivery_exceptions = DeliveryReport.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        warehouse_exceptions = WarehouseReport.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        pickup_exceptions = PickupReport.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        linehaul_exceptions = LinehaulReport.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        change_order_exceptions = ChangeOrderChannel.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        sorting_exceptions = SortingMachineReport.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        equipment_exceptions = EquipmentReport.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        quality_exceptions = QualityReport.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        cost_exceptions = CostReport.objects.filter(
-            daily_report=report, exception_notes__isnull=False
-        ).exclude(exception_notes='')
-        
-        # 添加异常数据
-        for de in delivery_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '配送管理',
-                'item': f"{de.city}配送",
-                'exception_notes': de.exception_notes,
-            })
-        
-        for we in warehouse_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '仓内管理',
-                'item': we.contractor_company,
-                'exception_notes': we.exception_notes,
-            })
-        
-        for pe in pickup_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '揽收管理',
-                'item': pe.pickup_area,
-                'exception_notes': pe.exception_notes,
-            })
-        
-        for le in linehaul_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '干线管理',
-                'item': le.supplier,
-                'exception_notes': le.exception_notes,
-            })
-        
-        for ce in change_order_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '换单管理',
-                'item': ce.channel_name,
-                'exception_notes': ce.exception_notes,
-            })
-        
-        for se in sorting_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '分拣机管理',
-                'item': se.machine_name,
-                'exception_notes': se.exception_notes,
-            })
-        
-        for ee in equipment_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '设备维护',
-                'item': ee.equipment_name,
-                'exception_notes': ee.exception_notes,
-            })
-        
-        for qe in quality_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '质量监控',
-                'item': qe.quality_type,
-                'exception_notes': qe.exception_notes,
-            })
-        
-        for ce in cost_exceptions:
-            exception_data.append({
-                'report_date': report.report_date,
-                'module': '成本分析',
-                'item': ce.cost_category,
-                'exception_notes': ce.exception_notes,
-            })
+    # 九个来源并发查询后归并（或一次 UNION ALL 查询），按游标分页
+    try:
+        exception_data, next_cursor = await aexception_page(
+            start_date, end_date, cursor=request.GET.get('cursor') or None
+        )
+    except InvalidCursor:
+        exception_data, next_cursor = await aexception_page(start_date, end_date)
     
     context = {
         'exception_data': exception_data,
+        'next_cursor': next_cursor,
         'date_range': f"{start_date} 至 {end_date}",
     }
-    return render(request, 'portal/exception_handling_module.html', context)
+    return await sync_to_async(render)(request, 'portal/exception_handling_module.html', context)
+
+
+@require_permission('exception.read')
+@reporting_reads
+def exception_feed_api_view(request):
+    """异常信息流API - 按日期倒序游标分页返回全部模块的异常说明"""
+    end_date = date.today()
+    start_date = end_date - timedelta(days=7)
+    try:
+        if request.GET.get('start_date'):
+            start_date = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
+        if request.GET.get('end_date'):
+            end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+        page_size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+        rows, next_cursor = exception_page(
+            start_date, end_date,
+            cursor=request.GET.get('cursor') or None,
+            page_size=page_size,
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': '无效的游标'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': '无效的查询参数'}, status=400)
+    
+    return JsonResponse({
+        'start_date': start_date,
+        'end_date': end_date,
+        'results': [
+            {
+                'report_date': row['report_date'],
+                'module': row['module'],
+                'item': row['item'],
+                'exception_notes': row['exception_notes'],
+            }
+            for row in rows
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
+def _search_sources(user):
+    """用户有查看权限的搜索来源（模型名），不限制时返回 None"""
+    if not getattr(settings, 'RBAC_ENFORCE_PERMISSIONS', False):
+        return None
+    return [source.model_name for source in SEARCH_SOURCES if has_permission(user, source.permission)]
+
+
+def _search(request):
+    """按请求参数搜索，返回 (查询词, 页码, 命中列表, 是否还有下一页)；参数错误时抛出 ValueError"""
+    query = request.GET.get('q', '').strip()
+    page = max(1, int(request.GET.get('page', 1)))
+    start_date = end_date = None
+    if request.GET.get('start_date'):
+        start_date = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
+    if request.GET.get('end_date'):
+        end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+    hits, has_next = search(
+        query, sources=_search_sources(request.user), start_date=start_date, end_date=end_date,
+        limit=SEARCH_PAGE_SIZE, offset=(page - 1) * SEARCH_PAGE_SIZE,
+    )
+    for hit in hits:
+        hit['url'] = reverse('portal:daily_report_detail', args=[hit['daily_report_id']])
+    return query, page, hits, has_next
 
 
 @login_required
+@reporting_reads
+def search_view(request):
+    """全文搜索 - 按相关度检索各模块的异常说明、现场情况与改进措施"""
+    try:
+        query, page, hits, has_next = _search(request)
+    except ValueError:
+        query, page, hits, has_next = request.GET.get('q', ''), 1, [], False
+        messages.error(request, '无效的查询参数')
+
+    context = {
+        'query': query,
+        'hits': hits,
+        'page': page,
+        'has_next': has_next,
+        'has_previous': page > 1,
+    }
+    return render(request, 'portal/search.html', context)
+
+
+@login_required
+@reporting_reads
+def search_api_view(request):
+    """全文搜索API - 按相关度分页返回命中记录，snippet 为已转义、命中处带 <mark> 的HTML片段"""
+    try:
+        query, page, hits, has_next = _search(request)
+    except ValueError:
+        return JsonResponse({'error': '无效的查询参数'}, status=400)
+
+    return JsonResponse({
+        'query': query,
+        'page': page,
+        'results': [
+            {
+                'module': hit['module'],
+                'item': hit['item'],
+                'field': hit['field'],
+                'report_date': hit['report_date'],
+                'snippet': str(hit['snippet']),
+                'url': hit['url'],
+            }
+            for hit in hits
+        ],
+        'has_next': has_next,
+    })
+
+
+@login_required
+def report_export_view(request, report_type):
+    """报表导出 - 按日期范围、城市流式导出某类子报表的CSV/XLSX"""
+    if report_type not in REPORT_TYPES:
+        raise Http404('未知的报表类型')
+    enforce_permission(request.user, export_permission(report_type))
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': '不支持的导出格式'}, status=400)
+
+    # 与模块页面一致：date 指定单日；否则按 start_date/end_date，默认最近30天
+    try:
+        if request.GET.get('date'):
+            start_date = end_date = datetime.strptime(request.GET['date'], '%Y-%m-%d').date()
+        else:
+            end_date = date.today()
+            if request.GET.get('end_date'):
+                end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+            start_date = end_date - timedelta(days=30)
+            if request.GET.get('start_date'):
+                start_date = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': '无效的日期参数'}, status=400)
+    city = request.GET.get('city', '')
+
+    response = StreamingHttpResponse(
+        export_stream(report_type, file_format, start_date, end_date, city),
+        content_type=EXPORT_FORMATS[file_format],
+    )
+    filename = export_filename(report_type, file_format, start_date, end_date, city)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_permission('cost.read')
+@reporting_reads
 def cost_analysis_module_view(request):
     """成本分析模块视图"""
+    context = cached_view_context(request, 'cost_analysis_module', _cost_analysis_module_context)
+    return render(request, 'portal/cost_analysis_module.html', context)
+
+
+def _cost_analysis_module_context(request):
+    """计算成本分析模块的模板上下文"""
     # 获取最近7天的成本数据
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
     
-    reports = DailyReport.objects.filter(
-        is_published=True,
-        report_date__range=[start_date, end_date]
-    ).order_by('-report_date')
-    
+    # 一条查询取回日期范围内的全部记录，按模型默认排序 (报告日期倒序, 名称)
     cost_data = []
-    for report in reports:
-        cost_reports = CostReport.objects.filter(daily_report=report)
-        for cr in cost_reports:
-            cost_data.append({
-                'report_date': report.report_date,
-                'cost_category': cr.cost_category,
-                'planned_cost': cr.planned_cost,
-                'actual_cost': cr.actual_cost,
-                'variance': cr.variance,
-                'variance_rate': cr.variance_rate,
-                'exception_notes': cr.exception_notes,
-            })
+    for cr in published_reports(CostReport, start_date, end_date):
+        cost_data.append({
+            'report_date': cr.report_date,
+            'cost_category': cr.cost_category,
+            'planned_cost': cr.planned_cost,
+            'actual_cost': cr.actual_cost,
+            'variance': cr.variance,
+            'variance_rate': cr.variance_rate,
+            'exception_notes': cr.exception_notes,
+        })
     
     context = {
         'cost_data': cost_data,
         'date_range': f"{start_date} 至 {end_date}",
     }
-    return render(request, 'portal/cost_analysis_module.html', context)
+    return context
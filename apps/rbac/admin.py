@@ -25,6 +25,7 @@ class ResourceAdmin(admin.ModelAdmin):
     fieldsets = (
         (None, {'fields': ('name', 'description', 'resource_type', 'resource_code')}),
         ('层级关系', {'fields': ('parent', 'sort_order')}),
+        ('菜单', {'fields': ('url_name', 'icon')}),
         ('状态', {'fields': ('is_active',)}),
         ('时间信息', {'fields': ('created_at',)}),
     )
@@ -0,0 +1,55 @@
+"""
+权限装饰器
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+
+from .permissions import has_permission
+
+
+def enforce_permission(user, *codes):
+    """
+    用户缺少任一指定权限时抛出 PermissionDenied
+
+    RBAC_ENFORCE_PERMISSIONS 为 False 时不做检查，便于在分配角色之前先部署。
+    """
+    if getattr(settings, 'RBAC_ENFORCE_PERMISSIONS', False) and not has_permission(user, *codes):
+        raise PermissionDenied
+
+
+def require_permission(*codes, login_url=None):
+    """
+    要求当前用户拥有全部指定权限编码，例如 @require_permission('delivery.read')
+
+    未登录时跳转登录页；没有权限时返回403。不指定权限编码时只要求登录。
+    同步、异步视图均可使用（异步视图在线程中读取用户与权限）。
+    """
+    def check(request):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), login_url)
+        enforce_permission(request.user, *codes)
+        return None
+
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def wrapper(request, *args, **kwargs):
+                response = await sync_to_async(check)(request)
+                if response is not None:
+                    return response
+                return await view_func(request, *args, **kwargs)
+        else:
+            @wraps(view_func)
+            def wrapper(request, *args, **kwargs):
+                response = check(request)
+                if response is not None:
+                    return response
+                return view_func(request, *args, **kwargs)
+        wrapper.required_permissions = codes
+        return wrapper
+    return decorator
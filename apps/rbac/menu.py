@@ -0,0 +1,108 @@
+"""
+菜单服务
+
+侧边栏由 resource_type='menu' 的资源树生成：一条查询取回全部启用的菜单资源，
+在内存中组装为树并按用户已编译的权限过滤，渲染结果按 (权限集合, 当前页面) 缓存。
+菜单资源没有登记 read 权限时对所有登录用户可见；分组节点在没有可见子节点时隐藏。
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.template.loader import render_to_string
+from django.urls import NoReverseMatch, reverse
+
+from .models import Resource, Permission
+from .permissions import current_version, has_permission, permission_fingerprint
+
+MENU_CACHE_TIMEOUT = 60 * 60
+MENU_TEMPLATE = 'base/sidebar_menu.html'
+
+
+def load_menu_tree():
+    """
+    一条查询取回全部启用的菜单资源并组装为树
+
+    返回顶层节点列表，节点为字典：code, name, url, icon, restricted, children。
+    结果随权限缓存版本缓存，资源或权限变更后自动重新加载。
+    """
+    key = f'rbac:menu_tree:{current_version()}'
+    tree = cache.get(key)
+    if tree is not None:
+        return tree
+
+    rows = Resource.objects.filter(is_active=True, resource_type='menu').annotate(
+        restricted=Exists(Permission.objects.filter(
+            resource=OuterRef('pk'), permission_type='read', is_active=True
+        )),
+    ).order_by('sort_order', 'id').values(
+        'id', 'parent_id', 'name', 'resource_code', 'url_name', 'icon', 'restricted'
+    )
+
+    nodes = {}
+    for row in rows:
+        try:
+            url = reverse(row['url_name']) if row['url_name'] else ''
+        except NoReverseMatch:
+            url = ''
+        nodes[row['id']] = {
+            'code': row['resource_code'],
+            'name': row['name'],
+            'url_name': row['url_name'],
+            'url': url,
+            'icon': row['icon'],
+            'restricted': row['restricted'],
+            'parent_id': row['parent_id'],
+            'children': [],
+        }
+
+    tree = []
+    for node in nodes.values():
+        parent_id = node.pop('parent_id')
+        if parent_id is None:
+            tree.append(node)
+        elif parent_id in nodes:
+            nodes[parent_id]['children'].append(node)
+        # 父资源停用时整个子树不显示
+
+    cache.set(key, tree, MENU_CACHE_TIMEOUT)
+    return tree
+
+
+def _visible(nodes, can_read):
+    visible = []
+    for node in nodes:
+        children = _visible(node['children'], can_read)
+        if node['restricted'] and not can_read(node['code']):
+            continue
+        if not node['url'] and not children:
+            # 没有链接也没有可见子菜单的分组不显示
+            continue
+        visible.append({**node, 'children': children})
+    return visible
+
+
+def visible_menu(user):
+    """按用户权限过滤后的菜单树；未开启权限检查时返回完整菜单"""
+    if not getattr(settings, 'RBAC_ENFORCE_PERMISSIONS', False):
+        return _visible(load_menu_tree(), lambda code: True)
+    return _visible(load_menu_tree(), lambda code: has_permission(user, f'{code}.read'))
+
+
+def render_menu(request):
+    """
+    渲染侧边栏菜单HTML
+
+    权限集合相同的用户在同一页面上得到相同的HTML，按 (权限集合, 当前URL名称) 缓存。
+    """
+    user = request.user
+    enforced = getattr(settings, 'RBAC_ENFORCE_PERMISSIONS', False)
+    role_set = permission_fingerprint(user) if enforced else 'all'
+    match = getattr(request, 'resolver_match', None)
+    current = match.view_name if match else ''
+
+    key = f'rbac:menu_html:{current_version()}:{role_set}:{current}'
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(MENU_TEMPLATE, {'menu': visible_menu(user), 'current': current})
+        cache.set(key, html, MENU_CACHE_TIMEOUT)
+    return html
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:03
+
+from django.db import migrations, models
+
+
+# 默认菜单（与原侧边栏一致），只在此处定义；之后的菜单调整应通过新的数据迁移或后台完成
+# (资源编码, 名称, URL名称, 图标, 是否需要read权限, 子菜单)
+MENU = (
+    ('dashboard', '仪表板', 'portal:dashboard', 'fas fa-tachometer-alt', False, ()),
+    ('daily_report', 'LAX日报', 'portal:daily_reports', 'fas fa-calendar-day', True, ()),
+    ('operations', '运营管理', '', 'fas fa-cogs', False, (
+        ('delivery', '配送管理', 'portal:delivery_module', 'fas fa-truck', True, ()),
+        ('warehouse', '仓内管理', 'portal:warehouse_module', 'fas fa-warehouse', True, ()),
+        ('pickup', '换单揽收', 'portal:pickup_module', 'fas fa-hand-holding', True, ()),
+    )),
+    ('transport', '运输管理', '', 'fas fa-shipping-fast', False, (
+        ('air_transport', '空运管理', 'portal:airtransport_module', 'fas fa-plane', True, ()),
+        ('linehaul', '干线管理', 'portal:linehaul_module', 'fas fa-road', True, ()),
+    )),
+    ('devices', '设备管理', '', 'fas fa-tools', False, (
+        ('sorting_machine', '分拣机管理', 'portal:sorting_machine_module', 'fas fa-cog', True, ()),
+        ('equipment', '设备维护', 'portal:equipment_maintenance_module', 'fas fa-wrench', True, ()),
+    )),
+    ('quality_control', '质量管理', '', 'fas fa-chart-line', False, (
+        ('quality', '质量监控', 'portal:quality_monitoring_module', 'fas fa-check-circle', True, ()),
+        ('exception', '异常处理', 'portal:exception_handling_module', 'fas fa-exclamation-triangle', True, ()),
+    )),
+    ('cost_control', '成本管理', '', 'fas fa-dollar-sign', False, (
+        ('cost', '成本分析', 'portal:cost_analysis_module', 'fas fa-calculator', True, ()),
+        ('change_order', '换单管理', 'portal:change_order_module', 'fas fa-exchange-alt', True, ()),
+    )),
+    ('announcements', '公告通知', 'portal:announcements', 'fas fa-bullhorn', False, ()),
+    ('documents', '文档中心', 'portal:documents', 'fas fa-file-alt', False, ()),
+)
+
+
+def seed_menu(apps, schema_editor):
+    """写入默认菜单资源及其 read 权限，已存在的资源编码跳过"""
+    Resource = apps.get_model('rbac', 'Resource')
+    Permission = apps.get_model('rbac', 'Permission')
+
+    def create(items, parent=None):
+        for sort_order, (code, name, url_name, icon, readable, children) in enumerate(items):
+            resource, _ = Resource.objects.get_or_create(
+                resource_code=code,
+                defaults={
+                    'name': name, 'resource_type': 'menu', 'parent': parent,
+                    'url_name': url_name, 'icon': icon, 'sort_order': sort_order,
+                },
+            )
+            if readable:
+                Permission.objects.get_or_create(
+                    permission_code=f'{code}.read',
+                    defaults={'name': f'查看{name}', 'permission_type': 'read', 'resource': resource},
+                )
+            create(children, resource)
+
+    create(MENU)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rbac', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='icon',
+            field=models.CharField(blank=True, help_text='Font Awesome 图标类名，如 fas fa-truck', max_length=50, verbose_name='图标'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='url_name',
+            field=models.CharField(blank=True, help_text='菜单资源的链接，如 portal:delivery_module', max_length=100, verbose_name='URL名称'),
+        ),
+        migrations.RunPython(seed_menu, migrations.RunPython.noop),
+    ]
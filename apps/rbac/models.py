@@ -34,6 +34,8 @@ class Resource(BaseModel):
     resource_type = models.CharField(max_length=20, choices=RESOURCE_TYPES, verbose_name='资源类型')
     resource_code = models.CharField(max_length=100, unique=True, verbose_name='资源编码')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, verbose_name='父资源')
+    url_name = models.CharField(max_length=100, blank=True, verbose_name='URL名称', help_text='菜单资源的链接，如 portal:delivery_module')
+    icon = models.CharField(max_length=50, blank=True, verbose_name='图标', help_text='Font Awesome 图标类名，如 fas fa-truck')
     is_active = models.BooleanField(default=True, verbose_name='是否激活')
     sort_order = models.IntegerField(default=0, verbose_name='排序')
 
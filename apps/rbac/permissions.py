@@ -0,0 +1,134 @@
+"""
+权限解析
+
+将 用户 → 角色 → 角色权限 → 权限 → 资源 编译为用户的有效权限编码集合（frozenset），
+按用户缓存，请求内的权限判断只是一次集合查找。
+
+资源继承：用户在某个资源上拥有某类权限（如 read）时，该资源所有启用的子孙资源上
+同类型的权限也一并生效。除 Permission 中登记的 permission_code 外，集合中还包含
+约定格式的 "<资源编码>.<权限类型>"（如 delivery.read）。
+
+角色、权限、资源等定义变更时递增缓存版本使全部用户重新编译；用户角色变更时只清除该用户的缓存。
+"""
+import hashlib
+
+from django.core.cache import cache
+
+from .models import Resource, Permission
+
+VERSION_KEY = 'rbac:version'
+PERMISSION_CACHE_TIMEOUT = 60 * 60
+
+# 请求内缓存，挂在用户对象上（与 ModelBackend 的 _perm_cache 相同做法）
+USER_CACHE_ATTR = '_rbac_permission_cache'
+
+
+def current_version():
+    """当前权限缓存版本，不存在时初始化为1"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def user_cache_key(user_id, version=None):
+    return f'rbac:permissions:{version or current_version()}:{user_id}'
+
+
+def invalidate_all():
+    """递增缓存版本，使所有用户的权限集合重新编译"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+
+
+def invalidate_user(user_id):
+    """清除某个用户已编译的权限集合"""
+    cache.delete(user_cache_key(user_id))
+
+
+def compile_permissions(user):
+    """
+    从数据库编译用户的有效权限编码集合
+
+    未授予任何权限时只执行一条查询；否则再各用一条查询取回启用的资源树与权限。
+    """
+    if not user.is_active:
+        return frozenset()
+
+    grants = set(
+        Permission.objects.filter(
+            is_active=True,
+            resource__is_active=True,
+            rolepermission__role__is_active=True,
+            rolepermission__role__userrole__user_id=user.pk,
+        ).values_list('permission_code', 'permission_type', 'resource_id').distinct()
+    )
+    if not grants:
+        return frozenset()
+
+    resources = {}
+    children = {}
+    for resource_id, parent_id, resource_code in Resource.objects.filter(
+        is_active=True
+    ).values_list('id', 'parent_id', 'resource_code'):
+        resources[resource_id] = resource_code
+        children.setdefault(parent_id, []).append(resource_id)
+
+    # 每种权限类型覆盖的资源：被授权的资源及其全部子孙资源
+    covered = set()
+    for _, permission_type, resource_id in grants:
+        stack = [resource_id]
+        while stack:
+            current = stack.pop()
+            if (current, permission_type) in covered:
+                continue
+            covered.add((current, permission_type))
+            stack.extend(children.get(current, ()))
+
+    codes = {code for code, _, _ in grants}
+    codes.update(f'{resources[resource_id]}.{permission_type}' for resource_id, permission_type in covered)
+    codes.update(
+        code for code, permission_type, resource_id in Permission.objects.filter(
+            is_active=True, resource_id__in={resource_id for resource_id, _ in covered}
+        ).values_list('permission_code', 'permission_type', 'resource_id')
+        if (resource_id, permission_type) in covered
+    )
+    return frozenset(codes)
+
+
+def get_user_permissions(user):
+    """
+    获取用户的有效权限编码集合
+
+    依次查找请求内缓存、缓存后端，都未命中时编译并写入缓存。匿名用户返回空集合。
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    permissions = getattr(user, USER_CACHE_ATTR, None)
+    if permissions is None:
+        key = user_cache_key(user.pk)
+        permissions = cache.get(key)
+        if permissions is None:
+            permissions = compile_permissions(user)
+            cache.set(key, permissions, PERMISSION_CACHE_TIMEOUT)
+        setattr(user, USER_CACHE_ATTR, permissions)
+    return permissions
+
+
+def has_permission(user, *codes):
+    """用户是否拥有全部指定权限，超级用户总是拥有"""
+    if user.is_active and user.is_superuser:
+        return True
+    permissions = get_user_permissions(user)
+    return all(code in permissions for code in codes)
+
+
+def permission_fingerprint(user):
+    """用户权限集合的指纹，权限集合相同的用户得到相同的值"""
+    if user.is_superuser:
+        return 'superuser'
+    permissions = get_user_permissions(user)
+    return hashlib.md5('|'.join(sorted(permissions)).encode()).hexdigest()
@@ -0,0 +1,29 @@
+"""
+权限信号处理
+
+角色、权限定义变更时使全部用户的权限缓存失效；用户角色变更时只清除该用户的缓存。
+"""
+from django.db.models.signals import post_save, post_delete
+
+from .models import Role, Resource, Permission, RolePermission, UserRole
+from .permissions import invalidate_all, invalidate_user
+
+DEFINITION_MODELS = (Role, Resource, Permission, RolePermission)
+
+
+def invalidate_definitions(sender, **kwargs):
+    """角色、资源、权限或角色权限变更后重新编译所有用户的权限"""
+    invalidate_all()
+
+
+def invalidate_user_role(sender, instance, **kwargs):
+    """用户角色变更后清除该用户的权限缓存"""
+    invalidate_user(instance.user_id)
+
+
+for model in DEFINITION_MODELS:
+    post_save.connect(invalidate_definitions, sender=model, dispatch_uid=f'rbac_save_{model.__name__}')
+    post_delete.connect(invalidate_definitions, sender=model, dispatch_uid=f'rbac_delete_{model.__name__}')
+
+post_save.connect(invalidate_user_role, sender=UserRole, dispatch_uid='rbac_save_UserRole')
+post_delete.connect(invalidate_user_role, sender=UserRole, dispatch_uid='rbac_delete_UserRole')
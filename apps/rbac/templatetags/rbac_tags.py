@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from apps.rbac.menu import render_menu
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def sidebar_menu(context):
+    """按当前用户权限渲染侧边栏菜单"""
+    return mark_safe(render_menu(context['request']))
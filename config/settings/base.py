@@ -41,6 +41,7 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,6 +73,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
 DATABASES = {
@@ -81,6 +83,78 @@ DATABASES = {
     }
 }
 
+# 报表分析只读库（见 apps.core.routers）
+# 设置 REPORTING_DATABASE_PATH 后启用，模块页面与 JSON 接口的读查询发往该库；
+# SQLite 副本可由 manage.py sync_reporting_database 定时从 default 复制
+REPORTING_DATABASE_ALIAS = 'reporting'
+REPORTING_DATABASE_PATH = config('REPORTING_DATABASE_PATH', default='')
+REPORTING_DATABASES = {
+    REPORTING_DATABASE_ALIAS: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': REPORTING_DATABASE_PATH,
+        # 测试时与 default 共用测试库
+        'TEST': {'MIRROR': 'default'},
+    },
+} if REPORTING_DATABASE_PATH else {}
+DATABASES.update(REPORTING_DATABASES)
+
+DATABASE_ROUTERS = ['apps.core.routers.ReportingRouter']
+
+# 异步视图并发读取使用的线程数（见 apps.core.concurrency），每个线程各占一个数据库连接
+ASYNC_QUERY_WORKERS = config('ASYNC_QUERY_WORKERS', default=8, cast=int)
+
+# SQLite
+# 每个新建的 SQLite 连接上按顺序执行的 PRAGMA（见 apps.core.db）
+# WAL 模式下读写互不阻塞；写锁被占用时最多等待 busy_timeout 毫秒，而不是立即报 database is locked
+SQLITE_PRAGMAS = {
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-20000, cast=int),  # 负数单位为 KiB，约 20MB
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=268435456, cast=int),  # 256MB
+    'temp_store': config('SQLITE_TEMP_STORE', default='MEMORY'),
+}
+
+# RBAC
+# 为 False 时 @require_permission 只要求登录，分配好角色权限后再开启
+RBAC_ENFORCE_PERMISSIONS = config('RBAC_ENFORCE_PERMISSIONS', default=False, cast=bool)
+
+# Request timing
+# 每个请求输出 Server-Timing 响应头并计入 /portal/api/metrics/ 的滚动统计，超过阈值写慢请求日志
+REQUEST_TIMING_ENABLED = config('REQUEST_TIMING_ENABLED', default=True, cast=bool)
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=500, cast=int)
+REQUEST_METRICS_WINDOW = config('REQUEST_METRICS_WINDOW', default=1000, cast=int)
+
+# Cache
+# 模块页面缓存默认使用进程内存，失效（递增缓存代数）只作用于当前进程；
+# 不使用生产配置而启动多个 worker 时须设置 PORTAL_VIEW_CACHE_BACKEND=file，
+# 否则其他 worker 会在 PORTAL_VIEW_CACHE_TIMEOUT 秒内继续返回变更前的页面
+PORTAL_VIEW_CACHE_ENABLED = config('PORTAL_VIEW_CACHE_ENABLED', default=True, cast=bool)
+PORTAL_VIEW_CACHE_BACKEND = config('PORTAL_VIEW_CACHE_BACKEND', default='locmem')
+PORTAL_VIEW_CACHE_TIMEOUT = config('PORTAL_VIEW_CACHE_TIMEOUT', default=300, cast=int)
+
+if PORTAL_VIEW_CACHE_BACKEND == 'file':
+    PORTAL_VIEW_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('PORTAL_VIEW_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'portal_views')),
+    }
+else:
+    PORTAL_VIEW_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'portal-views',
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yw-portal',
+    },
+    'portal_views': {
+        **PORTAL_VIEW_CACHE,
+        'TIMEOUT': PORTAL_VIEW_CACHE_TIMEOUT,
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -115,6 +189,25 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Announcements
+# 仪表板的有效公告列表在进程内缓存到下一个开始/结束时间点或公告变更；此为最长缓存秒数
+ANNOUNCEMENT_FEED_TIMEOUT = config('ANNOUNCEMENT_FEED_TIMEOUT', default=300, cast=int)
+
+# Document downloads
+# django：由 Django 流式发送；nginx / sendfile：权限检查后用 X-Accel-Redirect / X-Sendfile 交给前端服务器发送
+# nginx 需要配置一个 internal 的 location（DOCUMENT_ACCEL_REDIRECT_PREFIX）指向 MEDIA_ROOT
+DOCUMENT_DOWNLOAD_BACKEND = config('DOCUMENT_DOWNLOAD_BACKEND', default='django')
+DOCUMENT_ACCEL_REDIRECT_PREFIX = config('DOCUMENT_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+# 下载次数合并写入的间隔（秒），0 表示每次下载立即原子递增
+DOCUMENT_DOWNLOAD_FLUSH_INTERVAL = config('DOCUMENT_DOWNLOAD_FLUSH_INTERVAL', default=0, cast=int)
+
+# Delivery anomalies
+# 日报发布时，各城市配送指标与该城市之前 ANOMALY_WINDOW_DAYS 天的中位数比较（稳健Z分数），
+# |Z| 不小于 ANOMALY_Z_THRESHOLD 记为异常；窗口内有效天数少于 ANOMALY_MIN_HISTORY 时不评分
+ANOMALY_WINDOW_DAYS = config('ANOMALY_WINDOW_DAYS', default=28, cast=int)
+ANOMALY_MIN_HISTORY = config('ANOMALY_MIN_HISTORY', default=7, cast=int)
+ANOMALY_Z_THRESHOLD = config('ANOMALY_Z_THRESHOLD', default=3.5, cast=float)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -18,7 +18,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    **REPORTING_DATABASES,
 }
 
 # 日志配置
@@ -34,6 +35,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'timing': {
+            'format': '{asctime} {process:d} {message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'file': {
@@ -47,6 +52,12 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'slow_requests': {
+            'level': 'WARNING',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'slow_requests.log',
+            'formatter': 'timing',
+        },
     },
     'root': {
         'handlers': ['console', 'file'],
@@ -58,5 +69,11 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        # 请求计时中间件的慢请求日志（key=value 格式）
+        'apps.core.timing': {
+            'handlers': ['console', 'slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,104 @@
+import copy
+
+from .base import *
+
+# 生产环境配置
+# 使用方式：DJANGO_SETTINGS_MODULE=config.settings.production（SECRET_KEY、ALLOWED_HOSTS 从环境变量读取）
+DEBUG = False
+
+SECRET_KEY = config('SECRET_KEY')
+
+# 模板配置：缓存已编译的模板，每个进程只解析一次
+# （复制一份，避免修改 base 中与其他配置共享的列表）
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# 数据库配置：持久连接，复用前先做健康检查，避免使用已断开的连接
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': config('DATABASE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+        'CONN_MAX_AGE': config('CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+# WAL、busy_timeout 等连接参数见 base.py 中的 SQLITE_PRAGMAS
+
+# 报表分析只读库（配置 REPORTING_DATABASE_PATH 时）同样使用持久连接
+for alias, options in REPORTING_DATABASES.items():
+    DATABASES[alias] = {**options, 'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'], 'CONN_HEALTH_CHECKS': True}
+
+# 缓存配置
+# gunicorn 多个 worker 需要共享会话、权限版本号与页面缓存代数，使用同一目录下的文件缓存
+CACHE_DIR = config('CACHE_DIR', default=str(BASE_DIR / 'cache'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'default'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'portal_views': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('PORTAL_VIEW_CACHE_DIR', default=os.path.join(CACHE_DIR, 'portal_views')),
+        'TIMEOUT': PORTAL_VIEW_CACHE_TIMEOUT,
+    },
+}
+
+# 会话配置：先读缓存，未命中再查数据库；可通过环境变量改为 signed_cookies（不访问服务器存储）
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
+
+# 安全配置（由 Nginx 终止 HTTPS）
+SESSION_COOKIE_SECURE = config('SESSION_COOKIE_SECURE', default=True, cast=bool)
+CSRF_COOKIE_SECURE = config('CSRF_COOKIE_SECURE', default=True, cast=bool)
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+# 日志配置
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'style': '{',
+        },
+        'timing': {
+            'format': '{asctime} {process:d} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
+        'timing': {
+            'level': 'WARNING',
+            'class': 'logging.StreamHandler',
+            'formatter': 'timing',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'apps.core.timing': {
+            'handlers': ['timing'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
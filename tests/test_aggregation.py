@@ -0,0 +1,84 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from datetime import date, time, timedelta
+from decimal import Decimal
+from apps.portal.models import DailyReport, DeliveryReport
+from apps.portal.aggregation import (
+    published_reports, delivery_city_stats, delivery_daily_stats
+)
+
+User = get_user_model()
+
+
+class DeliveryAggregationTest(TestCase):
+    """配送聚合层测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.today = date.today()
+        for offset in range(3):
+            report = DailyReport.objects.create(
+                report_date=self.today - timedelta(days=offset),
+                reporter=self.user,
+                is_published=True,
+            )
+            for city, cargo in (('LAX', 1000), ('SAN', 500)):
+                DeliveryReport.objects.create(
+                    daily_report=report,
+                    city=city,
+                    cargo_volume=cargo + offset,
+                    box_count=10,
+                    open_time=time(6, 0),
+                    delivery_rate_day1=Decimal('90.00'),
+                    delivery_rate_day2=Decimal('95.00') + offset,
+                    delivery_rate_day3=Decimal('99.00'),
+                    removed_packages=5,
+                    removal_rate=Decimal('1.50'),
+                    exception_notes='航班延误' if offset == 0 and city == 'LAX' else '',
+                )
+        # 未发布的日报不参与统计
+        draft = DailyReport.objects.create(
+            report_date=self.today - timedelta(days=5), reporter=self.user
+        )
+        DeliveryReport.objects.create(
+            daily_report=draft, city='SFO', cargo_volume=1, box_count=1,
+            open_time=time(6, 0), delivery_rate_day1=0, delivery_rate_day2=0,
+            delivery_rate_day3=0, removed_packages=0, removal_rate=0,
+        )
+
+    def test_city_stats_single_query(self):
+        """测试城市汇总只执行一条查询"""
+        queryset = published_reports(DeliveryReport, self.today - timedelta(days=30), self.today)
+        with self.assertNumQueries(1):
+            stats = delivery_city_stats(queryset)
+
+        self.assertEqual(list(stats), ['LAX', 'SAN'])
+        self.assertEqual(stats['LAX']['total_cargo'], 3003)
+        self.assertEqual(stats['LAX']['total_boxes'], 30)
+        self.assertEqual(stats['LAX']['report_count'], 3)
+        self.assertEqual(stats['LAX']['exception_count'], 1)
+        self.assertEqual(stats['SAN']['exception_count'], 0)
+        self.assertEqual(stats['LAX']['avg_delivery_rate_day2'], Decimal('96.00'))
+
+    def test_daily_stats_single_query(self):
+        """测试每日汇总只执行一条查询"""
+        queryset = published_reports(DeliveryReport, self.today - timedelta(days=30), self.today)
+        with self.assertNumQueries(1):
+            stats = delivery_daily_stats(queryset)
+
+        self.assertEqual(list(stats), [self.today - timedelta(days=i) for i in range(3)])
+        self.assertEqual(stats[self.today], {
+            'total_cargo': 1500,
+            'total_boxes': 20,
+            'cities': ['LAX', 'SAN'],
+            'city_count': 2,
+        })
+
+    def test_delivery_module_view_uses_aggregates(self):
+        """测试配送模块视图使用数据库汇总"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/portal/delivery/', {'city': 'LAX'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['city_stats']), ['LAX'])
+        self.assertEqual(len(response.context['daily_stats']), 3)
+        self.assertEqual(response.context['all_cities'], ['LAX', 'SAN'])
@@ -0,0 +1,156 @@
+import math
+import unittest
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.portal import analytics
+from apps.portal.models import DailyReport, DeliveryReport, WarehouseReport
+
+User = get_user_model()
+
+
+@unittest.skipUnless(analytics.is_available(), '需要安装 NumPy')
+class AnalyticsSnapshotTest(TestCase):
+    """列式分析快照测试"""
+
+    def setUp(self):
+        cache.clear()
+        analytics.snapshot.reset()
+        self.addCleanup(analytics.snapshot.reset)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.start = date(2025, 1, 30)
+        for offset in range(4):
+            report = self.daily_report(self.start + timedelta(days=offset))
+            self.delivery(report, 'LAX', Decimal('1.00') + offset)
+            self.delivery(report, 'SFO', Decimal('2.50'))
+            WarehouseReport.objects.create(
+                daily_report=report, contractor_company='Ocean', attendance_count=50,
+                work_type='Regular Sorter', actual_hours=400, cost_per_ticket=Decimal('0.0779'),
+            )
+
+    def daily_report(self, report_date, is_published=True):
+        return DailyReport.objects.create(report_date=report_date, reporter=self.user, is_published=is_published)
+
+    def delivery(self, report, city, removal_rate):
+        return DeliveryReport.objects.create(
+            daily_report=report, city=city, cargo_volume=100, box_count=10, open_time=time(6, 0),
+            delivery_rate_day1=Decimal('90'), delivery_rate_day2=Decimal('95'),
+            delivery_rate_day3=Decimal('99'), removed_packages=1, removal_rate=removal_rate,
+        )
+
+    def series(self, data):
+        return {series['name']: series['values'] for series in data['series']}
+
+    def test_columns_and_dictionary_encoding(self):
+        """测试按列加载，类别字典编码"""
+        table = analytics.snapshot.table('delivery')
+        self.assertEqual(len(table), 8)
+        self.assertEqual(sorted(table.categories), ['LAX', 'SFO'])
+        self.assertEqual(table.codes.dtype.kind, 'i')
+        self.assertEqual(table.columns['removal_rate'].dtype.name, 'float64')
+        self.assertEqual(len(analytics.snapshot.table('warehouse')), 4)
+
+    def test_trend_matches_orm_aggregation(self):
+        """测试按月分组的平均值与 ORM 聚合一致"""
+        data = analytics.trend('removal_rate', 'month')
+        self.assertEqual(data['labels'], ['2025-01', '2025-02'])
+        expected = {}
+        rows = DeliveryReport.objects.values('city', 'report_date__month').annotate(avg=Avg('removal_rate'))
+        for row in rows:
+            expected.setdefault(row['city'], {})[row['report_date__month']] = float(row['avg'])
+        self.assertEqual(self.series(data), {
+            city: [expected[city][1], expected[city][2]] for city in ('LAX', 'SFO')
+        })
+        self.assertEqual(self.series(analytics.trend('cost_per_ticket', 'year')), {'Ocean': [0.0779]})
+
+    def test_granularities_and_date_range(self):
+        """测试周期标签与日期过滤"""
+        self.assertEqual(analytics.trend('cargo_volume', 'quarter')['labels'], ['2025-Q1'])
+        self.assertEqual(analytics.trend('cargo_volume', 'week')['labels'], ['2025-01-27'])
+        data = analytics.trend('cargo_volume', 'day', start_date=date(2025, 2, 1), end_date=date(2025, 2, 1))
+        self.assertEqual(data['labels'], ['2025-02-01'])
+        self.assertEqual(self.series(data), {'LAX': [100.0], 'SFO': [100.0]})
+        with self.assertRaises(analytics.AnalyticsError):
+            analytics.trend('cargo_volume', 'hour')
+
+    def test_rolling_mean(self):
+        """测试滚动平均忽略空值"""
+        matrix = analytics.np.array([[1.0, 2.0, math.nan, 4.0], [math.nan, math.nan, 3.0, 5.0]])
+        result = analytics.rolling_mean(matrix, 2)
+        self.assertEqual(result[0].tolist(), [1.0, 1.5, 2.0, 4.0])
+        self.assertTrue(math.isnan(result[1][0]) and math.isnan(result[1][1]))
+        self.assertEqual(result[1][2:].tolist(), [3.0, 4.0])
+
+    def test_incremental_refresh(self):
+        """测试发布新日报后只加载该日报的行，撤回、删除后移除"""
+        analytics.snapshot.tables()
+        report = self.daily_report(date(2025, 3, 1), is_published=False)
+        self.delivery(report, 'SEA', Decimal('9.00'))
+        self.assertNotIn('SEA', analytics.snapshot.table('delivery').categories)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report.is_published = True
+            report.save()
+        with self.assertNumQueries(3):
+            table = analytics.snapshot.table('delivery')
+        self.assertEqual(len(table), 9)
+        self.assertEqual(self.series(analytics.trend('removal_rate', 'month'))['SEA'], [None, None, 9.0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report.is_published = False
+            report.save()
+        self.assertEqual(len(analytics.snapshot.table('delivery')), 8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DeliveryReport.objects.filter(city='LAX').first().delete()
+        self.assertEqual(len(analytics.snapshot.table('delivery')), 7)
+
+    def test_change_recorded_after_commit(self):
+        """测试变更在事务提交后才记录，其他快照不会在提交前按新序号读到旧行"""
+        other = analytics.AnalyticsSnapshot()
+        other.tables()
+        report = self.daily_report(date(2025, 3, 1), is_published=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.delivery(report, 'SEA', Decimal('9.00'))
+            with transaction.atomic():
+                report.is_published = True
+                report.save()
+            with self.assertNumQueries(0):
+                self.assertEqual(len(other.table('delivery')), 8)
+        self.assertEqual(len(other.table('delivery')), 9)
+
+    def test_full_reload_when_change_log_lost(self):
+        """测试变更日志丢失（缓存被清空）时整体重建"""
+        analytics.snapshot.tables()
+        DeliveryReport.objects.filter(city='SFO').update(removal_rate=Decimal('5.00'))
+        with self.assertNumQueries(0):
+            analytics.snapshot.tables()
+        cache.clear()
+        self.assertEqual(self.series(analytics.trend('removal_rate', 'year'))['SFO'], [5.0])
+
+    @override_settings(RBAC_ENFORCE_PERMISSIONS=False)
+    def test_trend_views(self):
+        """测试趋势页面与API"""
+        self.client.login(username='testuser', password='testpass123')
+        params = {'metric': 'removal_rate', 'start_date': '2025-01-01', 'end_date': '2025-12-31', 'window': 2}
+        response = self.client.get(reverse('portal:trends'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'trend-data')
+
+        response = self.client.get(reverse('portal:trends_api'), params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['labels'], ['2025-01', '2025-02'])
+        self.assertEqual(data['series'][0]['rolling'], [1.5, 2.5])
+
+        response = self.client.get(reverse('portal:trends_api'), {'metric': 'unknown'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('portal:trends_api'), {'granularity': 'hour'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.portal.announcement_feed import AnnouncementFeed, active_announcements, next_boundary
+from apps.portal.models import Announcement
+
+User = get_user_model()
+
+
+class AnnouncementFeedTest(TestCase):
+    """当前有效公告测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.now = timezone.now()
+        self.current = self.announcement('当前公告', priority=1)
+        self.window = self.announcement('限时公告', start_date=self.now - timedelta(hours=1),
+                                        end_date=self.now + timedelta(hours=2))
+        self.future = self.announcement('未来公告', start_date=self.now + timedelta(hours=1))
+        self.expired = self.announcement('过期公告', end_date=self.now - timedelta(minutes=1))
+        self.draft = self.announcement('草稿公告', is_published=False)
+        self.feed = AnnouncementFeed()
+
+    def announcement(self, title, **kwargs):
+        return Announcement.objects.create(title=title, content='内容', author=self.user, **kwargs)
+
+    def titles(self, announcements):
+        return [announcement.title for announcement in announcements]
+
+    def test_active_window(self):
+        """测试只包含已发布且在时间窗口内的公告"""
+        self.assertEqual(self.titles(active_announcements(self.now)), ['当前公告', '限时公告'])
+        later = self.now + timedelta(hours=1, minutes=30)
+        self.assertEqual(self.titles(active_announcements(later)), ['当前公告', '未来公告', '限时公告'])
+        self.assertEqual(next_boundary(self.now), self.future.start_date)
+        self.assertEqual(next_boundary(later), self.window.end_date)
+
+    @override_settings(ANNOUNCEMENT_FEED_TIMEOUT=86400)
+    def test_cached_until_next_boundary(self):
+        """测试缓存命中不查询数据库，到下一个时间点后重新加载"""
+        with self.assertNumQueries(2):
+            self.assertEqual(self.titles(self.feed.get(now=self.now)), ['当前公告', '限时公告'])
+        with self.assertNumQueries(0):
+            self.feed.get(now=self.now + timedelta(minutes=59))
+        with self.assertNumQueries(2):
+            titles = self.titles(self.feed.get(now=self.now + timedelta(hours=1)))
+        self.assertEqual(titles, ['当前公告', '未来公告', '限时公告'])
+
+    def test_max_age(self):
+        """测试没有时间点时最多缓存 ANNOUNCEMENT_FEED_TIMEOUT 秒"""
+        Announcement.objects.filter(start_date__isnull=False).update(start_date=None)
+        Announcement.objects.filter(end_date__isnull=False).update(end_date=None)
+        with self.settings(ANNOUNCEMENT_FEED_TIMEOUT=60):
+            self.feed.get(now=self.now)
+            with self.assertNumQueries(0):
+                self.feed.get(now=self.now + timedelta(seconds=59))
+            with self.assertNumQueries(2):
+                self.feed.get(now=self.now + timedelta(seconds=60))
+
+    def test_invalidated_on_save_and_delete(self):
+        """测试公告保存、删除后重新加载"""
+        self.feed.get(now=self.now)
+        self.current.is_published = False
+        self.current.save()
+        self.assertEqual(self.titles(self.feed.get(now=self.now)), ['限时公告'])
+
+        self.window.delete()
+        self.assertEqual(self.feed.get(now=self.now), [])
+
+    def test_active_index(self):
+        """测试有效公告查询按列表索引顺序扫描，不需要临时排序"""
+        plan = active_announcements(self.now)[:5].explain()
+        self.assertIn('announcement_list_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_views_hide_inactive_announcements(self):
+        """测试仪表板、公告列表与详情页不显示过期、未开始的公告"""
+        self.client.login(username='testuser', password='testpass123')
+        for url in (reverse('portal:dashboard'), reverse('portal:announcements')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, '限时公告')
+                self.assertNotContains(response, '未来公告')
+                self.assertNotContains(response, '过期公告')
+
+        response = self.client.get(reverse('portal:announcement_detail', args=[self.expired.pk]))
+        self.assertRedirects(response, reverse('portal:announcements'))
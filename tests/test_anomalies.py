@@ -0,0 +1,155 @@
+import math
+import time as clock
+import unittest
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.portal import analytics, anomalies
+from apps.portal.models import DailyReport, DeliveryAnomaly, DeliveryReport
+
+User = get_user_model()
+
+
+@unittest.skipUnless(analytics.is_available(), '需要安装 NumPy')
+class DeliveryAnomalyTest(TestCase):
+    """配送指标异常检测测试"""
+
+    def setUp(self):
+        cache.clear()
+        analytics.snapshot.reset()
+        self.addCleanup(analytics.snapshot.reset)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.start = date(2025, 3, 1)
+        for offset in range(20):
+            report = self.daily_report(self.start + timedelta(days=offset))
+            for city in ('LAX', 'SFO'):
+                self.delivery(report, city, Decimal('1.00') + Decimal('0.10') * (offset % 3))
+        self.day = self.start + timedelta(days=20)
+
+    def daily_report(self, report_date, is_published=True):
+        return DailyReport.objects.create(report_date=report_date, reporter=self.user, is_published=is_published)
+
+    def delivery(self, report, city, removal_rate):
+        return DeliveryReport.objects.create(
+            daily_report=report, city=city, cargo_volume=100, box_count=10, open_time=time(6, 0),
+            delivery_rate_day1=Decimal('90'), delivery_rate_day2=Decimal('95'),
+            delivery_rate_day3=Decimal('99'), removed_packages=1, removal_rate=removal_rate,
+        )
+
+    def publish_outlier(self):
+        """发布一份 LAX 移除率明显偏高的日报"""
+        with self.captureOnCommitCallbacks(execute=True):
+            report = self.daily_report(self.day, is_published=False)
+            self.outlier = self.delivery(report, 'LAX', Decimal('9.00'))
+            self.delivery(report, 'SFO', Decimal('1.10'))
+        with self.captureOnCommitCallbacks(execute=True):
+            report.is_published = True
+            report.save()
+        return report
+
+    def test_robust_scores(self):
+        """测试稳健Z分数只用之前的窗口，不受窗口内个别极端值影响"""
+        np = analytics.np
+        matrix = np.array([[1.0, 1.1, 0.9, 50.0, 1.0, 1.1, 0.9, 1.0, 9.0]])
+        baseline, scores = anomalies.robust_scores(matrix, window=8, min_history=3)
+        self.assertTrue(np.isnan(scores[0, :3]).all())
+        self.assertGreater(scores[0, 3], 100)
+        self.assertEqual(baseline[0, 8], 1.0)
+        self.assertGreater(scores[0, 8], 50)
+        self.assertLess(abs(scores[0, 7]), 1)
+
+    def test_flagged_on_publish(self):
+        """测试日报发布后标记异常，撤回发布后清除"""
+        report = self.publish_outlier()
+        anomaly = DeliveryAnomaly.objects.get()
+        self.assertEqual(
+            (anomaly.daily_report_id, anomaly.report_date, anomaly.city, anomaly.metric),
+            (report.pk, self.day, 'LAX', 'removal_rate'),
+        )
+        self.assertEqual(anomaly.value, 9.0)
+        self.assertEqual(anomaly.baseline, 1.1)
+        self.assertGreater(anomaly.score, 3.5)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            report.is_published = False
+            report.save()
+        self.assertEqual(len([callback for callback in callbacks if hasattr(callback, 'anomaly_report_id')]), 1)
+        self.assertFalse(DeliveryAnomaly.objects.exists())
+
+    def test_scheduled_once_per_atomic_block(self):
+        """测试同一 atomic 块内只安排一次检测，嵌套块回滚后重新安排"""
+        report = self.daily_report(self.day)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(ValueError), transaction.atomic():
+                anomalies.schedule_detection(report.pk)
+                raise ValueError
+            anomalies.schedule_detection(report.pk)
+            anomalies.schedule_detection(report.pk)
+        self.assertEqual([callback.anomaly_report_id for callback in callbacks], [report.pk])
+
+    def test_rescored_when_delivery_report_changes(self):
+        """测试已发布日报的配送报表修改后重新检测"""
+        self.publish_outlier()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.outlier.removal_rate = Decimal('1.10')
+            self.outlier.save()
+        self.assertFalse(DeliveryAnomaly.objects.exists())
+
+    @override_settings(ANOMALY_Z_THRESHOLD=100)
+    def test_threshold_setting(self):
+        """测试阈值可配置"""
+        self.publish_outlier()
+        self.assertFalse(DeliveryAnomaly.objects.exists())
+
+    def test_detect_range(self):
+        """测试回填历史数据与增量检测结果一致"""
+        report = self.publish_outlier()
+        DeliveryAnomaly.objects.all().delete()
+        self.assertEqual(anomalies.detect_range(self.start, self.day), 1)
+        self.assertEqual(DeliveryAnomaly.objects.get().daily_report_id, report.pk)
+
+    @override_settings(RBAC_ENFORCE_PERMISSIONS=False)
+    def test_views(self):
+        """测试配送模块页面与异常API"""
+        self.publish_outlier()
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('portal:delivery_module'), {'date': self.day.isoformat()})
+        self.assertContains(response, '指标异常')
+        self.assertContains(response, '移除率(%)')
+
+        url = reverse('portal:delivery_anomalies_api')
+        response = self.client.get(url, {'start_date': '2025-03-01', 'end_date': '2025-03-31'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['anomalies']
+        self.assertEqual([(item['city'], item['metric']) for item in data], [('LAX', 'removal_rate')])
+        self.assertEqual(data[0]['report_date'], self.day.isoformat())
+
+        response = self.client.get(url, {'start_date': '2025-03-01', 'end_date': '2025-03-31', 'city': 'SFO'})
+        self.assertEqual(response.json()['anomalies'], [])
+        self.assertEqual(self.client.get(url, {'start_date': '20250301'}).status_code, 400)
+
+    def test_scoring_a_year_is_fast(self):
+        """测试一年、全部城市的评分在发布时可以同步完成"""
+        np = analytics.np
+        rng = np.random.default_rng(0)
+        cities, days = 20, 365 + 28
+        table = analytics.ColumnTable(
+            spec=None,
+            report_ids=np.repeat(np.arange(days), cities),
+            days=np.datetime64('2024-01-01') + np.repeat(np.arange(days), cities),
+            codes=np.tile(np.arange(cities, dtype=np.int32), days),
+            columns={'removal_rate': rng.normal(1.0, 0.1, cities * days)},
+            categories=[f'C{code}' for code in range(cities)],
+        )
+        start = clock.perf_counter()
+        names, matrix = anomalies.city_day_matrix(table, 'removal_rate', date(2024, 1, 1), date(2025, 1, 27))
+        baseline, scores = anomalies.robust_scores(matrix, 28, 7)
+        self.assertLess(clock.perf_counter() - start, 1.0)
+        self.assertEqual(scores.shape, (cities, days))
+        self.assertFalse(math.isnan(scores[0, -1]))
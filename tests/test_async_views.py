@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, SimpleTestCase, TestCase
+
+from apps.core import instrumentation
+from apps.core.concurrency import gather_queries
+from apps.portal import views
+from apps.portal.models import Announcement, DailyReport, WarehouseReport
+
+User = get_user_model()
+
+
+class GatherQueriesTest(SimpleTestCase):
+    """并发读取测试"""
+
+    def test_runs_concurrently(self):
+        """测试可以并发读取时各函数在不同线程同时执行，总耗时接近最慢的一项"""
+        def slow(value):
+            def run():
+                time.sleep(0.2)
+                return value, threading.get_ident()
+            return run
+
+        with mock.patch('apps.core.concurrency.can_query_concurrently', return_value=True):
+            start = time.perf_counter()
+            results = asyncio.run(gather_queries(slow(1), slow(2), slow(3)))
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual([value for value, _ in results], [1, 2, 3])
+        self.assertEqual(len({thread for _, thread in results}), 3)
+        self.assertLess(elapsed, 0.5)
+
+    def test_sql_stats_merged_across_threads(self):
+        """测试多个线程同时执行的查询全部计入同一请求的统计"""
+        def queries():
+            stats = instrumentation.current()
+            for _ in range(2000):
+                stats.sql_wrapper(lambda *args: None, 'SELECT 1', None, False, {})
+
+        stats, token = instrumentation.start()
+        try:
+            with mock.patch('apps.core.concurrency.can_query_concurrently', return_value=True):
+                asyncio.run(gather_queries(*[queries] * 8))
+        finally:
+            instrumentation.stop(token)
+        self.assertEqual(stats.sql_count, 16000)
+
+
+class AsyncViewsTest(TestCase):
+    """异步视图测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        report = DailyReport.objects.create(report_date=date.today(), reporter=self.user, is_published=True)
+        WarehouseReport.objects.create(
+            daily_report=report, contractor_company='Ocean', attendance_count=50,
+            work_type='Regular Sorter', actual_hours=400, cost_per_ticket=Decimal('0.0779'),
+            exception_notes='人员不足',
+        )
+        Announcement.objects.create(title='系统维护通知', content='内容', author=self.user)
+        self.async_client.force_login(self.user)
+
+    def test_views_are_async(self):
+        """测试仪表板与异常处理视图是异步视图"""
+        self.assertTrue(asyncio.iscoroutinefunction(views.dashboard_view))
+        self.assertTrue(asyncio.iscoroutinefunction(views.exception_handling_module_view))
+
+    async def test_dashboard(self):
+        """测试通过异步客户端访问仪表板"""
+        response = await self.async_client.get('/portal/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '系统维护通知')
+
+    async def test_exception_handling_module(self):
+        """测试通过异步客户端访问异常处理模块，无效游标回到第一页"""
+        response = await self.async_client.get('/portal/exception-handling/', {'cursor': 'bad'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '人员不足')
+
+    async def test_login_required(self):
+        """测试未登录访问异步视图跳转登录页"""
+        response = await AsyncClient().get('/portal/')
+        self.assertRedirects(response, '/login/?next=/portal/', fetch_redirect_response=False)
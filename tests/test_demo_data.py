@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from datetime import date, timedelta
+from apps.portal.demo_data import generate_demo_reports
+from apps.portal.models import DailyReport, DeliveryReport, WarehouseReport, PickupReport
+
+User = get_user_model()
+
+
+class DemoDataTest(TestCase):
+    """演示数据生成测试"""
+
+    def test_same_seed_same_values(self):
+        """测试相同种子生成相同数据，重复执行不重复写入"""
+        generate_demo_reports(days=3, seed=1)
+        first = list(DeliveryReport.objects.order_by('report_date', 'city').values_list(
+            'report_date', 'city', 'cargo_volume', 'removal_rate', 'exception_notes'
+        ))
+        self.assertEqual(generate_demo_reports(days=3, seed=1), [])
+        self.assertEqual(DailyReport.objects.count(), 3)
+
+        DailyReport.objects.all().delete()
+        generate_demo_reports(days=3, seed=1)
+        second = list(DeliveryReport.objects.order_by('report_date', 'city').values_list(
+            'report_date', 'city', 'cargo_volume', 'removal_rate', 'exception_notes'
+        ))
+        self.assertEqual(first, second)
+
+
+class ModuleViewsFromDatabaseTest(TestCase):
+    """模块页面读取数据库数据测试"""
+
+    def setUp(self):
+        caches['portal_views'].clear()
+        generate_demo_reports(days=7)
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_warehouse_module(self):
+        """测试仓内页面统计与数据库一致"""
+        response = self.client.get('/portal/warehouse/')
+        self.assertEqual(response.status_code, 200)
+        today = WarehouseReport.objects.filter(report_date=date.today())
+        self.assertEqual(len(response.context['warehouse_data']), WarehouseReport.objects.count())
+        self.assertEqual(response.context['total_companies'], today.count())
+        self.assertEqual(
+            response.context['total_attendance'],
+            sum(today.values_list('attendance_count', flat=True)),
+        )
+        self.assertEqual(set(response.context['company_stats']), {'HR Solution', 'Ocean'})
+
+    def test_delivery_module_is_stable(self):
+        """测试配送页面数据来自数据库，多次访问结果一致"""
+        first = self.client.get('/portal/delivery/', {'city': 'LAX'}).context['delivery_data']
+        caches['portal_views'].clear()
+        second = self.client.get('/portal/delivery/', {'city': 'LAX'}).context['delivery_data']
+        self.assertEqual(first, second)
+        self.assertEqual(
+            [row['cargo_volume'] for row in first],
+            list(DeliveryReport.objects.filter(report_date=date.today(), city='LAX')
+                 .values_list('cargo_volume', flat=True)),
+        )
+
+    def test_pickup_module_skips_unpublished(self):
+        """测试换单揽收页面只显示已发布日报"""
+        DailyReport.objects.filter(report_date=date.today() - timedelta(days=1)).update(is_published=False)
+        response = self.client.get('/portal/pickup/')
+        self.assertEqual(len(response.context['pickup_data']), PickupReport.objects.count() - 1)
+        self.assertEqual(response.context['today_pickup_data'][0]['return_count_formatted'], '3.949W')
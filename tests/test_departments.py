@@ -0,0 +1,58 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from apps.portal.models import Department
+
+User = get_user_model()
+
+
+class DepartmentHierarchyTest(TestCase):
+    """部门层级（物化路径）测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.company = Department.objects.create(name='公司', manager=self.user)
+        self.operations = Department.objects.create(name='运营部', parent=self.company, manager=self.user)
+        self.lax = Department.objects.create(name='LAX站点', parent=self.operations)
+        self.finance = Department.objects.create(name='财务部', parent=self.company)
+
+    def test_path_and_helpers(self):
+        """测试路径维护与上下级查询"""
+        self.assertEqual(self.lax.depth, 2)
+        self.assertTrue(self.lax.path.startswith(self.operations.path))
+        with self.assertNumQueries(1):
+            descendants = set(self.company.get_descendants().values_list('name', flat=True))
+        self.assertEqual(descendants, {'运营部', 'LAX站点', '财务部'})
+        with self.assertNumQueries(1):
+            breadcrumb = [d.name for d in self.lax.get_ancestors(include_self=True)]
+        self.assertEqual(breadcrumb, ['公司', '运营部', 'LAX站点'])
+
+    def test_move_subtree(self):
+        """测试移动部门时下级部门路径同步更新"""
+        self.operations.parent = self.finance
+        self.operations.save()
+        self.lax.refresh_from_db()
+        self.assertEqual(self.lax.depth, 3)
+        self.assertEqual(
+            [d.name for d in self.lax.get_ancestors()], ['公司', '财务部', '运营部']
+        )
+        self.assertEqual(set(self.finance.get_descendants().values_list('name', flat=True)), {'运营部', 'LAX站点'})
+
+    def test_rejects_cycle(self):
+        """测试不能把部门移到自己的下级部门下"""
+        self.company.parent = self.lax
+        with self.assertRaises(ValueError):
+            self.company.save()
+        self.company.refresh_from_db()
+        self.assertIsNone(self.company.parent_id)
+
+    def test_departments_view_single_query(self):
+        """测试部门页面一条查询加载完整部门树与部门经理"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/portal/departments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([d.name for d in response.context['departments']], ['公司'])
+        self.assertContains(response, 'LAX站点')
+        with self.assertNumQueries(1):
+            tree = Department.tree()
+            names = [child.manager and child.manager.username for child in tree[0].tree_children]
+        self.assertEqual(names, [None, 'testuser'])
@@ -0,0 +1,203 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+from urllib.parse import unquote
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from apps.portal import downloads
+from apps.portal.downloads import DownloadCounter, download_counter, parse_range
+from apps.portal.models import Document
+
+User = get_user_model()
+
+CONTENT = bytes(range(256)) * 40
+
+
+class DocumentFilesMixin:
+    """文档文件写入临时 MEDIA_ROOT"""
+
+    def use_temp_media(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def create_document(self, user, is_public=True, name='手册.pdf'):
+        document = Document(title='操作手册', category='流程', uploaded_by=user, is_public=is_public)
+        document.file.save(name, ContentFile(CONTENT), save=False)
+        document.save()
+        return document
+
+
+class DocumentDownloadTest(DocumentFilesMixin, TestCase):
+    """文档下载测试"""
+
+    def setUp(self):
+        self.use_temp_media()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.document = self.create_document(self.user)
+        self.url = reverse('portal:document_download', args=[self.document.pk])
+        self.client.login(username='testuser', password='testpass123')
+
+    def download_count(self):
+        self.document.refresh_from_db()
+        return self.document.download_count
+
+    def test_full_download(self):
+        """测试完整下载：流式响应、附件文件名与下载次数"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn("filename*=utf-8''", response['Content-Disposition'])
+        self.assertEqual(self.download_count(), 1)
+
+    def test_range_requests(self):
+        """测试 Range 请求：只有从第0字节开始的片段计数"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-99')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[:100])
+        self.assertEqual(response['Content-Range'], f'bytes 0-99/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '100')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[100:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-10:])
+        self.assertEqual(self.download_count(), 1)
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_conditional_requests(self):
+        """测试 If-Modified-Since 返回304不计数，过期的 If-Range 返回完整文件"""
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.download_count(), 1)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+
+    def test_permissions(self):
+        """测试未登录跳转登录页，非公开文档只有上传者与管理员可下载"""
+        private = self.create_document(self.user, is_public=False)
+        private_url = reverse('portal:document_download', args=[private.pk])
+        self.assertEqual(self.client.get(private_url).status_code, 200)
+
+        User.objects.create_user(username='other', password='testpass123')
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(self.client.get(private_url).status_code, 404)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login/', response.url)
+
+    def test_missing_file(self):
+        """测试文件已被删除时返回404"""
+        self.document.file.delete(save=False)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(DOCUMENT_DOWNLOAD_BACKEND='nginx', DOCUMENT_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect(self):
+        """测试交给 nginx 发送文件"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertTrue(response['X-Accel-Redirect'].startswith('/protected-media/documents/'))
+        self.assertNotIn('Content-Type', response)
+        self.assertEqual(self.download_count(), 1)
+
+    @override_settings(DOCUMENT_DOWNLOAD_BACKEND='sendfile')
+    def test_sendfile(self):
+        """测试交给 Apache / lighttpd 发送文件"""
+        response = self.client.get(self.url)
+        self.assertEqual(unquote(response['X-Sendfile']), self.document.file.path)
+
+    def test_batched_counter(self):
+        """测试进程内累计的下载次数合并写入"""
+        counter = DownloadCounter(interval=3600)
+        for _ in range(3):
+            counter.record(self.document.pk)
+        self.assertEqual(self.download_count(), 0)
+        self.assertEqual(counter.pending(), {self.document.pk: 3})
+        self.assertEqual(counter.flush(), 3)
+        self.assertEqual(self.download_count(), 3)
+        self.assertEqual(counter.pending(), {})
+
+    def test_exit_flush_failure_logged(self):
+        """测试进程退出时写入失败记录日志"""
+        with mock.patch.object(download_counter, 'flush', side_effect=RuntimeError('db gone')), \
+                self.assertLogs('apps.portal.downloads', 'ERROR') as logs:
+            downloads._flush_on_exit()
+        self.assertIn('写入下载计数失败', logs.output[0])
+
+    def test_parse_range(self):
+        """测试 Range 请求头解析"""
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=2-100', 10), (2, 9))
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 9))
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+        self.assertIsNone(parse_range('bytes=5-2', 10))
+        self.assertIsNone(parse_range('', 10))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=10-', 10)
+
+
+class ConcurrentDownloadCountTest(DocumentFilesMixin, TransactionTestCase):
+    """并发下载计数测试"""
+
+    def setUp(self):
+        self.use_temp_media()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.document = self.create_document(self.user)
+
+    def download_count(self):
+        return Document.objects.get(pk=self.document.pk).download_count
+
+    def test_concurrent_downloads_are_all_counted(self):
+        """测试多个线程同时计数不会丢失"""
+        def download():
+            try:
+                for _ in range(10):
+                    download_counter.record(self.document.pk)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=download) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.download_count, 40)
+
+    def test_batched_counter_flushed_by_timer(self):
+        """测试没有新的下载时，累计的计数也会由定时器写入"""
+        counter = DownloadCounter(interval=0.05)
+        counter.record(self.document.pk)
+        counter.record(self.document.pk)
+        deadline = time.monotonic() + 5
+        while self.download_count() != 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.download_count(), 2)
+        self.assertEqual(counter.pending(), {})
@@ -0,0 +1,111 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from datetime import date, time, timedelta
+from decimal import Decimal
+from apps.portal.models import DailyReport, DeliveryReport, WarehouseReport, CostReport
+from apps.portal.exception_feed import (
+    exception_page, merge_source_rows, source_querysets, InvalidCursor, decode_cursor
+)
+
+User = get_user_model()
+
+
+class ExceptionFeedTest(TestCase):
+    """异常信息流测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.today = date.today()
+        for offset in range(3):
+            report = DailyReport.objects.create(
+                report_date=self.today - timedelta(days=offset),
+                reporter=self.user,
+                is_published=True,
+            )
+            for city in ('LAX', 'SAN'):
+                DeliveryReport.objects.create(
+                    daily_report=report, city=city, cargo_volume=100, box_count=10,
+                    open_time=time(6, 0), delivery_rate_day1=Decimal('90'),
+                    delivery_rate_day2=Decimal('95'), delivery_rate_day3=Decimal('99'),
+                    removed_packages=1, removal_rate=Decimal('1.0'),
+                    exception_notes=f'{city}分箱积压',
+                )
+            WarehouseReport.objects.create(
+                daily_report=report, contractor_company='Ocean', attendance_count=50,
+                work_type='Regular Sorter', actual_hours=400,
+                cost_per_ticket=Decimal('0.0779'), exception_notes='人员不足',
+            )
+            CostReport.objects.create(
+                daily_report=report, cost_category='人工', planned_cost=100,
+                actual_cost=110, variance=10, variance_rate=10, exception_notes='',
+            )
+
+    def test_single_union_query(self):
+        """测试全部模块只执行一条查询"""
+        with self.assertNumQueries(1):
+            rows, next_cursor = exception_page(self.today - timedelta(days=7), self.today)
+
+        self.assertIsNone(next_cursor)
+        self.assertEqual(len(rows), 9)
+        self.assertEqual(
+            [(row['module'], row['item']) for row in rows[:3]],
+            [('配送管理', 'LAX配送'), ('配送管理', 'SAN配送'), ('仓内管理', 'Ocean')],
+        )
+        self.assertEqual([row['report_date'] for row in rows], sorted(
+            (row['report_date'] for row in rows), reverse=True
+        ))
+
+    def test_cursor_pagination_covers_all_rows(self):
+        """测试游标分页不重复、不遗漏"""
+        start_date = self.today - timedelta(days=7)
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = exception_page(start_date, self.today, cursor=cursor, page_size=2)
+            seen.extend((row['source'], row['id']) for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(len(set(seen)), 9)
+
+    def test_merged_source_pages_match_union(self):
+        """测试各来源分别取一页再归并的结果与 UNION ALL 查询逐页相同"""
+        start_date = self.today - timedelta(days=7)
+        cursor = None
+        while True:
+            expected = exception_page(start_date, self.today, cursor=cursor, page_size=2)
+            row_lists = [
+                list(queryset.order_by('-report_date', 'id')[:3])
+                for queryset in source_querysets(start_date, self.today, cursor and decode_cursor(cursor))
+            ]
+            self.assertEqual(merge_source_rows(row_lists, 2), expected)
+            cursor = expected[1]
+            if cursor is None:
+                break
+
+    def test_invalid_cursor(self):
+        """测试无效游标"""
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor')
+
+    def test_exception_feed_api(self):
+        """测试异常信息流API"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/portal/api/exceptions/', {'page_size': 5})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNotNone(data['next_cursor'])
+
+        response = self.client.get('/portal/api/exceptions/', {'cursor': data['next_cursor']})
+        self.assertEqual(len(response.json()['results']), 4)
+
+        response = self.client.get('/portal/api/exceptions/', {'cursor': 'bad'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_exception_handling_module_view(self):
+        """测试异常处理模块视图"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/portal/exception-handling/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '人员不足')
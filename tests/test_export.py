@@ -0,0 +1,85 @@
+import csv
+import io
+import zipfile
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from datetime import date, time, timedelta
+from decimal import Decimal
+from apps.portal.export import export_permission, export_rows
+from apps.portal.importer import REPORT_TYPES
+from apps.portal.models import DailyReport, DeliveryReport, WarehouseReport
+from apps.rbac.models import Permission
+
+User = get_user_model()
+
+
+class ReportExportTest(TestCase):
+    """报表导出测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.today = date.today()
+        for offset, published in ((0, True), (1, True), (2, False)):
+            report = DailyReport.objects.create(
+                report_date=self.today - timedelta(days=offset), reporter=self.user, is_published=published
+            )
+            for city in ('LAX', 'SAN'):
+                DeliveryReport.objects.create(
+                    daily_report=report, city=city, cargo_volume=100 + offset, box_count=10,
+                    open_time=time(6, 0), delivery_rate_day1=Decimal('90'),
+                    delivery_rate_day2=Decimal('95'), delivery_rate_day3=Decimal('99'),
+                    removed_packages=1, removal_rate=Decimal('1.50'), exception_notes='含,逗号',
+                )
+            WarehouseReport.objects.create(
+                daily_report=report, contractor_company='Ocean', attendance_count=50,
+                work_type='Regular Sorter', actual_hours=500, hourly_rate=20, cost_per_ticket=Decimal('0.0779'),
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_export_rows_single_query(self):
+        """测试导出只执行一条分块查询"""
+        headers, rows = export_rows('delivery', self.today - timedelta(days=7), self.today, city='LAX')
+        with self.assertNumQueries(1):
+            rows = list(rows)
+        self.assertEqual(headers[:2], ['报告日期', '配送城市'])
+        self.assertEqual([row[0] for row in rows], [self.today - timedelta(days=1), self.today])
+
+    def test_csv_export_honours_filters(self):
+        """测试CSV导出按城市、日期过滤且只包含已发布日报"""
+        response = self.client.get('/portal/export/delivery/', {'city': 'SAN'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row[1] for row in rows[1:]}, {'SAN'})
+        self.assertEqual(rows[1][-1], '含,逗号')
+
+        response = self.client.get('/portal/export/delivery/', {'date': self.today.isoformat()})
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertEqual(len(list(csv.reader(io.StringIO(content)))), 3)
+
+    def test_xlsx_export_includes_computed_total_cost(self):
+        """测试XLSX导出为有效工作簿并包含计算的总成本"""
+        response = self.client.get('/portal/export/warehouse/', {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('总成本', sheet)
+        self.assertIn('<v>10000</v>', sheet)
+        self.assertEqual(sheet.count('<row '), 3)
+
+    def test_bad_params(self):
+        """测试未知类型返回404，参数错误返回400"""
+        self.assertEqual(self.client.get('/portal/export/unknown/').status_code, 404)
+        self.assertEqual(self.client.get('/portal/export/delivery/', {'format': 'pdf'}).status_code, 400)
+        self.assertEqual(self.client.get('/portal/export/delivery/', {'date': 'bad'}).status_code, 400)
+
+    def test_every_report_type_has_seeded_permission(self):
+        """测试每种可导出的报表类型都对应菜单数据迁移写入的 read 权限"""
+        self.assertEqual(export_permission('exchange_order'), 'pickup.read')
+        for report_type in REPORT_TYPES:
+            with self.subTest(report_type=report_type):
+                self.assertTrue(Permission.objects.filter(permission_code=export_permission(report_type)).exists())
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from datetime import date, timedelta
+from decimal import Decimal
+from apps.portal.importer import system_reporter
+from apps.portal.models import (
+    DailyReport, DeliveryReport, WarehouseReport, PickupReport, DailyKpiRollup
+)
+
+DELIVERY_HEADER = (
+    'report_date,city,cargo_volume,box_count,open_time,site_situation,'
+    'delivery_rate_day1,delivery_rate_day2,delivery_rate_day3,'
+    'removed_packages,removal_rate,exception_notes\n'
+)
+
+
+class ImportDailyReportTest(TestCase):
+    """日报批量导入测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        system_reporter()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def delivery_csv(self, days, cities):
+        lines = [DELIVERY_HEADER]
+        for offset in range(days):
+            day = date(2025, 1, 1) + timedelta(days=offset)
+            for city in cities:
+                lines.append(f'{day},{city},100,10,06:00,,95.5,97,99,2,1.25,\n')
+        return self.write(f'delivery_{days}_{len(cities)}.csv', ''.join(lines))
+
+    def import_queries(self, *args, **options):
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('import_daily_report', *args, stdout=open(os.devnull, 'w'), **options)
+        return len(ctx.captured_queries)
+
+    def test_csv_import_prefills_report_date_and_rollup(self):
+        """测试CSV导入填入报告日期并维护KPI汇总"""
+        path = self.delivery_csv(2, ['LAX', 'SAN'])
+        self.import_queries(path, type='delivery', publish=True)
+
+        self.assertEqual(DailyReport.objects.filter(is_published=True).count(), 2)
+        self.assertEqual(DeliveryReport.objects.filter(report_date=date(2025, 1, 2)).count(), 2)
+        report = DeliveryReport.objects.get(report_date=date(2025, 1, 1), city='LAX')
+        self.assertEqual(report.daily_report.report_date, report.report_date)
+        self.assertEqual(report.removal_rate, Decimal('1.25'))
+        rollup = DailyKpiRollup.objects.get(report_date=date(2025, 1, 1), module='delivery')
+        self.assertEqual(rollup.cargo_volume, 200)
+
+    def test_queries_scale_with_days_not_rows(self):
+        """测试查询次数只与天数有关，与每天的行数无关"""
+        few = self.import_queries(self.delivery_csv(2, ['LAX']), type='delivery')
+        DailyReport.objects.all().delete()
+        many = self.import_queries(
+            self.delivery_csv(2, ['LAX', 'SAN', 'SFO', 'SEA', 'ONT', 'PHX']), type='delivery'
+        )
+        self.assertEqual(few, many)
+
+    def test_json_import_multiple_types(self):
+        """测试JSON按报表类型分组导入，并计算仓内总成本"""
+        path = self.write('report.json', json.dumps({
+            'warehouse': [{
+                'report_date': '2025-01-01', '劳务公司': 'Ocean', 'attendance_count': 50,
+                'work_type': 'Regular Sorter', 'actual_hours': 500, 'cost_per_ticket': '0.0779',
+            }],
+            'pickup': [{
+                'report_date': '2025-01-01', 'pickup_area': 'LAX',
+                'pickup_situation': '/', 'return_count': 39490,
+            }],
+        }))
+        self.import_queries(path)
+        warehouse = WarehouseReport.objects.get()
+        self.assertEqual(warehouse.contractor_company, 'Ocean')
+        self.assertEqual(warehouse.total_cost, Decimal('10000'))
+        self.assertEqual(PickupReport.objects.get().report_date, date(2025, 1, 1))
+
+    def test_invalid_row_reports_line(self):
+        """测试校验失败时报告行号"""
+        path = self.write('bad.csv', DELIVERY_HEADER + '2025-01-01,LAX,abc,10,06:00,,95,97,99,2,1.25,\n')
+        with self.assertRaisesMessage(CommandError, '第2行'):
+            self.import_queries(path, type='delivery')
+        self.assertFalse(DeliveryReport.objects.exists())
+
+    def test_replace_and_dry_run(self):
+        """测试重复导入替换已有数据，仅校验时不写入"""
+        path = self.delivery_csv(1, ['LAX', 'SAN'])
+        self.import_queries(path, type='delivery', dry_run=True)
+        self.assertFalse(DailyReport.objects.exists())
+        self.import_queries(path, type='delivery')
+        self.import_queries(path, type='delivery', replace=True)
+        self.assertEqual(DeliveryReport.objects.count(), 2)
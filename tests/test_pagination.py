@@ -0,0 +1,108 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from datetime import date, timedelta
+from apps.portal.models import Announcement, DailyReport
+from apps.portal.pagination import CursorPaginator, InvalidCursor, decode_cursor
+
+User = get_user_model()
+
+
+class CursorPaginationTest(TestCase):
+    """游标分页测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        created_at = timezone.now()
+        for index in range(23):
+            announcement = Announcement.objects.create(
+                title=f'公告{index}', content='内容', author=self.user, priority=index % 3,
+            )
+            # 制造相同的 (priority, created_at)，验证 id 兜底排序
+            Announcement.objects.filter(pk=announcement.pk).update(
+                created_at=created_at - timedelta(minutes=index // 4)
+            )
+        self.ordering = ('-priority', '-created_at', '-id')
+        self.expected = list(
+            Announcement.objects.order_by(*self.ordering).values_list('pk', flat=True)
+        )
+
+    def paginator(self):
+        return CursorPaginator(Announcement.objects.filter(is_published=True), self.ordering, page_size=5)
+
+    def test_walk_forward_and_back(self):
+        """测试逐页向后、再逐页向前翻页得到与完整排序一致的结果"""
+        pages = []
+        page = self.paginator().page()
+        self.assertFalse(page.has_previous)
+        while True:
+            pages.append([announcement.pk for announcement in page])
+            if not page.has_next:
+                break
+            page = self.paginator().page(page.next_cursor)
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertEqual(len(pages), 5)
+
+        for expected in reversed(pages[:-1]):
+            page = self.paginator().page(page.previous_cursor)
+            self.assertEqual([announcement.pk for announcement in page], expected)
+            self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+
+    def test_deep_page_single_query(self):
+        """测试任意深度的页面都只执行一条查询"""
+        page = self.paginator().page()
+        for _ in range(3):
+            page = self.paginator().page(page.next_cursor)
+        with self.assertNumQueries(1):
+            self.paginator().page(page.next_cursor)
+
+    def test_deep_page_uses_index(self):
+        """测试翻页查询直接在列表索引上定位起点，不需要临时排序"""
+        page = self.paginator().page()
+        paginator = self.paginator()
+        _, keys = paginator._parse(page.next_cursor)
+        plan = paginator.queryset.filter(paginator._after(keys)).order_by(*self.ordering)[:6].explain()
+        self.assertIn('announcement_list_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_approximate_total_cached(self):
+        """测试近似总数在缓存有效期内不再重复计数"""
+        self.assertEqual(self.paginator().page(with_total=True).total, 23)
+        Announcement.objects.create(title='新公告', content='内容', author=self.user)
+        with self.assertNumQueries(1):
+            page = self.paginator().page(with_total=True)
+        self.assertEqual(page.total, 23)
+
+    def test_invalid_cursor(self):
+        """测试无法解析的游标"""
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor')
+        with self.assertRaises(InvalidCursor):
+            self.paginator().page('WyJuIl0')
+
+    def test_daily_reports_view(self):
+        """测试日报列表按游标翻页，无效游标回到第一页"""
+        for offset in range(12):
+            DailyReport.objects.create(
+                report_date=date.today() - timedelta(days=offset), reporter=self.user, is_published=True,
+            )
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('portal:daily_reports')
+
+        response = self.client.get(url)
+        first = response.context['page_obj']
+        self.assertEqual(len(first), 10)
+        self.assertContains(response, '共约 12 条')
+
+        response = self.client.get(url, {'cursor': first.next_cursor})
+        second = response.context['page_obj']
+        self.assertEqual([report.report_date for report in second],
+                         [date.today() - timedelta(days=offset) for offset in (10, 11)])
+        self.assertFalse(second.has_next)
+
+        response = self.client.get(url, {'cursor': 'bad'})
+        self.assertEqual(len(response.context['page_obj']), 10)
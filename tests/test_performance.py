@@ -0,0 +1,224 @@
+"""
+门户页面性能回归测试
+
+以一年的真实规模数据（365天 × 8个城市 × 10类子报表）为基础，对 apps/portal/urls.py
+中的每个路由断言 SQL 查询次数上限与耗时上限。逐日报循环查询之类的 N+1 问题会使
+查询次数随天数增长，从而在这里失败。
+
+查询次数上限按当前实现给出：数据规模与日期范围无关的页面不应随数据增长而增加查询。
+耗时上限留有较大余量，只用于发现数量级上的退化；可通过环境变量
+PORTAL_PERF_TIME_SCALE 按运行环境整体放宽。
+"""
+import os
+import random
+import shutil
+import tempfile
+import time as clock
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.portal import analytics
+from apps.portal.models import (
+    Announcement, Document, DailyReport, DeliveryReport, WarehouseReport, PickupReport,
+    AirTransportReport, LinehaulReport, ChangeOrderChannel, SortingMachineReport,
+    EquipmentReport, QualityReport, CostReport
+)
+from apps.portal.rollup import rebuild_rollups
+from apps.portal.search import rebuild_search_index
+
+User = get_user_model()
+
+DAYS = 365
+CITIES = ('LAX', 'SAN', 'SFO', 'SEA', 'JFK', 'ATL', 'MIA', 'ORD')
+
+TIME_SCALE = float(os.environ.get('PORTAL_PERF_TIME_SCALE', '1'))
+
+
+def _decimal(rng, low, high):
+    return Decimal(f'{rng.uniform(low, high):.2f}')
+
+
+def _notes(rng):
+    return rng.choice(('', '', '', '', '', '', '', '', '', '人手不足'))
+
+
+# 子报表模型 -> 按 (随机数, 城市, 报告日期) 生成字段
+REPORT_FACTORIES = {
+    DeliveryReport: lambda rng, city, day: {
+        'city': city, 'cargo_volume': rng.randint(1000, 5000), 'box_count': rng.randint(50, 300),
+        'open_time': time(6, 0), 'delivery_rate_day1': _decimal(rng, 80, 95),
+        'delivery_rate_day2': _decimal(rng, 90, 98), 'delivery_rate_day3': _decimal(rng, 95, 100),
+        'removed_packages': rng.randint(0, 50), 'removal_rate': _decimal(rng, 0, 3),
+        'exception_notes': _notes(rng),
+    },
+    WarehouseReport: lambda rng, city, day: {
+        'contractor_company': f'{city} Staffing', 'attendance_count': rng.randint(20, 60),
+        'work_type': 'Regular Sorter', 'actual_hours': rng.randint(150, 500), 'hourly_rate': 20,
+        'total_cost': 0, 'cost_per_ticket': Decimal('0.0779'), 'exception_notes': _notes(rng),
+    },
+    PickupReport: lambda rng, city, day: {
+        'pickup_area': city, 'pickup_situation': '/', 'return_count': rng.randint(100, 5000),
+        'exception_notes': _notes(rng),
+    },
+    AirTransportReport: lambda rng, city, day: {
+        'flight_city': city, 'pickup_date': day - timedelta(days=1), 'cargo_out_time': time(12, 0),
+        'box_count': rng.randint(5, 250),
+    },
+    LinehaulReport: lambda rng, city, day: {
+        'supplier': f'{city} Freight', 'transport_type': f'LAX {city}',
+        'vehicle_type_count': rng.choice((26, 53)), 'billing_logic': 'single',
+        'exception_notes': _notes(rng),
+    },
+    ChangeOrderChannel: lambda rng, city, day: {
+        'channel_name': f'{city}-YWE', 'change_order_count': rng.randint(100, 3000),
+        'exception_notes': _notes(rng),
+    },
+    SortingMachineReport: lambda rng, city, day: {
+        'machine_name': f'{city}分拣机', 'machine_type': '交叉带', 'throughput': rng.randint(3000, 9000),
+        'error_rate': _decimal(rng, 0, 2), 'downtime_hours': Decimal('0.5'),
+        'maintenance_status': '正常', 'exception_notes': _notes(rng),
+    },
+    EquipmentReport: lambda rng, city, day: {
+        'equipment_name': f'{city}叉车', 'equipment_type': '叉车', 'status': '运行',
+        'utilization_rate': _decimal(rng, 50, 95), 'maintenance_hours': Decimal('1.0'),
+        'exception_notes': _notes(rng),
+    },
+    QualityReport: lambda rng, city, day: {
+        'quality_type': f'{city}分拣', 'total_count': 10000, 'error_count': rng.randint(0, 100),
+        'error_rate': _decimal(rng, 0, 1), 'exception_notes': _notes(rng),
+    },
+    CostReport: lambda rng, city, day: {
+        'cost_category': f'{city}人工', 'planned_cost': Decimal('10000'), 'actual_cost': _decimal(rng, 9000, 11000),
+        'variance': Decimal('0'), 'variance_rate': Decimal('0'), 'exception_notes': _notes(rng),
+    },
+}
+
+
+def seed_year(reporter, end_date, days=DAYS, seed=2025):
+    """用 bulk_create 写入 days 天 × 8个城市 × 10类子报表，并重建KPI汇总表与全文索引"""
+    rng = random.Random(seed)
+    DailyReport.objects.bulk_create([
+        DailyReport(report_date=end_date - timedelta(days=offset), reporter=reporter, is_published=True)
+        for offset in range(days)
+    ])
+    reports = list(DailyReport.objects.values_list('pk', 'report_date'))
+    for model, factory in REPORT_FACTORIES.items():
+        model.objects.bulk_create([
+            model(daily_report_id=pk, report_date=report_date, **factory(rng, city, report_date))
+            for pk, report_date in reports
+            for city in CITIES
+        ], batch_size=2000)
+    rebuild_rollups()
+    rebuild_search_index()
+
+
+@override_settings(PORTAL_VIEW_CACHE_ENABLED=False)
+class PortalPerformanceTest(TestCase):
+    """门户页面查询次数与耗时预算测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        # 文档下载需要真实文件：写入临时 MEDIA_ROOT
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date.today()
+        cls.user = User.objects.create_superuser(username='admin', password='testpass123')
+        seed_year(cls.user, cls.today)
+        cls.report = DailyReport.objects.get(report_date=cls.today)
+        for index in range(40):
+            Announcement.objects.create(title=f'公告{index}', content='内容', author=cls.user, priority=index % 3)
+            Document.objects.create(
+                title=f'文档{index}', file=f'documents/{index}.pdf', category='流程', uploaded_by=cls.user,
+            )
+        cls.document = Document.objects.first()
+        cls.document.file.save('manual.pdf', ContentFile(b'%PDF-1.4' + b'0' * 1024 * 1024))
+
+    def setUp(self):
+        for alias in ('default', 'portal_views'):
+            caches[alias].clear()
+        self.client.force_login(self.user)
+
+    def routes(self):
+        """
+        (路由名称, URL参数, 查询参数, 查询次数上限, 耗时上限秒)
+
+        查询次数包含会话与用户的2条查询；列表页的近似总数在预热请求后已缓存。
+        文档下载的4条查询中有1条是下载次数的原子递增；趋势页面读取预热后的分析快照，只有会话与用户查询。
+        """
+        announcement = Announcement.objects.first()
+        return [
+            ('dashboard', (), {}, 6, 0.5),
+            ('announcements', (), {}, 3, 0.5),
+            ('announcement_detail', (announcement.pk,), {}, 3, 0.5),
+            ('documents', (), {}, 3, 0.5),
+            ('document_download', (self.document.pk,), {}, 4, 0.5),
+            ('departments', (), {}, 3, 0.5),
+            ('daily_reports', (), {}, 3, 0.5),
+            ('daily_report_detail', (self.report.pk,), {}, 14, 0.5),
+            ('delivery_module', (), {}, 6, 0.5),
+            ('warehouse_module', (), {}, 5, 0.5),
+            ('pickup_module', (), {}, 4, 0.5),
+            ('airtransport_module', (), {}, 4, 0.5),
+            ('linehaul_module', (), {}, 4, 0.5),
+            ('airtransport_linehaul_module', (), {}, 2, 0.5),
+            ('change_order_module', (), {}, 3, 0.5),
+            ('sorting_machine_module', (), {}, 3, 0.5),
+            ('equipment_maintenance_module', (), {}, 3, 0.5),
+            ('quality_monitoring_module', (), {}, 3, 0.5),
+            ('exception_handling_module', (), {}, 3, 0.5),
+            ('cost_analysis_module', (), {}, 3, 0.5),
+            ('report_export', ('delivery',), {'start_date': (self.today - timedelta(days=DAYS - 1)).isoformat(),
+                                             'end_date': self.today.isoformat()}, 3, 2.0),
+            ('dashboard_api', (), {}, 3, 0.5),
+            ('exception_feed_api', (), {}, 3, 0.5),
+            ('timeseries_api', (), {'start_date': (self.today - timedelta(days=DAYS - 1)).isoformat(),
+                                    'granularity': 'month'}, 4, 0.5),
+            ('daily_report_json', (self.report.pk,), {}, 14, 0.5),
+            ('metrics_api', (), {}, 2, 0.5),
+            ('search', (), {'q': '人手不足'}, 3, 0.5),
+            ('search_api', (), {'q': '人手不足'}, 3, 0.5),
+            ('trends', (), {'metric': 'removal_rate', 'window': 3}, 2, 0.5),
+            ('trends_api', (), {'metric': 'cost_per_ticket', 'granularity': 'week'}, 2, 0.5),
+            ('delivery_anomalies_api', (), {'city': 'LAX'}, 3, 0.5),
+        ]
+
+    def request(self, url, params):
+        start = clock.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response, len(ctx.captured_queries), clock.perf_counter() - start
+
+    def test_routes_cover_urlconf(self):
+        """测试预算表覆盖 portal 的全部路由"""
+        from apps.portal.urls import urlpatterns
+        self.assertEqual({name for name, *_ in self.routes()}, {pattern.name for pattern in urlpatterns})
+
+    def test_query_and_time_budgets(self):
+        """测试每个路由的查询次数与耗时不超过预算"""
+        for name, args, params, max_queries, max_seconds in self.routes():
+            if name == 'trends_api' and not analytics.is_available():
+                # 未安装 NumPy 时趋势API返回503
+                continue
+            with self.subTest(route=name):
+                url = reverse(f'portal:{name}', args=args)
+                # 第一次请求编译模板、预热会话与权限缓存，不计入预算
+                self.request(url, params)
+                response, queries, elapsed = self.request(url, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(queries, max_queries, f'{name}: {queries} 条查询')
+                self.assertLessEqual(elapsed, max_seconds * TIME_SCALE, f'{name}: {elapsed:.3f}s')
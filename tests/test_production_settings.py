@@ -0,0 +1,80 @@
+import importlib
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.db import pragma_statements
+
+
+class ProductionSettingsTest(SimpleTestCase):
+    """生产环境配置测试"""
+
+    def load(self):
+        with mock.patch.dict(os.environ, {'SECRET_KEY': 'test-secret'}):
+            return importlib.reload(importlib.import_module('config.settings.production'))
+
+    def test_performance_settings(self):
+        """测试生产配置启用模板缓存、持久连接、缓存会话与 WAL"""
+        production = self.load()
+        self.assertFalse(production.DEBUG)
+        loader, inner = production.TEMPLATES[0]['OPTIONS']['loaders'][0]
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+        self.assertEqual(len(inner), 2)
+        self.assertFalse(production.TEMPLATES[0]['APP_DIRS'])
+
+        database = production.DATABASES['default']
+        self.assertGreater(database['CONN_MAX_AGE'], 0)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertEqual(production.SESSION_ENGINE, 'django.contrib.sessions.backends.cached_db')
+        self.assertEqual(production.SQLITE_PRAGMAS['journal_mode'], 'WAL')
+        for options in production.CACHES.values():
+            self.assertEqual(options['BACKEND'], 'django.core.cache.backends.filebased.FileBasedCache')
+
+    def test_does_not_modify_loaded_settings(self):
+        """测试导入生产配置不影响当前进程已加载的模板配置"""
+        loaders = list(settings.TEMPLATES[0]['OPTIONS'].get('loaders', []))
+        self.load()
+        self.assertEqual(settings.TEMPLATES[0]['OPTIONS'].get('loaders', []), loaders)
+
+
+class SqlitePragmaTest(TestCase):
+    """SQLite PRAGMA 连接钩子测试"""
+
+    def test_default_connection_configured(self):
+        """测试默认数据库连接已按 SQLITE_PRAGMAS 设置等待时间、缓存与临时存储"""
+        connection.ensure_connection()
+        pragma = connection.connection.execute
+        self.assertEqual(pragma('PRAGMA busy_timeout').fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(pragma('PRAGMA cache_size').fetchone()[0], settings.SQLITE_PRAGMAS['cache_size'])
+        self.assertEqual(pragma('PRAGMA temp_store').fetchone()[0], 2)
+
+    def test_invalid_pragmas_rejected(self):
+        """测试不支持的 PRAGMA 名称或不合法的取值抛出配置错误"""
+        self.assertEqual(pragma_statements({'synchronous': 'NORMAL'}), ['PRAGMA synchronous = NORMAL'])
+        with self.assertRaises(ImproperlyConfigured):
+            pragma_statements({'writable_schema': 1})
+        with self.assertRaises(ImproperlyConfigured):
+            pragma_statements({'journal_mode': 'WAL; DROP TABLE portal_dailyreport'})
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'temp_store': 'MEMORY'})
+    def test_pragmas_applied_on_new_connection(self):
+        """测试新建连接时按 SQLITE_PRAGMAS 设置参数"""
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper(
+                {**connection.settings_dict, 'NAME': os.path.join(directory, 'pragma.sqlite3')},
+                alias='pragma_test',
+            )
+            wrapper.ensure_connection()
+            try:
+                pragma = wrapper.connection.execute
+                self.assertEqual(pragma('PRAGMA journal_mode').fetchone()[0], 'wal')
+                self.assertEqual(pragma('PRAGMA synchronous').fetchone()[0], 1)
+                self.assertEqual(pragma('PRAGMA temp_store').fetchone()[0], 2)
+            finally:
+                wrapper.close()
@@ -0,0 +1,81 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from apps.portal.demo_data import generate_demo_reports
+
+User = get_user_model()
+
+# 模块页面 -> 其查询应使用的索引
+MODULE_INDEXES = {
+    'delivery_module': {'delivery_date_city_idx'},
+    'warehouse_module': {'warehouse_date_name_idx'},
+    'pickup_module': {'exchange_date_name_idx', 'pickup_date_name_idx'},
+    'airtransport_module': {'airtransport_report_idx'},
+    'linehaul_module': {'linehaul_report_idx'},
+    'change_order_module': {'changeorder_date_name_idx'},
+    'sorting_machine_module': {'sorting_date_name_idx'},
+    'equipment_maintenance_module': {'equipment_date_name_idx'},
+    'quality_monitoring_module': {'quality_date_name_idx'},
+    'cost_analysis_module': {'cost_date_name_idx'},
+    'exception_handling_module': {
+        'delivery_exception_idx', 'warehouse_exception_idx', 'pickup_exception_idx',
+        'linehaul_exception_idx', 'changeorder_exception_idx', 'sorting_exception_idx',
+        'equipment_exception_idx', 'quality_exception_idx', 'cost_exception_idx',
+    },
+    'daily_reports': {'dailyreport_list_idx'},
+    'announcements': {'announcement_list_idx'},
+    'documents': {'document_list_idx'},
+}
+
+
+@override_settings(PORTAL_VIEW_CACHE_ENABLED=False)
+class QueryPlanTest(TestCase):
+    """查询计划测试：模块页面的查询使用匹配其访问模式的索引"""
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_demo_reports(days=3)
+        cls.user = User.objects.create_superuser(username='admin', password='testpass123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def query_plans(self, url_name):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(f'portal:{url_name}'))
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or '"portal_' not in sql:
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def test_module_views_use_indexes(self):
+        """测试各模块页面的查询使用对应索引，且不全表扫描子报表"""
+        for url_name, expected in MODULE_INDEXES.items():
+            with self.subTest(view=url_name):
+                plans = self.query_plans(url_name)
+                used = {
+                    index for _, steps in plans for step in steps for index in expected
+                    if f'USING INDEX {index} ' in f'{step} '
+                }
+                self.assertEqual(used, expected)
+                for sql, steps in plans:
+                    for step in steps:
+                        if step.startswith('SCAN portal_') and 'USING' not in step:
+                            self.fail(f'{url_name}: 全表扫描 {step}\n{sql}')
+
+    def test_range_queries_need_no_sort(self):
+        """测试按日期范围读取子报表时由索引给出默认排序，不需要临时排序"""
+        for url_name in ('warehouse_module', 'change_order_module', 'cost_analysis_module'):
+            with self.subTest(view=url_name):
+                for sql, steps in self.query_plans(url_name):
+                    if 'BETWEEN' in sql and 'ORDER BY' in sql:
+                        self.assertFalse([step for step in steps if 'TEMP B-TREE' in step], sql)
@@ -0,0 +1,68 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test.client import RequestFactory
+from apps.rbac.menu import load_menu_tree, render_menu
+from apps.rbac.models import Role, Resource, Permission, RolePermission, UserRole
+
+User = get_user_model()
+
+
+class MenuServiceTest(TestCase):
+    """菜单服务测试（默认菜单由数据迁移写入）"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        role = Role.objects.create(name='配送')
+        RolePermission.objects.create(role=role, permission=Permission.objects.get(permission_code='delivery.read'))
+        UserRole.objects.create(user=self.user, role=role)
+
+    def render(self, user):
+        request = RequestFactory().get('/portal/delivery/')
+        request.user = user
+        return render_menu(request)
+
+    def test_tree_loaded_in_one_query(self):
+        """测试整棵菜单树一条查询加载"""
+        with self.assertNumQueries(1):
+            tree = load_menu_tree()
+        codes = [node['code'] for node in tree]
+        self.assertEqual(codes[:3], ['dashboard', 'daily_report', 'operations'])
+        operations = tree[2]
+        self.assertEqual([child['code'] for child in operations['children']], ['delivery', 'warehouse', 'pickup'])
+        self.assertEqual(operations['children'][0]['url'], '/portal/delivery/')
+
+    @override_settings(RBAC_ENFORCE_PERMISSIONS=True)
+    def test_filtered_by_permissions(self):
+        """测试按权限过滤菜单，无可见子菜单的分组隐藏"""
+        html = self.render(User.objects.get(pk=self.user.pk))
+        self.assertIn('配送管理', html)
+        self.assertIn('仪表板', html)
+        self.assertNotIn('仓内管理', html)
+        self.assertNotIn('运输管理', html)
+
+        admin = User.objects.create_superuser(username='admin', password='adminpass123')
+        self.assertIn('运输管理', self.render(admin))
+
+    @override_settings(RBAC_ENFORCE_PERMISSIONS=True)
+    def test_rendered_fragment_cached_per_role_set(self):
+        """测试相同权限集合的用户复用渲染结果，资源变更后失效"""
+        self.render(User.objects.get(pk=self.user.pk))
+        other = User.objects.create_user(username='other', password='testpass123')
+        UserRole.objects.create(user=other, role=Role.objects.get(name='配送'))
+        self.render(User.objects.get(pk=other.pk))
+        user = User.objects.get(pk=other.pk)
+        with self.assertNumQueries(0):
+            self.render(user)
+
+        Resource.objects.filter(resource_code='delivery').update(name='配送中心')
+        Resource.objects.get(resource_code='pickup').save()
+        self.assertIn('配送中心', self.render(user))
+
+    def test_sidebar_in_pages(self):
+        """测试页面侧边栏由菜单服务渲染"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/portal/delivery/')
+        self.assertContains(response, 'href="/portal/warehouse/"')
+        self.assertContains(response, 'class="dropdown-item active" href="/portal/delivery/"')
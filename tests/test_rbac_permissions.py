@@ -0,0 +1,77 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from apps.rbac.models import Role, Resource, Permission, RolePermission, UserRole
+from apps.rbac.permissions import get_user_permissions, has_permission
+
+User = get_user_model()
+
+
+class PermissionResolverTest(TestCase):
+    """权限解析测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.role = Role.objects.create(name='运营')
+        # 运营管理 -> 配送管理 / 仓内管理 / 换单揽收 由菜单数据迁移写入
+        self.operations = Resource.objects.get(resource_code='operations')
+        self.delivery = Resource.objects.get(resource_code='delivery')
+        self.delivery_export = Permission.objects.create(
+            name='导出配送', permission_code='delivery.export_csv', permission_type='read', resource=self.delivery
+        )
+        self.operations_read = Permission.objects.create(
+            name='查看运营', permission_code='operations.read', permission_type='read', resource=self.operations
+        )
+        RolePermission.objects.create(role=self.role, permission=self.operations_read)
+        UserRole.objects.create(user=self.user, role=self.role)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_inherits_child_resources(self):
+        """测试父资源上的权限被子资源继承"""
+        permissions = get_user_permissions(self.fresh_user())
+        self.assertEqual(permissions, frozenset({
+            'operations.read', 'delivery.read', 'delivery.export_csv', 'warehouse.read', 'pickup.read',
+        }))
+        self.assertNotIn('delivery.update', permissions)
+
+    def test_cached_per_user(self):
+        """测试编译结果按用户缓存，请求内只查找集合"""
+        get_user_permissions(self.fresh_user())
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(has_permission(user, 'delivery.read'))
+            self.assertFalse(has_permission(user, 'delivery.delete'))
+
+    def test_invalidated_by_signals(self):
+        """测试角色、资源变更后重新编译"""
+        self.assertIn('delivery.read', get_user_permissions(self.fresh_user()))
+        self.role.is_active = False
+        self.role.save()
+        self.assertEqual(get_user_permissions(self.fresh_user()), frozenset())
+
+        self.role.is_active = True
+        self.role.save()
+        self.delivery.is_active = False
+        self.delivery.save()
+        self.assertEqual(
+            get_user_permissions(self.fresh_user()),
+            frozenset({'operations.read', 'warehouse.read', 'pickup.read'}),
+        )
+
+        UserRole.objects.filter(user=self.user).delete()
+        self.assertEqual(get_user_permissions(self.fresh_user()), frozenset())
+
+    @override_settings(RBAC_ENFORCE_PERMISSIONS=True)
+    def test_require_permission_on_views(self):
+        """测试开启权限检查后模块页面按权限放行"""
+        self.client.login(username='testuser', password='testpass123')
+        self.assertEqual(self.client.get('/portal/delivery/').status_code, 200)
+        self.assertEqual(self.client.get('/portal/airtransport/').status_code, 403)
+        self.assertEqual(self.client.get('/portal/export/air_transport/').status_code, 403)
+        # 换单数据展示在换单揽收页面，导出检查 pickup.read
+        self.assertEqual(self.client.get('/portal/export/exchange_order/').status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.client.get('/portal/delivery/').status_code, 302)
@@ -0,0 +1,95 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from datetime import date, time
+from decimal import Decimal
+from apps.portal.models import (
+    DailyReport, DeliveryReport, WarehouseReport, QualityReport, CostReport
+)
+
+User = get_user_model()
+
+
+class DailyReportDetailTest(TestCase):
+    """日报详情测试"""
+
+    def setUp(self):
+        caches['portal_views'].clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.report = DailyReport.objects.create(report_date=date.today(), reporter=self.user, is_published=True)
+        for city, rate in (('LAX', '1.00'), ('SAN', '2.00')):
+            DeliveryReport.objects.create(
+                daily_report=self.report, city=city, cargo_volume=100, box_count=10,
+                open_time=time(6, 0), delivery_rate_day1=Decimal('90'),
+                delivery_rate_day2=Decimal('95'), delivery_rate_day3=Decimal('99'),
+                removed_packages=1, removal_rate=Decimal(rate), exception_notes='延误' if city == 'SAN' else '',
+            )
+        WarehouseReport.objects.create(
+            daily_report=self.report, contractor_company='Ocean', attendance_count=50,
+            work_type='Regular Sorter', actual_hours=500, hourly_rate=20, cost_per_ticket=Decimal('0.0779'),
+        )
+        for quality_type, total, errors in (('分拣', 1000, 10), ('面单', 100, 5)):
+            QualityReport.objects.create(
+                daily_report=self.report, quality_type=quality_type, total_count=total,
+                error_count=errors, error_rate=Decimal(errors * 100 / total),
+            )
+        CostReport.objects.create(
+            daily_report=self.report, cost_category='人工', planned_cost=Decimal('1000'),
+            actual_cost=Decimal('1100'), variance=Decimal('100'), variance_rate=Decimal('10'),
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_fixed_query_count_and_summaries(self):
+        """测试详情页查询次数固定，并计算各分区汇总"""
+        url = f'/portal/daily-reports/{self.report.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        summaries = response.context['summaries']
+        self.assertEqual(summaries['delivery_reports']['cargo_volume'], 200)
+        self.assertEqual(summaries['delivery_reports']['removal_rate'], Decimal('1.50'))
+        self.assertEqual(summaries['delivery_reports']['exception_count'], 1)
+        self.assertEqual(summaries['warehouse_reports']['total_cost'], 10000)
+        self.assertEqual(summaries['quality_reports']['error_rate'], Decimal('1.36'))
+        self.assertEqual(summaries['sorting_machine_reports']['count'], 0)
+        self.assertContains(response, '成本报告')
+
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(url)
+        for _ in range(3):
+            WarehouseReport.objects.create(
+                daily_report=self.report, contractor_company='HR Solution', attendance_count=5,
+                work_type='Regular Sorter', actual_hours=40, cost_per_ticket=Decimal('0.0110'),
+            )
+        with CaptureQueriesContext(connection) as second:
+            self.client.get(url)
+        self.assertEqual(len(first.captured_queries), len(second.captured_queries))
+        # 日报1条 + 11类子报表各1条
+        self.assertEqual(len([q for q in second.captured_queries if 'portal_' in q['sql']]), 12)
+
+    def test_json_cached_and_invalidated(self):
+        """测试JSON表示被缓存，子报表变更后失效"""
+        url = f'/portal/api/daily-reports/{self.report.pk}/'
+        data = self.client.get(url).json()
+        self.assertEqual(len(data['sections']), 11)
+        self.assertEqual(data['sections']['delivery_reports']['summary']['box_count'], 20)
+        self.assertEqual(data['sections']['delivery_reports']['rows'][0]['city'], 'LAX')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertFalse([q for q in ctx.captured_queries if 'portal_' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CostReport.objects.create(
+                daily_report=self.report, cost_category='运输', planned_cost=Decimal('500'),
+                actual_cost=Decimal('400'), variance=Decimal('-100'), variance_rate=Decimal('-20'),
+            )
+        data = self.client.get(url).json()
+        self.assertEqual(data['sections']['cost_reports']['summary']['count'], 2)
+
+    def test_unpublished_not_found(self):
+        """测试未发布日报返回404"""
+        self.report.is_published = False
+        self.report.save()
+        self.assertEqual(self.client.get(f'/portal/api/daily-reports/{self.report.pk}/').status_code, 404)
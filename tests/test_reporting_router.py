@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections, router
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core.routers import reporting_reads
+from apps.portal.models import DailyReport, ChangeOrderChannel
+
+User = get_user_model()
+
+
+@override_settings(PORTAL_VIEW_CACHE_ENABLED=False)
+class ReportingRouterTest(TransactionTestCase):
+    """报表分析只读库路由测试：主库为测试库，只读库为由主库复制出的 SQLite 文件"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        report = DailyReport.objects.create(report_date=date.today(), reporter=self.user, is_published=True)
+        ChangeOrderChannel.objects.create(daily_report=report, channel_name='YWE', change_order_count=100)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.add_reporting_database(os.path.join(directory, 'reporting.sqlite3'))
+        call_command('sync_reporting_database', stdout=StringIO())
+
+        # 复制之后主库的新数据，只读库中还没有
+        ChangeOrderChannel.objects.create(daily_report=report, channel_name='LATE', change_order_count=5)
+        self.client.login(username='testuser', password='testpass123')
+
+    def add_reporting_database(self, path):
+        connections.settings['reporting'] = {**connections['default'].settings_dict, 'NAME': path}
+        self.addCleanup(self.remove_reporting_database)
+
+    def remove_reporting_database(self):
+        if 'reporting' in connections.settings:
+            connections['reporting'].close()
+            del connections['reporting']
+            del connections.settings['reporting']
+
+    def test_module_view_reads_reporting_database(self):
+        """测试模块页面的报表查询发往只读库，会话与用户查询仍在主库"""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['reporting']) as reporting:
+            response = self.client.get(reverse('portal:change_order_module'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'YWE')
+        self.assertNotContains(response, 'LATE')
+
+        self.assertTrue(any('portal_changeorderchannel' in q['sql'] for q in reporting.captured_queries))
+        self.assertFalse(any('portal_' in q['sql'] for q in primary.captured_queries))
+        self.assertTrue(any('django_session' in q['sql'] for q in primary.captured_queries))
+
+    def test_routing_scope(self):
+        """测试只在标记的视图内、且只对门户模型的读查询使用只读库"""
+        self.assertEqual(router.db_for_read(ChangeOrderChannel), 'default')
+
+        @reporting_reads
+        def databases():
+            return (
+                router.db_for_read(ChangeOrderChannel),
+                router.db_for_write(ChangeOrderChannel),
+                router.db_for_read(User),
+            )
+
+        self.assertEqual(databases(), ('reporting', 'default', 'default'))
+        self.assertFalse(router.allow_migrate('reporting', 'portal'))
+
+    def test_fallback_without_reporting_database(self):
+        """测试未配置只读库时全部查询使用主库"""
+        self.remove_reporting_database()
+        self.assertEqual(reporting_reads(lambda: router.db_for_read(ChangeOrderChannel))(), 'default')
+
+        response = self.client.get(reverse('portal:change_order_module'))
+        self.assertContains(response, 'LATE')
+
+    def test_sync_refreshes_reporting_database(self):
+        """测试重新复制后只读库包含主库的最新数据"""
+        call_command('sync_reporting_database', stdout=StringIO())
+        response = self.client.get(reverse('portal:change_order_module'))
+        self.assertContains(response, 'LATE')
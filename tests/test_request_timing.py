@@ -0,0 +1,94 @@
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.urls import reverse
+from datetime import date
+from apps.core.metrics import RouteMetrics, route_metrics
+from apps.core.middleware import RequestTimingMiddleware
+from apps.portal.models import DailyReport, ChangeOrderChannel
+
+User = get_user_model()
+
+
+class RouteMetricsTest(TestCase):
+    """路由滚动统计测试"""
+
+    def test_percentiles_over_window(self):
+        """测试百分位只基于窗口内最近的样本计算"""
+        metrics = RouteMetrics(window=100)
+        for value in range(1, 201):
+            metrics.record('portal:dashboard', float(value), sql_count=2)
+        stats = metrics.snapshot()['portal:dashboard']
+        self.assertEqual(stats['requests'], 200)
+        self.assertEqual(stats['window'], 100)
+        self.assertEqual(stats['p50_ms'], 150)
+        self.assertEqual(stats['p95_ms'], 195)
+        self.assertEqual(stats['p99_ms'], 199)
+        self.assertEqual(stats['avg_sql_count'], 2)
+
+
+class RequestTimingMiddlewareTest(TestCase):
+    """请求计时中间件测试"""
+
+    def setUp(self):
+        route_metrics.reset()
+        caches['portal_views'].clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        report = DailyReport.objects.create(report_date=date.today(), reporter=self.user, is_published=True)
+        ChangeOrderChannel.objects.create(daily_report=report, channel_name='YWE', change_order_count=100)
+        self.client.login(username='testuser', password='testpass123')
+        self.async_client.force_login(self.user)
+
+    def server_timing(self, response):
+        return dict(
+            (part.split(';')[0], part) for part in response['Server-Timing'].split(', ')
+        )
+
+    def test_server_timing_header(self):
+        """测试响应头包含总耗时、SQL、模板与缓存数据，重复访问时缓存命中"""
+        url = reverse('portal:change_order_module')
+        first = self.server_timing(self.client.get(url))
+        self.assertIn('template;dur=', first['template'])
+        self.assertNotIn('desc="0 queries"', first['sql'])
+
+        second = self.server_timing(self.client.get(url))
+        self.assertNotIn('desc="0 hits', second['cache'])
+        self.assertIn('total;dur=', second['total'])
+
+    def test_async_capable(self):
+        """测试异步调用链中中间件本身是协程函数，不经过同步适配"""
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(RequestTimingMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(RequestTimingMiddleware(lambda request: HttpResponse())))
+
+    async def test_server_timing_under_async_client(self):
+        """测试 ASGI 下异步视图的响应同样带有 SQL 统计并计入路由统计"""
+        response = await self.async_client.get(reverse('portal:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('desc="0 queries"', self.server_timing(response)['sql'])
+        self.assertIn('portal:dashboard', route_metrics.snapshot())
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_log(self):
+        """测试超过阈值时写结构化慢请求日志"""
+        with self.assertLogs('apps.core.timing', 'WARNING') as logs:
+            self.client.get(reverse('portal:dashboard'))
+        self.assertIn('route=portal:dashboard', logs.output[0])
+        self.assertIn('sql_count=', logs.output[0])
+
+    def test_metrics_api_admin_only(self):
+        """测试性能指标API只对管理员开放，并返回各路由的百分位"""
+        self.client.get(reverse('portal:dashboard'))
+        self.assertEqual(self.client.get(reverse('portal:metrics_api')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        data = self.client.get(reverse('portal:metrics_api')).json()
+        dashboard = data['routes']['portal:dashboard']
+        self.assertEqual(dashboard['requests'], 1)
+        self.assertGreater(dashboard['p99_ms'], 0)
+        self.assertGreater(dashboard['avg_sql_count'], 0)
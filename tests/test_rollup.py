@@ -0,0 +1,110 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from apps.portal.models import (
+    DailyReport, DeliveryReport, WarehouseReport, ChangeOrderChannel, DailyKpiRollup
+)
+
+User = get_user_model()
+
+
+class DailyKpiRollupTest(TestCase):
+    """每日KPI汇总测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.today = date.today()
+        self.report = DailyReport.objects.create(
+            report_date=self.today, reporter=self.user, is_published=True
+        )
+
+    def create_delivery(self, report, city, cargo, removal_rate):
+        return DeliveryReport.objects.create(
+            daily_report=report, city=city, cargo_volume=cargo, box_count=10,
+            open_time=time(6, 0), delivery_rate_day1=Decimal('90'),
+            delivery_rate_day2=Decimal('95'), delivery_rate_day3=Decimal('99'),
+            removed_packages=3, removal_rate=removal_rate,
+        )
+
+    def test_incremental_save_and_delete(self):
+        """测试保存和删除时增量维护汇总"""
+        lax = self.create_delivery(self.report, 'LAX', 1000, Decimal('1.00'))
+        self.create_delivery(self.report, 'SAN', 500, Decimal('2.00'))
+
+        rollup = DailyKpiRollup.objects.get(report_date=self.today, module='delivery')
+        self.assertEqual(rollup.record_count, 2)
+        self.assertEqual(rollup.cargo_volume, 1500)
+        self.assertEqual(rollup.box_count, 20)
+        self.assertEqual(rollup.avg_removal_rate, Decimal('1.50'))
+
+        lax.cargo_volume = 2000
+        lax.save()
+        rollup.refresh_from_db()
+        self.assertEqual(rollup.cargo_volume, 2500)
+
+        lax.delete()
+        rollup.refresh_from_db()
+        self.assertEqual(rollup.record_count, 1)
+        self.assertEqual(rollup.cargo_volume, 500)
+
+    def test_move_to_other_report(self):
+        """测试明细改挂到其他日报时两天的汇总都被更新"""
+        yesterday = DailyReport.objects.create(
+            report_date=self.today - timedelta(days=1), reporter=self.user, is_published=True
+        )
+        lax = self.create_delivery(self.report, 'LAX', 1000, Decimal('1.00'))
+        lax.daily_report = yesterday
+        lax.save()
+
+        self.assertFalse(DailyKpiRollup.objects.filter(report_date=self.today).exists())
+        self.assertEqual(
+            DailyKpiRollup.objects.get(report_date=yesterday.report_date).cargo_volume, 1000
+        )
+
+    def test_rebuild_command(self):
+        """测试全量重建命令与增量结果一致"""
+        self.create_delivery(self.report, 'LAX', 1000, Decimal('1.00'))
+        WarehouseReport.objects.create(
+            daily_report=self.report, contractor_company='Ocean', attendance_count=54,
+            work_type='Regular Sorter', actual_hours=545, cost_per_ticket=Decimal('0.0779'),
+            total_cost=Decimal('10900.00'),
+        )
+        ChangeOrderChannel.objects.create(
+            daily_report=self.report, channel_name='YWE', change_order_count=14211,
+            exception_notes='渠道延迟',
+        )
+        expected = list(DailyKpiRollup.objects.order_by('module').values(
+            'module', 'record_count', 'exception_count', 'cargo_volume',
+            'attendance_count', 'actual_hours', 'total_cost', 'change_order_count',
+        ))
+        DailyKpiRollup.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_kpi_rollup', stdout=out)
+        self.assertEqual(out.getvalue().strip(), '已重建 3 条KPI汇总记录')
+        self.assertEqual(list(DailyKpiRollup.objects.order_by('module').values(
+            'module', 'record_count', 'exception_count', 'cargo_volume',
+            'attendance_count', 'actual_hours', 'total_cost', 'change_order_count',
+        )), expected)
+
+    def test_warehouse_cost_from_hours_and_rate(self):
+        """测试仓内总成本按 实际工时 × 每小时工资 汇总，与仓内模块一致（后台录入不填 total_cost）"""
+        WarehouseReport.objects.create(
+            daily_report=self.report, contractor_company='Ocean', attendance_count=54,
+            work_type='Regular Sorter', actual_hours=545, hourly_rate=22, cost_per_ticket=Decimal('0.0779'),
+        )
+        rollup = DailyKpiRollup.objects.get(report_date=self.today, module='warehouse')
+        self.assertEqual(rollup.total_cost, Decimal('11990.00'))
+
+    def test_dashboard_reads_rollup(self):
+        """测试仪表板读取汇总表"""
+        self.create_delivery(self.report, 'LAX', 1000, Decimal('1.00'))
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/portal/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['dashboard_stats']['delivery_stats']['total_cargo'], 1000
+        )
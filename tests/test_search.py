@@ -0,0 +1,181 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from datetime import date, time, timedelta
+from decimal import Decimal
+from apps.portal.models import DailyReport, DeliveryReport, WarehouseReport, QualityReport
+from apps.portal.search import (
+    TABLE, highlight, match_expression, rebuild_search_index, search, search_terms, tokenize
+)
+
+User = get_user_model()
+
+
+class SearchIndexTest(TestCase):
+    """全文搜索索引测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.today = date.today()
+        self.report = DailyReport.objects.create(report_date=self.today, reporter=self.user, is_published=True)
+        self.delivery = self.delivery_report(self.report, 'LAX', 'Customs hold 导致分箱积压，已联系清关行')
+        WarehouseReport.objects.create(
+            daily_report=self.report, contractor_company='Ocean', attendance_count=50,
+            work_type='Regular Sorter', actual_hours=400, cost_per_ticket=Decimal('0.0779'),
+            exception_notes='人员不足，临时加班',
+        )
+
+    def delivery_report(self, report, city, notes, **kwargs):
+        return DeliveryReport.objects.create(
+            daily_report=report, city=city, cargo_volume=100, box_count=10, open_time=time(6, 0),
+            delivery_rate_day1=Decimal('90'), delivery_rate_day2=Decimal('95'),
+            delivery_rate_day3=Decimal('99'), removed_packages=1, removal_rate=Decimal('1.0'),
+            exception_notes=notes, **kwargs
+        )
+
+    def index_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {TABLE}')
+            return cursor.fetchone()[0]
+
+    def test_tokenize(self):
+        """测试汉字按单字切分，查询词转为短语前缀查询"""
+        self.assertEqual(tokenize('LAX积压').split(), ['LAX', '积', '压'])
+        self.assertEqual(search_terms('  清关  , hold'), ['清关', 'hold'])
+        self.assertEqual(match_expression(['hold', '清关']), '"hold"* AND " 清  关 "*')
+
+    def test_chinese_and_english_queries(self):
+        """测试中文短词、英文词与混合查询"""
+        for query in ('积压', '清关', 'customs hold', 'CUSTOMS', '积压 hold'):
+            with self.subTest(query=query):
+                hits, has_next = search(query)
+                self.assertEqual([(hit['module'], hit['item']) for hit in hits], [('配送管理', 'LAX配送')])
+                self.assertFalse(has_next)
+        self.assertEqual([hit['item'] for hit in search('人员')[0]], ['Ocean'])
+        self.assertEqual(search('不存在的内容')[0], [])
+        self.assertEqual(search('  ')[0], [])
+
+    def test_hit_fields_and_highlight(self):
+        """测试命中记录的模块、字段、日期与高亮片段"""
+        hit = search('清关')[0][0]
+        self.assertEqual(hit['field'], '异常说明')
+        self.assertEqual(hit['report_date'], self.today.isoformat())
+        self.assertEqual(hit['daily_report_id'], self.report.pk)
+        self.assertIn('<mark>清关</mark>', hit['snippet'])
+        self.assertEqual(
+            highlight('<b>Customs</b> hold', ['customs']),
+            '&lt;b&gt;<mark>Customs</mark>&lt;/b&gt; hold',
+        )
+
+    def test_ranked_by_relevance(self):
+        """测试命中次数多的记录排在前面"""
+        self.delivery_report(self.report, 'SAN', '积压；积压；积压，分拣线停机')
+        self.assertEqual([hit['item'] for hit in search('积压')[0]], ['SAN配送', 'LAX配送'])
+
+    def test_multiple_fields(self):
+        """测试现场情况、改进措施等字段同样建立索引"""
+        self.delivery_report(self.report, 'SFO', '', site_situation='道路施工绕行')
+        QualityReport.objects.create(
+            daily_report=self.report, quality_type='分拣', total_count=100, error_count=1,
+            error_rate=Decimal('1'), improvement_measures='增加复核岗位',
+        )
+        self.assertEqual([hit['field'] for hit in search('绕行')[0]], ['现场情况'])
+        self.assertEqual([hit['module'] for hit in search('复核')[0]], ['质量监控'])
+
+    def test_sync_on_update_and_delete(self):
+        """测试子报表修改、删除后索引同步"""
+        self.delivery.exception_notes = '航班延误'
+        self.delivery.save()
+        self.assertEqual(search('积压')[0], [])
+        self.assertEqual(len(search('延误')[0]), 1)
+
+        self.delivery.delete()
+        self.assertEqual(search('延误')[0], [])
+        self.assertEqual(self.index_count(), 1)
+
+    def test_only_published_reports(self):
+        """测试只收录已发布日报，发布或撤回时重建"""
+        draft = DailyReport.objects.create(
+            report_date=self.today - timedelta(days=1), reporter=self.user, is_published=False
+        )
+        self.delivery_report(draft, 'SEA', '草稿中的异常')
+        self.assertEqual(search('草稿')[0], [])
+
+        draft.is_published = True
+        draft.save()
+        self.assertEqual(len(search('草稿')[0]), 1)
+
+        draft.is_published = False
+        draft.save(update_fields=['is_published'])
+        self.assertEqual(search('草稿')[0], [])
+
+        draft.delete()
+        self.assertEqual(self.index_count(), 2)
+
+    def test_filters_and_pagination(self):
+        """测试按来源、日期过滤与分页"""
+        self.assertEqual(search('积压', sources=['WarehouseReport'])[0], [])
+        self.assertEqual(search('积压', sources=[])[0], [])
+        self.assertEqual(search('积压', start_date=self.today + timedelta(days=1))[0], [])
+
+        for index in range(3):
+            self.delivery_report(self.report, f'C{index}', '积压')
+        hits, has_next = search('积压', limit=2)
+        self.assertEqual(len(hits), 2)
+        self.assertTrue(has_next)
+        hits, has_next = search('积压', limit=2, offset=2)
+        self.assertEqual(len(hits), 2)
+        self.assertFalse(has_next)
+
+    def test_rebuild(self):
+        """测试全量重建索引"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+        self.assertEqual(rebuild_search_index(), 2)
+        self.assertEqual(len(search('清关')[0]), 1)
+
+
+class SearchViewsTest(TestCase):
+    """全文搜索页面与API测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        report = DailyReport.objects.create(report_date=date.today(), reporter=self.user, is_published=True)
+        WarehouseReport.objects.create(
+            daily_report=report, contractor_company='Ocean', attendance_count=50,
+            work_type='Regular Sorter', actual_hours=400, cost_per_ticket=Decimal('0.0779'),
+            exception_notes='<script>人员不足</script>',
+        )
+        self.report = report
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_search_page(self):
+        """测试搜索页面显示高亮结果与日报链接，原文已转义"""
+        response = self.client.get('/portal/search/', {'q': '人员'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '&lt;script&gt;<mark>人员</mark>不足&lt;/script&gt;', html=False)
+        self.assertContains(response, f'/portal/daily-reports/{self.report.pk}/')
+
+        response = self.client.get('/portal/search/', {'q': '没有'})
+        self.assertContains(response, '没有找到')
+
+    def test_search_api(self):
+        """测试搜索API"""
+        response = self.client.get('/portal/api/search/', {'q': '人员'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['page'], 1)
+        self.assertFalse(data['has_next'])
+        self.assertEqual(data['results'][0]['module'], '仓内管理')
+        self.assertEqual(data['results'][0]['url'], f'/portal/daily-reports/{self.report.pk}/')
+
+        response = self.client.get('/portal/api/search/', {'q': '人员', 'start_date': 'bad'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(RBAC_ENFORCE_PERMISSIONS=True)
+    def test_results_filtered_by_permission(self):
+        """测试开启权限检查时只返回有查看权限的模块"""
+        cache.clear()
+        response = self.client.get('/portal/api/search/', {'q': '人员'})
+        self.assertEqual(response.json()['results'], [])
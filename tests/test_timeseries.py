@@ -0,0 +1,109 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from datetime import date, time, timedelta
+from decimal import Decimal
+from apps.portal.models import DailyReport, DeliveryReport
+from apps.portal.timeseries import timeseries, TimeseriesError
+
+User = get_user_model()
+
+
+class TimeseriesTest(TestCase):
+    """时间序列API测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        # 固定在同一周内的两天，便于验证按周聚合
+        self.monday = date.today() - timedelta(days=date.today().weekday() + 7)
+        for offset, rows in ((0, [('LAX', '1.00')]), (1, [('LAX', '2.00'), ('SAN', '4.00')])):
+            report = DailyReport.objects.create(
+                report_date=self.monday + timedelta(days=offset),
+                reporter=self.user,
+                is_published=True,
+            )
+            for city, removal_rate in rows:
+                DeliveryReport.objects.create(
+                    daily_report=report, city=city, cargo_volume=100, box_count=10,
+                    open_time=time(6, 0), delivery_rate_day1=Decimal('90'),
+                    delivery_rate_day2=Decimal('95'), delivery_rate_day3=Decimal('99'),
+                    removed_packages=1, removal_rate=Decimal(removal_rate),
+                )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_daily_series_single_query(self):
+        """测试按日序列只执行一条查询"""
+        with self.assertNumQueries(1):
+            data = timeseries(
+                'delivery', ['cargo_volume', 'avg_removal_rate'],
+                self.monday, self.monday + timedelta(days=6),
+            )
+        self.assertEqual(data['labels'], [
+            self.monday.isoformat(), (self.monday + timedelta(days=1)).isoformat()
+        ])
+        self.assertEqual(data['series']['cargo_volume'], [100, 200])
+        self.assertEqual(data['series']['avg_removal_rate'], [1.0, 3.0])
+
+    def test_weekly_series_weights_averages(self):
+        """测试按周聚合时平均值按记录数加权"""
+        data = timeseries(
+            'delivery', ['cargo_volume', 'avg_removal_rate'],
+            self.monday, self.monday + timedelta(days=6), granularity='week',
+        )
+        self.assertEqual(data['labels'], [self.monday.isoformat()])
+        self.assertEqual(data['series']['cargo_volume'], [300])
+        self.assertEqual(data['series']['avg_removal_rate'], [round(7 / 3, 2)])
+
+    def test_record_count_with_averages(self):
+        """测试同时查询记录数与平均值类指标时加权使用原始记录数"""
+        data = timeseries(
+            'delivery', ['record_count', 'avg_removal_rate'],
+            self.monday, self.monday + timedelta(days=6), granularity='week',
+        )
+        self.assertEqual(data['series']['record_count'], [3])
+        self.assertEqual(data['series']['avg_removal_rate'], [round(7 / 3, 2)])
+
+    def test_unknown_metric(self):
+        """测试未知指标"""
+        with self.assertRaises(TimeseriesError):
+            timeseries('delivery', ['attendance_count'], self.monday, self.monday)
+
+    def test_timeseries_api_conditional_get(self):
+        """测试ETag条件请求返回304"""
+        params = {
+            'module': 'delivery',
+            'metrics': 'cargo_volume,box_count',
+            'start_date': self.monday.isoformat(),
+            'end_date': (self.monday + timedelta(days=6)).isoformat(),
+        }
+        response = self.client.get('/portal/api/timeseries/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['series']['box_count'], [10, 20])
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        cached = self.client.get(
+            '/portal/api/timeseries/', params, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+        DeliveryReport.objects.filter(city='SAN').first().save()
+        DailyReport.objects.filter(report_date=self.monday).update(is_published=False)
+        changed = self.client.get(
+            '/portal/api/timeseries/', params, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()['labels']), 1)
+
+    def test_timeseries_api_bad_params(self):
+        """测试参数错误返回400"""
+        response = self.client.get('/portal/api/timeseries/', {'granularity': 'year'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/portal/api/timeseries/', {'start_date': 'bad'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_dashboard_api_declares_removal_rate(self):
+        """测试仪表板API返回移除率序列"""
+        response = self.client.get('/portal/api/dashboard/')
+        data = response.json()
+        self.assertEqual(len(data['labels']), len(data['removal_rate']))
+        self.assertIn('error_rate', data)
@@ -0,0 +1,62 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from datetime import date
+from apps.portal.models import DailyReport, ChangeOrderChannel
+
+User = get_user_model()
+
+
+class ModuleViewCacheTest(TestCase):
+    """模块页面缓存测试"""
+
+    def setUp(self):
+        caches['portal_views'].clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.report = DailyReport.objects.create(
+            report_date=date.today(), reporter=self.user, is_published=True
+        )
+        ChangeOrderChannel.objects.create(
+            daily_report=self.report, channel_name='YWE', change_order_count=100
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def portal_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in ctx.captured_queries if 'portal_' in q['sql']]
+
+    def test_repeat_hit_skips_report_queries(self):
+        """测试重复访问不再查询报表数据"""
+        _, first = self.portal_queries('/portal/change-order/')
+        self.assertTrue(first)
+        response, second = self.portal_queries('/portal/change-order/')
+        self.assertEqual(second, [])
+        self.assertEqual(len(response.context['change_order_data']), 1)
+
+    def test_invalidated_on_report_save(self):
+        """测试子报表保存后缓存失效"""
+        self.portal_queries('/portal/change-order/')
+        with self.captureOnCommitCallbacks(execute=True):
+            ChangeOrderChannel.objects.create(
+                daily_report=self.report, channel_name='USPS', change_order_count=50
+            )
+            # 提交前仍使用旧缓存，不会用未提交的数据在新代数下重建
+            _, queries = self.portal_queries('/portal/change-order/')
+            self.assertEqual(queries, [])
+        response, queries = self.portal_queries('/portal/change-order/')
+        self.assertTrue(queries)
+        self.assertEqual(len(response.context['change_order_data']), 2)
+
+    def test_key_includes_city_and_date(self):
+        """测试不同城市、日期使用不同缓存条目"""
+        self.portal_queries('/portal/delivery/')
+        _, queries = self.portal_queries('/portal/delivery/', {'city': 'LAX'})
+        self.assertTrue(queries)
+        _, queries = self.portal_queries('/portal/delivery/', {'city': 'LAX'})
+        self.assertEqual(queries, [])
+        _, queries = self.portal_queries('/portal/delivery/', {'city': 'LAX', 'date': '2025-01-01'})
+        self.assertTrue(queries)